@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -101,6 +102,54 @@ CACHES = {
 # Cache timeouts
 LIVE_ODDS_CACHE_TIMEOUT = 30  # 30 seconds for live odds
 PREMATCH_ODDS_CACHE_TIMEOUT = 300  # 5 minutes for pre-match odds
+SCRAPER_FINGERPRINT_TIMEOUT = 6 * 60 * 60  # 6 hours for scraped page fingerprints
+SCRAPER_FINGERPRINT_LOCAL_SIZE = 5000  # league pages a scraper process remembers
+
+# Expired live odds may still be served for this long while one worker
+# recomputes them; other workers wait at most ODDS_CACHE_LOCK_TIMEOUT
+ODDS_CACHE_STALE_GRACE = 30  # seconds
+ODDS_CACHE_LOCK_TIMEOUT = 5  # seconds
+
+# In-process LRU in front of the cache for hot odds keys. Writes from other
+# processes are only seen once an entry expires, so keep the TTL short.
+ODDS_LOCAL_CACHE_SIZE = 10000  # entries per worker process
+ODDS_LOCAL_CACHE_TIMEOUT = 2  # seconds
+# Write-behind for live odds (scrape_odds --write-behind): directory holding
+# one journal per shard, seconds between database flushes and whether every
+# append is fsynced
+ODDS_WRITE_BEHIND_DIR = BASE_DIR / 'write_behind'
+ODDS_WRITE_BEHIND_INTERVAL = 1.0
+ODDS_WRITE_BEHIND_FSYNC = True
+# Odds-change events for /matches/<id>/odds/stream/: 'redis' pub/sub shared by
+# all workers, or 'memory' for a single process (tests, runserver)
+ODDS_BROKER = 'redis'
+ODDS_BROKER_URL = 'redis://127.0.0.1:6379/1'
+ODDS_STREAM_QUEUE_SIZE = 100  # events buffered per client before it is reset
+ODDS_STREAM_KEEPALIVE = 15  # seconds between comments on an idle stream
+# Whole-match odds boards, kept current by the odds write path
+ODDS_BOARD_CACHE_TIMEOUT = 10 * 60  # 10 minutes
+# Odds history keeps every move for ODDS_HISTORY_RAW_DAYS, then the last
+# price per bucket and each day's open/high/low; days past the retention
+# (None keeps them) are dropped
+ODDS_HISTORY_RAW_DAYS = 7
+ODDS_HISTORY_BUCKET_MINUTES = 60
+ODDS_HISTORY_RETENTION_DAYS = None
+# Vectorized odds analytics (core.analytics): how long a scan is served
+# from the cache, and the edge over fair odds that counts as a value price
+ODDS_ANALYTICS_CACHE_TIMEOUT = 5  # seconds
+ODDS_ANALYTICS_VALUE_THRESHOLD = 0.05  # lowest threshold the API accepts
+# Arbitrages and value prices kept in the cached report; API requests
+# take a slice of it
+ODDS_ANALYTICS_REPORT_LIMIT = 200
+# Odds format for visitors and users without a preference:
+# 'decimal', 'fractional' or 'american'
+DEFAULT_ODDS_FORMAT = 'decimal'
+# Keyset-paginated fixture lists (core.pagination). Match dates are stored
+# at midnight, so live fixtures are looked for from a day back.
+FIXTURE_PAGE_SIZE = 20
+FIXTURE_PAGE_SIZE_MAX = 100
+FIXTURE_LIVE_WINDOW = timedelta(days=1)
+HOME_LIST_LIMIT = 10  # leagues and teams shown on the home page
 
 
 # Password validation
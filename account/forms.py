@@ -19,4 +19,4 @@ class UserLoginForm(forms.Form):
 class ProfileUpdateForm(forms.ModelForm):
     class Meta:
         model = Profile
-        fields = ['balance']
\ No newline at end of file
+        fields = ['balance', 'odds_format']
\ No newline at end of file
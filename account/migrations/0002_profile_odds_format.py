@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='odds_format',
+            field=models.CharField(choices=[('decimal', 'Decimal (2.50)'), ('fractional', 'Fractional (6/4)'), ('american', 'American (+150)')], default='decimal', max_length=20),
+        ),
+    ]
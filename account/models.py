@@ -38,8 +38,15 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.email
 
 class Profile(models.Model):
+    ODDS_FORMAT_CHOICES = [
+        ('decimal', 'Decimal (2.50)'),
+        ('fractional', 'Fractional (6/4)'),
+        ('american', 'American (+150)'),
+    ]
+
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    odds_format = models.CharField(max_length=20, choices=ODDS_FORMAT_CHOICES, default='decimal')
 
     class Meta:
         verbose_name_plural = "Profiles"
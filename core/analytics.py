@@ -0,0 +1,257 @@
+"""
+Vectorized odds analytics.
+
+The Odds table is loaded once into NumPy arrays and sorted by (match,
+market, parameter). Every group's figures are then computed with a
+handful of array operations (reduceat over group boundaries) instead of
+a Python loop over rows:
+
+    margin      overround of each bookmaker's line, sum(1/price) - 1
+    consensus   mean margin-free implied probability of each outcome
+    fair odds   1 / consensus
+    best        highest price of each outcome and who offers it
+    arbitrage   groups whose best prices imply less than 100% in total
+    value       prices above fair odds by more than a threshold
+
+Prices are float64 columns home/draw/away; a missing or invalid price
+(<= 1.0) is NaN and ignored. Margins, consensus and arbitrage only use
+complete books: home and away, plus the draw in THREE_WAY_MARKETS or in
+any group where some bookmaker quotes one. A 1x2 line scraped without
+its draw would otherwise look like a two-way book with a huge negative
+margin.
+"""
+import numpy as np
+from django.conf import settings
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from .models import Odds
+from .stampede import fetch, set_value
+
+OUTCOMES = ('home', 'draw', 'away')
+THREE_WAY_MARKETS = ['1x2']
+
+class OddsArrays:
+    """Columns of odds rows, one entry per (match, bookmaker, market, parameter)"""
+
+    def __init__(self, match_ids, markets, parameters, bookmaker_ids, prices):
+        self.match_ids = np.asarray(match_ids, dtype=np.int64)
+        self.markets = np.asarray(markets, dtype=object)
+        self.parameters = np.asarray(parameters, dtype=np.float64)
+        self.bookmaker_ids = np.asarray(bookmaker_ids, dtype=np.int64)
+        prices = np.array(prices, dtype=np.float64).reshape(-1, 3)
+        prices[~(prices > 1.0)] = np.nan
+        self.prices = prices
+
+    def __len__(self):
+        return len(self.match_ids)
+
+    @classmethod
+    def from_queryset(cls, queryset=None):
+        """Load Odds rows with prices cast to floats by the database"""
+        queryset = Odds.objects.all() if queryset is None else queryset
+        rows = list(queryset.values_list(
+            'match_id', 'market', 'parameter', 'bookmaker_id',
+            Cast('home_odds', FloatField()), Cast('draw_odds', FloatField()), Cast('away_odds', FloatField())
+        ))
+        if not rows:
+            return cls([], [], [], [], np.empty((0, 3)))
+        match_ids, markets, parameters, bookmaker_ids, *prices = zip(*rows)
+        # float64 conversion turns NULLs (None) into NaN
+        return cls(
+            match_ids, markets,
+            np.array(parameters, dtype=np.float64),
+            bookmaker_ids,
+            np.array(prices, dtype=np.float64).T
+        )
+
+class OddsScan:
+    """Results of scan(); per-group arrays are aligned with `groups`"""
+
+    def __init__(self, arrays, value_threshold):
+        market_labels, market_codes = np.unique(arrays.markets.astype(str), return_inverse=True)
+        # NaN parameters sort and compare as one group
+        parameter_keys = np.where(np.isnan(arrays.parameters), -np.inf, arrays.parameters)
+        order = np.lexsort((parameter_keys, market_codes, arrays.match_ids))
+
+        match_ids = arrays.match_ids[order]
+        market_codes = market_codes[order]
+        parameter_keys = parameter_keys[order]
+        self.bookmaker_ids = arrays.bookmaker_ids[order]
+        self.prices = arrays.prices[order]
+        count = len(order)
+
+        boundary = (match_ids[1:] != match_ids[:-1]) | (market_codes[1:] != market_codes[:-1]) | \
+            (parameter_keys[1:] != parameter_keys[:-1])
+        starts = np.concatenate(([0], np.flatnonzero(boundary) + 1)) if count else np.array([], dtype=np.int64)
+        self.bookmaker_counts = np.diff(np.append(starts, count))
+        self.row_groups = np.repeat(np.arange(len(starts)), self.bookmaker_counts)
+        self.groups = {
+            'match_id': match_ids[starts],
+            'market': market_labels[market_codes[starts]] if count else np.array([], dtype=str),
+            'parameter': np.where(np.isinf(parameter_keys[starts]), np.nan, parameter_keys[starts])
+        }
+        self.value_threshold = value_threshold
+        if not count:
+            empty = np.empty((0, 3))
+            self.margins = np.empty(0)
+            self.consensus = self.fair_odds = self.best = self.edges = empty
+            self.best_bookmakers = np.empty((0, 3), dtype=np.int64)
+            self.book_inverse = self.arbitrage_profit = np.empty(0)
+            self.draw_required = np.empty(0, dtype=bool)
+            return
+
+        quoted = ~np.isnan(self.prices)
+        three_way = np.isin(market_labels, THREE_WAY_MARKETS)[market_codes]
+        self.draw_required = np.logical_or.reduceat(quoted[:, 1] | three_way, starts)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inverse = np.nan_to_num(1.0 / self.prices)
+            book = inverse.sum(axis=1)
+            priced = self._complete(quoted, self.draw_required[self.row_groups])
+            self.margins = np.where(priced, book - 1.0, np.nan)
+            probabilities = np.where(priced[:, None], inverse / book[:, None], 0.0)
+
+            group_priced = np.add.reduceat(priced.astype(np.int64), starts)
+            self.consensus = np.add.reduceat(probabilities, starts, axis=0) / group_priced[:, None]
+            self.fair_odds = np.where(self.consensus > 0, 1.0 / self.consensus, np.nan)
+
+            self.best = np.fmax.reduceat(self.prices, starts, axis=0)
+            rows = np.arange(count)[:, None]
+            first_best = np.minimum.reduceat(
+                np.where(self.prices == self.best[self.row_groups], rows, count), starts, axis=0
+            )
+            self.best_bookmakers = np.where(
+                first_best < count, self.bookmaker_ids[np.minimum(first_best, count - 1)], -1
+            )
+
+            complete = self._complete(~np.isnan(self.best), self.draw_required)
+            self.book_inverse = np.where(complete, np.nansum(1.0 / self.best, axis=1), np.nan)
+            self.arbitrage_profit = 1.0 / self.book_inverse - 1.0
+
+            self.edges = self.prices * self.consensus[self.row_groups] - 1.0
+
+    @staticmethod
+    def _complete(quoted, draw_required):
+        """Which rows of a quoted-outcome mask cover every outcome their line needs"""
+        return quoted[:, 0] & quoted[:, 2] & (quoted[:, 1] | ~draw_required)
+
+    def _group(self, index):
+        parameter = self.groups['parameter'][index]
+        return {
+            'match_id': int(self.groups['match_id'][index]),
+            'market': str(self.groups['market'][index]),
+            'parameter': None if np.isnan(parameter) else float(parameter)
+        }
+
+    def arbitrages(self, limit=None):
+        """Groups whose best prices sum to an implied probability under 1, most profitable first"""
+        found = np.flatnonzero(self.book_inverse < 1.0)
+        found = found[np.argsort(-self.arbitrage_profit[found], kind='stable')][:limit]
+        results = []
+        for index in found:
+            stakes = np.nan_to_num(1.0 / self.best[index]) / self.book_inverse[index]
+            results.append({
+                **self._group(index),
+                'profit': round(float(self.arbitrage_profit[index]), 4),
+                'legs': [
+                    {
+                        'outcome': outcome,
+                        'price': float(self.best[index, column]),
+                        'bookmaker_id': int(self.best_bookmakers[index, column]),
+                        'stake': round(float(stakes[column]), 4)
+                    }
+                    for column, outcome in enumerate(OUTCOMES) if not np.isnan(self.best[index, column])
+                ]
+            })
+        return results
+
+    def value_prices(self, limit=None):
+        """Prices beating fair odds by more than value_threshold, biggest edge first"""
+        with np.errstate(invalid='ignore'):
+            rows, columns = np.nonzero(self.edges > self.value_threshold)
+        top = np.argsort(-self.edges[rows, columns], kind='stable')[:limit]
+        return [
+            {
+                **self._group(self.row_groups[row]),
+                'bookmaker_id': int(self.bookmaker_ids[row]),
+                'outcome': OUTCOMES[column],
+                'price': float(self.prices[row, column]),
+                'fair_odds': round(float(self.fair_odds[self.row_groups[row], column]), 2),
+                'edge': round(float(self.edges[row, column]), 4)
+            }
+            for row, column in zip(rows[top], columns[top])
+        ]
+
+    def bookmaker_margins(self):
+        """Average margin of each bookmaker's lines, keyed by bookmaker id"""
+        priced = ~np.isnan(self.margins)
+        ids, codes = np.unique(self.bookmaker_ids[priced], return_inverse=True)
+        averages = np.bincount(codes, weights=self.margins[priced]) / np.bincount(codes)
+        return {int(bookmaker_id): round(float(margin), 4) for bookmaker_id, margin in zip(ids, averages)}
+
+    def summary(self):
+        return {
+            'rows': len(self.prices),
+            'groups': len(self.groups['match_id']),
+            'arbitrages': int(np.count_nonzero(self.book_inverse < 1.0)),
+            'median_margin': round(float(np.nanmedian(self.margins)), 4) if np.any(~np.isnan(self.margins)) else None
+        }
+
+def scan(arrays=None, value_threshold=None):
+    """Run the analytics over `arrays`, by default the whole Odds table"""
+    if arrays is None:
+        arrays = OddsArrays.from_queryset()
+    if value_threshold is None:
+        value_threshold = settings.ODDS_ANALYTICS_VALUE_THRESHOLD
+    return OddsScan(arrays, value_threshold)
+
+def scan_report(limit=50, value_threshold=None):
+    """JSON-ready scan of the Odds table"""
+    result = scan(value_threshold=value_threshold)
+    return {
+        'summary': result.summary(),
+        'arbitrages': result.arbitrages(limit),
+        'value_prices': result.value_prices(limit),
+        'bookmaker_margins': result.bookmaker_margins()
+    }
+
+def trim_report(report, limit, value_threshold):
+    """
+    Cut a report down to `limit` opportunities of each kind and the value
+    prices whose edge beats `value_threshold`. Value prices are sorted by
+    edge, so filtering the cached top ones keeps the top ones above a
+    higher threshold.
+    """
+    value_prices = report['value_prices']
+    if value_threshold > settings.ODDS_ANALYTICS_VALUE_THRESHOLD:
+        value_prices = [value for value in value_prices if value['edge'] > value_threshold]
+    return {**report, 'arbitrages': report['arbitrages'][:limit], 'value_prices': value_prices[:limit]}
+
+def report_key():
+    return 'odds:analytics:report'
+
+def publish_scan_report():
+    """Scan now and replace the cached report, e.g. from a scanner loop"""
+    report = scan_report(settings.ODDS_ANALYTICS_REPORT_LIMIT, settings.ODDS_ANALYTICS_VALUE_THRESHOLD)
+    set_value(report_key(), report, settings.ODDS_ANALYTICS_CACHE_TIMEOUT)
+    return report
+
+def get_scan_report(limit=50, value_threshold=None):
+    """
+    scan_report() through the cache; one worker rescans when it expires.
+
+    One report is cached, scanned at ODDS_ANALYTICS_VALUE_THRESHOLD with
+    ODDS_ANALYTICS_REPORT_LIMIT opportunities, and trimmed per request, so
+    callers can't make the scan run once per threshold they ask for. A
+    threshold below the configured one raises ValueError.
+    """
+    if value_threshold is None:
+        value_threshold = settings.ODDS_ANALYTICS_VALUE_THRESHOLD
+    if value_threshold < settings.ODDS_ANALYTICS_VALUE_THRESHOLD:
+        raise ValueError(f"value threshold must be at least {settings.ODDS_ANALYTICS_VALUE_THRESHOLD}")
+    report = fetch(
+        report_key(),
+        lambda: scan_report(settings.ODDS_ANALYTICS_REPORT_LIMIT, settings.ODDS_ANALYTICS_VALUE_THRESHOLD),
+        settings.ODDS_ANALYTICS_CACHE_TIMEOUT
+    )
+    return trim_report(report, min(limit, settings.ODDS_ANALYTICS_REPORT_LIMIT), value_threshold)
@@ -0,0 +1,159 @@
+"""
+Best price and consensus index.
+
+BestOdds keeps, per (match, market, parameter), the highest price of
+each outcome across active bookmakers plus running sums for average
+prices and consensus implied probabilities. The odds write path hands
+every changed row to apply_changes() together with the prices it
+replaced. Sums are adjusted by the difference, and a maximum only has
+to be recounted from Odds when the bookmaker holding it lowered its
+price. rebuild() recomputes matches from scratch: use it for a backfill
+or after bookmakers are activated or deactivated.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import BestOdds, Odds
+
+OUTCOMES = ('home', 'draw', 'away')
+SUM_FIELDS = [f'{outcome}_sum' for outcome in OUTCOMES] + \
+    [f'{outcome}_probability_sum' for outcome in OUTCOMES]
+BEST_FIELDS = [f'best_{outcome}' for outcome in OUTCOMES] + \
+    [f'best_{outcome}_bookmaker' for outcome in OUTCOMES]
+UPDATE_FIELDS = ['bookmaker_count', 'updated_at'] + SUM_FIELDS + BEST_FIELDS
+
+def group_key(row):
+    return (row.match_id, row.market, row.parameter)
+
+def prices_of(odds):
+    return (odds.home_odds, odds.draw_odds, odds.away_odds)
+
+def implied_probabilities(prices):
+    """Implied probability of each outcome with the bookmaker's margin removed"""
+    inverse = [1 / float(price) if price else 0.0 for price in prices]
+    total = sum(inverse)
+    return [value / total if total else 0.0 for value in inverse]
+
+def _add(row, prices, sign=1):
+    """Add one bookmaker's prices to the running sums (or take them out with sign=-1)"""
+    row.bookmaker_count += sign
+    for outcome, price, probability in zip(OUTCOMES, prices, implied_probabilities(prices)):
+        if price is not None:
+            setattr(row, f'{outcome}_sum', getattr(row, f'{outcome}_sum') + sign * price)
+        setattr(row, f'{outcome}_probability_sum',
+                getattr(row, f'{outcome}_probability_sum') + sign * probability)
+
+def _raise_best(row, bookmaker_id, prices):
+    """Fold a bookmaker's new prices into the maxima; False if they need a recount"""
+    accurate = True
+    for outcome, price in zip(OUTCOMES, prices):
+        best = getattr(row, f'best_{outcome}')
+        if price is not None and (best is None or price >= best):
+            setattr(row, f'best_{outcome}', price)
+            setattr(row, f'best_{outcome}_bookmaker_id', bookmaker_id)
+        elif getattr(row, f'best_{outcome}_bookmaker_id') == bookmaker_id:
+            # The best price was lowered; another bookmaker may now lead
+            accurate = False
+    return accurate
+
+def _reset(row):
+    row.bookmaker_count = 0
+    for field in SUM_FIELDS:
+        setattr(row, field, 0)
+    for outcome in OUTCOMES:
+        setattr(row, f'best_{outcome}', None)
+        setattr(row, f'best_{outcome}_bookmaker_id', None)
+
+def _active_odds(match_ids=None, markets=None):
+    query = {'bookmaker__is_active': True}
+    if match_ids is not None:
+        query['match_id__in'] = match_ids
+    if markets is not None:
+        query['market__in'] = markets
+    return Odds.objects.filter(**query).values_list(
+        'match_id', 'market', 'parameter', 'bookmaker_id', 'home_odds', 'draw_odds', 'away_odds'
+    )
+
+def _recount(rows):
+    """Recompute the given BestOdds rows from the Odds table in one query"""
+    rows = {group_key(row): row for row in rows}
+    for row in rows.values():
+        _reset(row)
+    for match_id, market, parameter, bookmaker_id, *prices in _active_odds(
+        {key[0] for key in rows}, {key[1] for key in rows}
+    ):
+        row = rows.get((match_id, market, parameter))
+        if row is not None:
+            _add(row, prices)
+            _raise_best(row, bookmaker_id, prices)
+
+def apply_changes(changes):
+    """
+    Update BestOdds for changed Odds of active bookmakers.
+
+    `changes` is a list of (odds, previous) pairs, where previous is the
+    (home, draw, away) the row held before, or None for a new row. The
+    Odds table must already hold the new prices.
+    """
+    groups = {}
+    for odds, previous in changes:
+        groups.setdefault(group_key(odds), []).append((odds, previous))
+    if not groups:
+        return
+
+    try:
+        _apply(groups)
+    except IntegrityError:
+        # Another writer inserted one of these lines after our read; its
+        # row is visible now, so apply the changes on top of it
+        _apply(groups)
+
+def _apply(groups):
+    with transaction.atomic():
+        rows = {
+            group_key(row): row
+            for row in BestOdds.objects.select_for_update().filter(
+                match_id__in={key[0] for key in groups},
+                market__in={key[1] for key in groups}
+            )
+            if group_key(row) in groups
+        }
+        recount = []
+        for key, group_changes in groups.items():
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = BestOdds(match_id=key[0], market=key[1], parameter=key[2])
+            accurate = True
+            for odds, previous in group_changes:
+                if previous is not None:
+                    _add(row, previous, -1)
+                _add(row, prices_of(odds))
+                accurate = _raise_best(row, odds.bookmaker_id, prices_of(odds)) and accurate
+            if not accurate:
+                recount.append(row)
+        if recount:
+            _recount(recount)
+
+        now = timezone.now()
+        for row in rows.values():
+            row.updated_at = now
+        BestOdds.objects.bulk_create([row for row in rows.values() if row.pk is None])
+        BestOdds.objects.bulk_update([row for row in rows.values() if row.pk is not None], UPDATE_FIELDS)
+
+def rebuild(match_ids=None):
+    """Recompute BestOdds from the Odds table, for some matches or all of them"""
+    existing = BestOdds.objects.all()
+    if match_ids is not None:
+        existing = existing.filter(match_id__in=match_ids)
+    rows = {}
+    for match_id, market, parameter, bookmaker_id, *prices in _active_odds(match_ids):
+        key = (match_id, market, parameter)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = BestOdds(match_id=match_id, market=market, parameter=parameter)
+        _add(row, prices)
+        _raise_best(row, bookmaker_id, prices)
+
+    with transaction.atomic():
+        existing.delete()
+        BestOdds.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
@@ -0,0 +1,208 @@
+"""
+Per-match odds board: every market and bookmaker of a match in one cache entry.
+
+A board is a small document of ids and numbers only:
+
+    {
+        'match_id': 12,
+        'bookmakers': [[3, 'bet365'], ...],
+        'odds': [[bookmaker_id, market, parameter, home, draw, away, is_live], ...],
+        'updated': 1714831200
+    }
+
+Prices are stored as integer hundredths (to_price's precision) and draw is
+None for two-way markets. It is serialised with msgpack when installed and
+compact JSON otherwise. Readers accept either; a process without msgpack
+treats a msgpack board written by another process as missing and
+rebuilds it, so processes with and without msgpack can share a cache.
+
+Boards are read, merged and written back by several writers (the scraper's
+writer thread, write-behind publishing, other processes). Each match's
+board therefore has a lock in the cache, taken with cache.add like
+core.stampede's, for every read-modify-write and rebuild.
+"""
+import json
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .metrics import metrics
+from .models import Odds
+from .odds_format import format_prices
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+PRICE_SCALE = 100
+LOCK_POLL = 0.005
+
+def board_key(match_id):
+    return f"board:{match_id}"
+
+def _lock_key(key):
+    return f"{key}:lock"
+
+def _lock(key, wait=True):
+    """
+    Take a board's lock, waiting up to ODDS_CACHE_LOCK_TIMEOUT for another
+    holder unless `wait` is off. Returns whether the lock was taken; a
+    writer that timed out goes ahead unlocked rather than drop its change.
+    """
+    deadline = time.monotonic() + settings.ODDS_CACHE_LOCK_TIMEOUT
+    while not cache.add(_lock_key(key), 1, timeout=settings.ODDS_CACHE_LOCK_TIMEOUT):
+        if not wait:
+            return False
+        if time.monotonic() >= deadline:
+            metrics.incr('board_lock_timeouts')
+            return False
+        metrics.incr('board_lock_waits')
+        time.sleep(LOCK_POLL)
+    return True
+
+def encode_board(board):
+    if msgpack:
+        return msgpack.packb(board, use_bin_type=True)
+    return json.dumps(board, separators=(',', ':'))
+
+def decode_board(blob):
+    """The board in a cached blob, or None when this process cannot read it"""
+    if isinstance(blob, bytes):
+        if msgpack is None:
+            metrics.incr('board_undecodable')
+            return None
+        return msgpack.unpackb(blob, raw=False, strict_map_key=False)
+    return json.loads(blob)
+
+def scale_price(value):
+    return None if value is None else int(round(value * PRICE_SCALE))
+
+def board_row(odds):
+    """Board entry for anything with Odds' fields (a model instance or unsaved Odds)"""
+    return [
+        odds.bookmaker_id, odds.market, odds.parameter,
+        scale_price(odds.home_odds), scale_price(odds.draw_odds), scale_price(odds.away_odds),
+        odds.is_live
+    ]
+
+def _row_key(row):
+    return row[0], row[1], row[2]
+
+def build_board(match_id):
+    """
+    Build a match's board from the database and cache it. While a writer
+    holds the board's lock the board is built but not cached, as the
+    writer may be about to merge a row this read missed.
+    """
+    key = board_key(match_id)
+    if not _lock(key, wait=False):
+        metrics.incr('board_builds_uncached')
+        return _read_board(match_id)
+    try:
+        board = _read_board(match_id)
+        cache.set(key, encode_board(board), timeout=settings.ODDS_BOARD_CACHE_TIMEOUT)
+    finally:
+        cache.delete(_lock_key(key))
+    return board
+
+def _read_board(match_id):
+    rows, bookmakers = [], {}
+    for odds in Odds.objects.filter(match_id=match_id).select_related('bookmaker').order_by(
+        'market', 'parameter', '-bookmaker__priority', 'bookmaker__name'
+    ):
+        rows.append(board_row(odds))
+        bookmakers[odds.bookmaker_id] = odds.bookmaker.name
+
+    board = {
+        'match_id': match_id,
+        'bookmakers': sorted([list(item) for item in bookmakers.items()]),
+        'odds': rows,
+        'updated': int(time.time())
+    }
+    return board
+
+def get_board(match_id):
+    """A match's board with a single cache read, rebuilding it on a miss"""
+    blob = cache.get(board_key(match_id))
+    board = None if blob is None else decode_board(blob)
+    if board is None:
+        metrics.incr('board_misses')
+        return build_board(match_id)
+    metrics.incr('board_hits')
+    return board
+
+def update_boards(changed, bookmaker_names=None):
+    """
+    Merge changed odds into the cached boards of their matches.
+
+    `changed` maps match ids to lists of objects with Odds' fields;
+    `bookmaker_names` maps bookmaker ids to names for bookmakers the board
+    may not list yet. Boards that are not cached are left for the next
+    reader to build in full.
+
+    The boards' locks are held from the read to the write, taken in match
+    order so two writers cannot each hold a lock the other waits for.
+    """
+    keys = {board_key(match_id): match_id for match_id in changed}
+    locked = [key for key in sorted(keys, key=keys.get) if _lock(key)]
+    try:
+        _merge_boards(keys, changed, bookmaker_names)
+    finally:
+        cache.delete_many([_lock_key(key) for key in locked])
+
+def _merge_boards(keys, changed, bookmaker_names):
+    blobs = cache.get_many(keys)
+    updated, unreadable = {}, []
+    for key, blob in blobs.items():
+        board = decode_board(blob)
+        if board is None:
+            # Dropped rather than left without this change; the next reader rebuilds it
+            unreadable.append(key)
+            continue
+        rows = {_row_key(row): row for row in board['odds']}
+        names = dict(board['bookmakers'])
+        for odds in changed[keys[key]]:
+            row = board_row(odds)
+            rows[_row_key(row)] = row
+            if odds.bookmaker_id not in names:
+                names[odds.bookmaker_id] = (bookmaker_names or {}).get(odds.bookmaker_id, '')
+
+        board['odds'] = list(rows.values())
+        board['bookmakers'] = sorted([list(item) for item in names.items()])
+        board['updated'] = int(time.time())
+        updated[key] = encode_board(board)
+
+    if updated:
+        cache.set_many(updated, timeout=settings.ODDS_BOARD_CACHE_TIMEOUT)
+        metrics.incr('board_updates', len(updated))
+    if unreadable:
+        cache.delete_many(unreadable)
+
+def format_rows(rows, odds_format):
+    """Board rows with their prices replaced by display strings in `odds_format`"""
+    prices = iter(format_prices([price for row in rows for price in row[3:6]], odds_format))
+    return [[*row[:3], next(prices), next(prices), next(prices), *row[6:]] for row in rows]
+
+def board_markets(board, odds_format='decimal'):
+    """
+    Group a board's rows by market for display, with prices formatted in
+    one pass (see core.odds_format):
+    [(market, [{'bookmaker_id', 'bookmaker', 'parameter', 'home', 'draw', 'away', 'is_live'}, ...]), ...]
+    """
+    names = dict(board['bookmakers'])
+    prices = iter(format_prices(
+        [price for row in board['odds'] for price in row[3:6]], odds_format
+    ))
+    markets = {}
+    for bookmaker_id, market, parameter, _, draw, _, is_live in board['odds']:
+        home, draw_display, away = next(prices), next(prices), next(prices)
+        markets.setdefault(market, []).append({
+            'bookmaker_id': bookmaker_id,
+            'bookmaker': names.get(bookmaker_id, ''),
+            'parameter': parameter,
+            'home': home,
+            'draw': None if draw is None else draw_display,
+            'away': away,
+            'is_live': is_live
+        })
+    return sorted(markets.items())
@@ -0,0 +1,120 @@
+"""
+Odds movement history.
+
+Every price change the write path makes is appended to OddsHistory, so
+line movements can be charted without re-scraping. Rows older than
+ODDS_HISTORY_RAW_DAYS are downsampled a day at a time to the last price
+in each ODDS_HISTORY_BUCKET_MINUTES bucket. The rows holding each line's
+daily open, high and low are kept too, so daily open/high/low/close
+read the same before and after. Days past ODDS_HISTORY_RETENTION_DAYS
+(if set) are dropped.
+"""
+from datetime import timedelta
+from itertools import groupby
+from decimal import Decimal
+from django.conf import settings
+from django.utils import timezone
+from .models import OddsHistory
+
+DELETE_CHUNK = 500
+
+def _scale(value):
+    return None if value is None else int(round(value * OddsHistory.PRICE_SCALE))
+
+def _unscale(value):
+    return None if value is None else Decimal(value) / OddsHistory.PRICE_SCALE
+
+def record_changes(rows, recorded_at=None):
+    """Append a history row for each changed Odds (saved or not) in one insert"""
+    recorded_at = recorded_at or timezone.now()
+    day = timezone.localdate(recorded_at)
+    OddsHistory.objects.bulk_create([
+        OddsHistory(
+            match_id=odds.match_id,
+            bookmaker_id=odds.bookmaker_id,
+            market=odds.market,
+            parameter=odds.parameter,
+            home_odds=_scale(odds.home_odds),
+            draw_odds=_scale(odds.draw_odds),
+            away_odds=_scale(odds.away_odds),
+            is_live=odds.is_live,
+            recorded_at=recorded_at,
+            day=day
+        )
+        for odds in rows
+    ])
+
+def price_series(match_id, market, bookmaker_id, parameter=None, since=None, until=None):
+    """
+    [(recorded_at, home, draw, away, is_live), ...] for one line, oldest first,
+    read with a single range scan on the (match, market, bookmaker, parameter,
+    recorded_at) index.
+    """
+    query = {'match_id': match_id, 'market': market, 'bookmaker_id': bookmaker_id}
+    if parameter is None:
+        query['parameter__isnull'] = True
+    else:
+        query['parameter'] = parameter
+    if since:
+        query['recorded_at__gte'] = since
+    if until:
+        query['recorded_at__lt'] = until
+
+    return [
+        (recorded_at, _unscale(home), _unscale(draw), _unscale(away), is_live)
+        for recorded_at, home, draw, away, is_live in OddsHistory.objects.filter(**query)
+        .order_by('recorded_at')
+        .values_list('recorded_at', 'home_odds', 'draw_odds', 'away_odds', 'is_live')
+    ]
+
+def downsample(raw_days=None, bucket_minutes=None, retention_days=None):
+    """
+    Thin out history older than `raw_days` to the last price per bucket,
+    plus each line's daily open, high and low, and drop days older than
+    `retention_days`. Safe to re-run: a day that is already downsampled
+    has nothing left to delete. Returns rows deleted.
+    """
+    raw_days = settings.ODDS_HISTORY_RAW_DAYS if raw_days is None else raw_days
+    bucket = 60 * (bucket_minutes or settings.ODDS_HISTORY_BUCKET_MINUTES)
+    retention_days = settings.ODDS_HISTORY_RETENTION_DAYS if retention_days is None else retention_days
+    today = timezone.localdate()
+
+    deleted = 0
+    if retention_days:
+        deleted += OddsHistory.objects.filter(day__lt=today - timedelta(days=retention_days)).delete()[0]
+
+    days = OddsHistory.objects.filter(
+        day__lt=today - timedelta(days=raw_days)
+    ).values_list('day', flat=True).distinct().order_by('day')
+    for day in list(days):
+        deleted += _downsample_day(day, bucket)
+    return deleted
+
+def _kept_rows(rows, bucket):
+    """Ids of one line's rows for a day that survive downsampling"""
+    kept = {rows[0][0]}
+    for _, in_bucket in groupby(rows, key=lambda row: int(row[1].timestamp()) // bucket):
+        kept.add(list(in_bucket)[-1][0])
+    for price in (2, 3, 4):
+        priced = [row for row in rows if row[price] is not None]
+        if priced:
+            kept.add(max(priced, key=lambda row: row[price])[0])
+            kept.add(min(priced, key=lambda row: row[price])[0])
+    return kept
+
+def _downsample_day(day, bucket):
+    doomed = []
+    history = OddsHistory.objects.filter(day=day).order_by(
+        'match_id', 'market', 'bookmaker_id', 'parameter', 'recorded_at', 'id'
+    ).values_list(
+        'match_id', 'market', 'bookmaker_id', 'parameter',
+        'id', 'recorded_at', 'home_odds', 'draw_odds', 'away_odds'
+    )
+    for _, line in groupby(history, key=lambda row: row[:4]):
+        rows = [row[4:] for row in line]
+        kept = _kept_rows(rows, bucket)
+        doomed.extend(row[0] for row in rows if row[0] not in kept)
+
+    for start in range(0, len(doomed), DELETE_CHUNK):
+        OddsHistory.objects.filter(id__in=doomed[start:start + DELETE_CHUNK]).delete()
+    return len(doomed)
@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+from .metrics import metrics as default_metrics
+
+_MISSING = object()
+
+class LocalCache:
+    """
+    Bounded in-process LRU with a per-entry TTL.
+
+    Sits in front of the shared Django cache for hot keys, so repeat reads
+    in the same worker skip the network round-trip. Entries are only as
+    fresh as their TTL allows for writes made by other processes; writes
+    made through this process update or drop them straight away.
+    """
+
+    def __init__(self, maxsize, timeout, name='local_cache', metrics=None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.name = name
+        self.metrics = metrics or default_metrics
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires = entry
+                if expires > now:
+                    self._data.move_to_end(key)
+                    hit = True
+                else:
+                    del self._data[key]
+                    hit = False
+            else:
+                hit = False
+        self.metrics.incr(f'{self.name}_hits' if hit else f'{self.name}_misses')
+        return value if hit else default
+
+    def set(self, key, value, timeout=None):
+        expires = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.metrics.incr(f'{self.name}_evictions')
+
+    def set_many(self, data, timeout=None):
+        for key, value in data.items():
+            self.set(key, value, timeout)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
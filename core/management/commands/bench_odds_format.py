@@ -0,0 +1,84 @@
+import random
+import time
+from decimal import Decimal
+from fractions import Fraction
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from core.odds_format import FORMATS, format_prices, table, to_hundredths
+
+class Command(BaseCommand):
+    help = 'Time formatting and rendering the best prices of a fixture page in every odds format'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--matches', type=int, default=500, help='Fixtures on the page')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per format; the median is reported')
+        parser.add_argument(
+            '--budget-ms', type=float, default=5.0,
+            help='Time allowed to format the page\'s prices, excluding template rendering'
+        )
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Decimals with two places, as BestOdds holds them
+        fixtures = [
+            [Decimal(f"{rng.uniform(low, high):.2f}") for low, high in ((1.05, 15), (2.8, 5), (1.05, 15))]
+            for _ in range(options['matches'])
+        ]
+        cells = len(fixtures) * 3
+        self.stdout.write(f"{options['matches']} fixtures, {cells} prices")
+
+        for odds_format in FORMATS:
+            start = time.perf_counter()
+            table(odds_format)
+            build = time.perf_counter() - start
+
+            batch = self.median(options['repeat'], lambda: format_prices(
+                [to_hundredths(price) for prices in fixtures for price in prices], odds_format
+            ))
+            per_cell = self.median(options['repeat'], lambda: [
+                self.convert_cell(price, odds_format) for prices in fixtures for price in prices
+            ])
+            render = self.median(options['repeat'], lambda: self.render(fixtures, odds_format))
+
+            verdict = 'within' if batch * 1000 <= options['budget_ms'] else 'OVER'
+            self.stdout.write(
+                f"  {odds_format:<10} batch {batch * 1000:6.2f}ms ({verdict} {options['budget_ms']}ms budget), "
+                f"per-cell {per_cell * 1000:6.2f}ms, page render {render * 1000:6.1f}ms, "
+                f"table built once in {build * 1000:.0f}ms"
+            )
+
+    def median(self, repeat, run):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return sorted(timings)[len(timings) // 2]
+
+    def convert_cell(self, price, odds_format):
+        """Per-cell conversion without tables, as a template filter would do it"""
+        if odds_format == 'fractional':
+            fraction = Fraction(str(price)) - 1
+            return str(fraction.limit_denominator(20))
+        if odds_format == 'american':
+            return f"+{round((price - 1) * 100)}" if price >= 2 else f"-{round(100 / (price - 1))}"
+        return f"{price:.2f}"
+
+    def render(self, fixtures, odds_format):
+        """Render the match list page for the fixtures, prices formatted in one pass"""
+        prices = iter(format_prices(
+            [to_hundredths(price) for prices in fixtures for price in prices], odds_format
+        ))
+        team = SimpleNamespace(name='Team')
+        matches = [
+            SimpleNamespace(
+                id=index + 1, home_team=team, away_team=team, league=SimpleNamespace(name='League'),
+                match_date=None, match_time='15:00', status='scheduled',
+                best_prices=SimpleNamespace(best_draw=draw, bookmaker_count=10),
+                best_display={'home': next(prices), 'draw': next(prices), 'away': next(prices)}
+            )
+            for index, (_, draw, _) in enumerate(fixtures)
+        ]
+        return render_to_string('core/match_list.html', {'matches': matches})
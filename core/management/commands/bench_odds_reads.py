@@ -0,0 +1,112 @@
+import random
+import time
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from core.metrics import metrics
+from core.models import Match, Odds
+from core.odds_manager import OddsManager, local_odds
+
+class Command(BaseCommand):
+    help = 'Replay a skewed odds read workload with interleaved price updates and report cache effectiveness'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reads', type=int, default=20000, help='Number of get_odds calls')
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Zipf exponent of match popularity (0 reads every match equally)'
+        )
+        parser.add_argument(
+            '--write-every', type=int, default=200,
+            help='Reprice one match through save_odds_bulk after this many reads (0 for none)'
+        )
+        parser.add_argument(
+            '--uncached', action='store_true',
+            help='Read straight from the database, as get_odds did before pre-match caching'
+        )
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        matches = list(Match.objects.values_list('id', 'status'))
+        markets = list(Odds.objects.values_list('market', flat=True).distinct())
+        if not matches or not markets:
+            raise CommandError('No matches with odds to read; run scrape_odds first')
+        rng.shuffle(matches)
+        weights = [1 / rank ** options['skew'] for rank in range(1, len(matches) + 1)]
+
+        cache.clear()
+        local_odds.clear()
+        before = metrics.as_dict()['counters']
+        queries = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        latencies, writes = [], 0
+        start = time.perf_counter()
+        for read in range(1, options['reads'] + 1):
+            match_id, status = rng.choices(matches, weights=weights)[0]
+            market = rng.choice(markets)
+            is_live = status == 'live'
+
+            t = time.perf_counter()
+            with connection.execute_wrapper(count_queries):
+                if options['uncached']:
+                    OddsManager._query_odds(match_id, market, None, is_live)
+                else:
+                    OddsManager.get_odds(match_id, market, is_live=is_live)
+            latencies.append(time.perf_counter() - t)
+
+            if options['write_every'] and read % options['write_every'] == 0:
+                self.reprice(rng.choices(matches, weights=weights)[0][0], rng)
+                writes += 1
+        elapsed = time.perf_counter() - start
+
+        after = metrics.as_dict()['counters']
+        delta = {name: after.get(name, 0) - before.get(name, 0) for name in after}
+        reads = options['reads']
+        latencies.sort()
+
+        self.stdout.write(
+            f"{reads} reads over {len(matches)} matches x {len(markets)} markets, "
+            f"{writes} repricings, {elapsed:.2f}s ({reads / elapsed:.0f} reads/s)"
+        )
+        self.stdout.write(
+            f"  latency:      p50 {latencies[len(latencies) // 2] * 1e6:.0f}us, "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f}us"
+        )
+        self.stdout.write(f"  db queries:   {queries[0]} ({queries[0] / reads:.3f} per read)")
+        if not options['uncached']:
+            recomputes = delta.get('stampede_recomputes', 0)
+            self.stdout.write(
+                f"  hit rate:     {1 - recomputes / reads:.1%} "
+                f"({delta.get('stampede_hits', 0)} from the shared cache, the rest in-process; "
+                f"{recomputes} recomputed, {delta.get('stampede_stale_served', 0)} served stale)"
+            )
+
+    def reprice(self, match_id, rng):
+        """Nudge every price of a match and save it the way the scraper does"""
+        records = []
+        for market, bookmaker, parameter, home, draw, away, is_live in Odds.objects.filter(
+            match_id=match_id
+        ).values_list(
+            'market', 'bookmaker__oddsportal_name', 'parameter',
+            'home_odds', 'draw_odds', 'away_odds', 'is_live'
+        ):
+            odds_data = {
+                'home': float(home) + rng.choice([-0.05, 0.05]),
+                'away': float(away),
+                'parameter': parameter
+            }
+            if draw is not None:
+                odds_data['draw'] = float(draw)
+            records.append({
+                'match_id': match_id,
+                'market': market,
+                'bookmaker_name': bookmaker,
+                'odds_data': odds_data,
+                'is_live': is_live
+            })
+        OddsManager.save_odds_bulk(records)
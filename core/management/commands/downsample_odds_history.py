@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.history import downsample
+
+class Command(BaseCommand):
+    help = 'Thin out old odds history to one price per bucket and drop days past retention (run daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--raw-days', type=int, default=settings.ODDS_HISTORY_RAW_DAYS,
+            help='Keep every recorded move for this many days'
+        )
+        parser.add_argument(
+            '--bucket-minutes', type=int, default=settings.ODDS_HISTORY_BUCKET_MINUTES,
+            help="Older history keeps the last price in each bucket of this many minutes, plus each day's open, high and low"
+        )
+        parser.add_argument(
+            '--retention-days', type=int, default=settings.ODDS_HISTORY_RETENTION_DAYS,
+            help='Delete history older than this many days (default: keep it)'
+        )
+
+    def handle(self, *args, **options):
+        if options['raw_days'] < 0 or options['bucket_minutes'] < 1:
+            raise CommandError('--raw-days must be >= 0 and --bucket-minutes >= 1')
+        deleted = downsample(options['raw_days'], options['bucket_minutes'], options['retention_days'])
+        self.stdout.write(f"Deleted {deleted} odds history rows")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from core.best_odds import rebuild
+
+class Command(BaseCommand):
+    help = 'Recompute the best odds index from the Odds table (backfill, or after bookmakers are (de)activated)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('match_ids', nargs='*', type=int, help='Only these matches (default: all)')
+
+    def handle(self, *args, **options):
+        rows = rebuild(options['match_ids'] or None)
+        self.stdout.write(f"Rebuilt {rows} best odds rows")
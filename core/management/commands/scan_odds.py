@@ -0,0 +1,60 @@
+import json
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.analytics import publish_scan_report, scan_report, trim_report
+
+class Command(BaseCommand):
+    help = 'Scan all odds for bookmaker margins, arbitrage opportunities and value prices'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Opportunities to list of each kind')
+        parser.add_argument(
+            '--threshold', type=float, default=settings.ODDS_ANALYTICS_VALUE_THRESHOLD,
+            help='Edge over fair odds that counts as a value price'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Rescan every N seconds, publishing each full report to the cache for the API (0 scans once)'
+        )
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        if options['limit'] < 1 or options['interval'] < 0:
+            raise CommandError('--limit must be at least 1 and --interval not negative')
+        if options['interval'] and options['threshold'] < settings.ODDS_ANALYTICS_VALUE_THRESHOLD:
+            raise CommandError('--threshold cannot be below ODDS_ANALYTICS_VALUE_THRESHOLD when publishing')
+        while True:
+            start = time.perf_counter()
+            if options['interval']:
+                report = trim_report(publish_scan_report(), options['limit'], options['threshold'])
+            else:
+                report = scan_report(options['limit'], options['threshold'])
+            self.print_report(report, time.perf_counter() - start, options['json'])
+            if not options['interval']:
+                return
+            time.sleep(max(0, options['interval'] - (time.perf_counter() - start)))
+
+    def print_report(self, report, elapsed, as_json):
+        if as_json:
+            self.stdout.write(json.dumps(report))
+            return
+        summary = report['summary']
+        self.stdout.write(
+            f"{summary['rows']} odds in {summary['groups']} lines scanned in {elapsed:.2f}s, "
+            f"median margin {summary['median_margin']}, {summary['arbitrages']} arbitrages"
+        )
+        for arb in report['arbitrages']:
+            legs = ', '.join(
+                f"{leg['outcome']} {leg['price']} @ {leg['bookmaker_id']} ({leg['stake']:.1%})"
+                for leg in arb['legs']
+            )
+            self.stdout.write(
+                f"  ARB match {arb['match_id']} {arb['market']} {arb['parameter'] or ''}: "
+                f"{arb['profit']:.2%} - {legs}"
+            )
+        for value in report['value_prices']:
+            self.stdout.write(
+                f"  VALUE match {value['match_id']} {value['market']} {value['outcome']} "
+                f"{value['price']} @ {value['bookmaker_id']} (fair {value['fair_odds']}, edge {value['edge']:.1%})"
+            )
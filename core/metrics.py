@@ -0,0 +1,98 @@
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+class Metrics:
+    """Thread-safe counters, gauges, errors by type and per-stage timings"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(int)
+        self.gauges = {}
+        self.errors = defaultdict(int)
+        self.timings = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def error(self, exc):
+        """Count an exception under its type name"""
+        with self._lock:
+            self.errors[type(exc).__name__] += 1
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self.timings[stage] += seconds
+            self.calls[stage] += 1
+
+    @contextmanager
+    def timer(self, stage):
+        """Add the wall time spent inside the block to `stage`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'errors': dict(self.errors),
+                'stages': {
+                    stage: {'calls': self.calls[stage], 'seconds': round(seconds, 6)}
+                    for stage, seconds in self.timings.items()
+                }
+            }
+
+    def to_prometheus(self, prefix='odds'):
+        """Render everything in the Prometheus text exposition format"""
+        data = self.as_dict()
+        lines = []
+
+        def family(name, kind, samples):
+            if samples:
+                lines.append(f"# TYPE {prefix}_{name} {kind}")
+                lines.extend(f"{prefix}_{name}{labels} {value}" for labels, value in samples)
+
+        for name, value in sorted(data['counters'].items()):
+            family(f"{_metric_name(name)}_total", 'counter', [('', value)])
+        for name, value in sorted(data['gauges'].items()):
+            family(_metric_name(name), 'gauge', [('', value)])
+        family('errors_total', 'counter', [
+            (f'{{type="{name}"}}', count) for name, count in sorted(data['errors'].items())
+        ])
+        stages = sorted(data['stages'].items())
+        family('stage_seconds_total', 'counter', [
+            (f'{{stage="{stage}"}}', values['seconds']) for stage, values in stages
+        ])
+        family('stage_calls_total', 'counter', [
+            (f'{{stage="{stage}"}}', values['calls']) for stage, values in stages
+        ])
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path, prefix='odds'):
+        """
+        Write the Prometheus text to path atomically, so a textfile
+        collector never reads a half-written file.
+        """
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus(prefix))
+        os.replace(tmp, path)
+
+def _metric_name(name):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+# Default registry for code without a Metrics of its own, e.g. OddsManager
+metrics = Metrics()
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_cryptocurrency_withdrawal_deposit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bookmaker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('oddsportal_name', models.CharField(max_length=100, unique=True)),
+                ('logo', models.ImageField(blank=True, null=True, upload_to='bookmakers/logos/')),
+                ('is_active', models.BooleanField(default=True)),
+                ('priority', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-priority', 'name'],
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='cryptocurrency',
+            options={},
+        ),
+        migrations.AddField(
+            model_name='league',
+            name='oddsportal_path',
+            field=models.CharField(blank=True, help_text='Suffix for constructing OddsPortal URL', max_length=200),
+        ),
+        migrations.CreateModel(
+            name='Odds',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('market', models.CharField(max_length=50)),
+                ('parameter', models.FloatField(blank=True, help_text='For handicap, over/under markets', null=True)),
+                ('home_odds', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('draw_odds', models.DecimalField(blank=True, decimal_places=2, max_digits=7, null=True)),
+                ('away_odds', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('odds_type', models.CharField(choices=[('decimal', 'Decimal'), ('fractional', 'Fractional'), ('american', 'American')], default='decimal', max_length=20)),
+                ('is_live', models.BooleanField(default=False)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bookmaker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookmaker_odds', to='core.bookmaker')),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_odds', to='core.match')),
+            ],
+            options={
+                'verbose_name_plural': 'Odds',
+                'indexes': [models.Index(fields=['match', 'market', 'is_live'], name='core_odds_match_i_063cbb_idx'), models.Index(fields=['last_updated'], name='core_odds_last_up_67ca99_idx')],
+                'unique_together': {('match', 'bookmaker', 'market', 'parameter')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OddsHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('market', models.CharField(max_length=50)),
+                ('parameter', models.FloatField(blank=True, null=True)),
+                ('home_odds', models.PositiveIntegerField()),
+                ('draw_odds', models.PositiveIntegerField(blank=True, null=True)),
+                ('away_odds', models.PositiveIntegerField()),
+                ('is_live', models.BooleanField(default=False)),
+                ('recorded_at', models.DateTimeField()),
+                ('day', models.DateField()),
+                ('bookmaker', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='odds_history', to='core.bookmaker')),
+                ('match', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='odds_history', to='core.match')),
+            ],
+            options={
+                'verbose_name_plural': 'Odds history',
+                'indexes': [models.Index(fields=['match', 'market', 'bookmaker', 'recorded_at'], name='core_oddshi_match_i_5d90c3_idx'), models.Index(fields=['day'], name='core_oddshi_day_d9b85c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_bookmaker_odds_oddshistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BestOdds',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('market', models.CharField(max_length=50)),
+                ('parameter', models.FloatField(blank=True, null=True)),
+                ('bookmaker_count', models.PositiveIntegerField(default=0)),
+                ('best_home', models.DecimalField(blank=True, decimal_places=2, max_digits=7, null=True)),
+                ('best_draw', models.DecimalField(blank=True, decimal_places=2, max_digits=7, null=True)),
+                ('best_away', models.DecimalField(blank=True, decimal_places=2, max_digits=7, null=True)),
+                ('home_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('draw_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('away_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('home_probability_sum', models.FloatField(default=0)),
+                ('draw_probability_sum', models.FloatField(default=0)),
+                ('away_probability_sum', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('best_away_bookmaker', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.bookmaker')),
+                ('best_draw_bookmaker', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.bookmaker')),
+                ('best_home_bookmaker', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.bookmaker')),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='best_odds', to='core.match')),
+            ],
+            options={
+                'verbose_name_plural': 'Best odds',
+                'unique_together': {('match', 'market', 'parameter')},
+            },
+        ),
+    ]
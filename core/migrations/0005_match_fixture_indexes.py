@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_bestodds'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['match_date', 'match_time', 'id'], name='core_match_match_d_6b770f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['league', 'match_date', 'match_time', 'id'], name='core_match_league__276729_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['status', 'match_date', 'match_time', 'id'], name='core_match_status_a0cda5_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_match_fixture_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='oddshistory',
+            name='core_oddshi_match_i_5d90c3_idx',
+        ),
+        migrations.AddIndex(
+            model_name='oddshistory',
+            index=models.Index(fields=['match', 'market', 'bookmaker', 'parameter', 'recorded_at'], name='core_oddshi_match_i_26193b_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:58
+
+from django.db import migrations, models
+
+
+def drop_duplicate_lines(apps, schema_editor):
+    """
+    Keep one row per (match, market) without a parameter. Sums of lines
+    that raced are off either way; rebuild_best_odds recomputes them.
+    """
+    BestOdds = apps.get_model('core', 'BestOdds')
+    duplicates = (
+        BestOdds.objects.filter(parameter__isnull=True)
+        .values('match_id', 'market')
+        .annotate(first=models.Min('id'), rows=models.Count('id'))
+        .filter(rows__gt=1)
+    )
+    for line in duplicates:
+        BestOdds.objects.filter(
+            match_id=line['match_id'], market=line['market'], parameter__isnull=True
+        ).exclude(id=line['first']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_oddshistory_parameter_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_lines, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bestodds',
+            constraint=models.UniqueConstraint(condition=models.Q(('parameter__isnull', True)), fields=('match', 'market'), name='core_bestodds_unique_without_parameter'),
+        ),
+    ]
@@ -86,6 +86,12 @@ class Match(models.Model):
 
     class Meta:
         verbose_name_plural = "Matches"
+        # Keyset pagination order (core.pagination), overall, per league and per status
+        indexes = [
+            models.Index(fields=['match_date', 'match_time', 'id']),
+            models.Index(fields=['league', 'match_date', 'match_time', 'id']),
+            models.Index(fields=['status', 'match_date', 'match_time', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.home_team.name} vs {self.away_team.name}"
@@ -134,6 +140,106 @@ class Odds(models.Model):
     def __str__(self):
         return f"{self.match} - {self.market} ({self.bookmaker})"
 
+class BestOdds(models.Model):
+    """
+    Best price and consensus per (match, market, parameter) across active
+    bookmakers, maintained incrementally by the odds write path (see
+    core.best_odds). Averages and consensus probabilities are kept as
+    running sums so a price change is applied as a delta.
+    """
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='best_odds')
+    market = models.CharField(max_length=50)
+    parameter = models.FloatField(null=True, blank=True)
+    bookmaker_count = models.PositiveIntegerField(default=0)
+    best_home = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
+    best_draw = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
+    best_away = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
+    best_home_bookmaker = models.ForeignKey(Bookmaker, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    best_draw_bookmaker = models.ForeignKey(Bookmaker, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    best_away_bookmaker = models.ForeignKey(Bookmaker, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    home_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    draw_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    away_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    home_probability_sum = models.FloatField(default=0)
+    draw_probability_sum = models.FloatField(default=0)
+    away_probability_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Best odds"
+        unique_together = ('match', 'market', 'parameter')
+        constraints = [
+            # NULLs never collide in unique_together, so lines without a
+            # parameter (1X2) need a constraint of their own
+            models.UniqueConstraint(
+                fields=['match', 'market'], condition=models.Q(parameter__isnull=True),
+                name='core_bestodds_unique_without_parameter'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.match} - {self.market} best odds"
+
+    def _average(self, total):
+        return total / self.bookmaker_count if self.bookmaker_count else None
+
+    @property
+    def avg_home(self):
+        return self._average(self.home_sum)
+
+    @property
+    def avg_draw(self):
+        return self._average(self.draw_sum) if self.best_draw is not None else None
+
+    @property
+    def avg_away(self):
+        return self._average(self.away_sum)
+
+    @property
+    def consensus_home(self):
+        """Mean margin-free implied probability of a home win across bookmakers"""
+        return self._average(self.home_probability_sum)
+
+    @property
+    def consensus_draw(self):
+        return self._average(self.draw_probability_sum) if self.best_draw is not None else None
+
+    @property
+    def consensus_away(self):
+        return self._average(self.away_probability_sum)
+
+class OddsHistory(models.Model):
+    """
+    Append-only record of every price change, one row per move.
+
+    Prices are stored as integer hundredths. `day` is the partition key
+    that downsampling and retention work through; series are read with
+    one range scan on the (match, market, bookmaker, parameter,
+    recorded_at) index.
+    """
+    PRICE_SCALE = 100
+
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='odds_history', db_index=False)
+    bookmaker = models.ForeignKey(Bookmaker, on_delete=models.CASCADE, related_name='odds_history', db_index=False)
+    market = models.CharField(max_length=50)
+    parameter = models.FloatField(null=True, blank=True)
+    home_odds = models.PositiveIntegerField()
+    draw_odds = models.PositiveIntegerField(null=True, blank=True)
+    away_odds = models.PositiveIntegerField()
+    is_live = models.BooleanField(default=False)
+    recorded_at = models.DateTimeField()
+    day = models.DateField()
+
+    class Meta:
+        verbose_name_plural = "Odds history"
+        indexes = [
+            models.Index(fields=['match', 'market', 'bookmaker', 'parameter', 'recorded_at']),
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"{self.match_id} {self.market} {self.bookmaker_id} @ {self.recorded_at}"
+
 class Deposit(models.Model):
     user = models.ForeignKey('account.User', on_delete=models.CASCADE, related_name='deposits')
     deposit_id = ShortUUIDField(unique=True, length=10, max_length=15)
@@ -0,0 +1,100 @@
+"""
+Odds display formats.
+
+Prices are converted from integer hundredths (as stored on odds boards,
+see core.board) to display strings through lookup tables built once per
+process, covering every price from 1.01 to TABLE_MAX. A whole board or
+fixture list is then formatted with one list index per price. Prices
+outside the tables are converted directly.
+
+    decimal     2.50
+    fractional  6/4, the nearest price on the traditional UK ladder
+    american    +150 / -200 (moneyline)
+"""
+from bisect import bisect_left
+from decimal import Decimal
+from django.conf import settings
+
+FORMATS = ('decimal', 'fractional', 'american')
+ALIASES = {'moneyline': 'american'}
+MISSING = '-'
+TABLE_MAX = 10000  # 100.00
+
+# Traditional fractional prices, shortest first
+FRACTIONAL_LADDER = [
+    (1, 100), (1, 50), (1, 33), (1, 25), (1, 20), (1, 16), (1, 14), (1, 12), (1, 10),
+    (1, 9), (1, 8), (2, 15), (1, 7), (1, 6), (2, 11), (1, 5), (2, 9), (1, 4), (2, 7),
+    (3, 10), (1, 3), (4, 11), (2, 5), (4, 9), (1, 2), (8, 15), (4, 7), (8, 13), (4, 6),
+    (8, 11), (4, 5), (5, 6), (10, 11), (1, 1), (11, 10), (6, 5), (5, 4), (11, 8), (7, 5),
+    (6, 4), (8, 5), (13, 8), (7, 4), (15, 8), (2, 1), (9, 4), (5, 2), (11, 4), (3, 1),
+    (10, 3), (7, 2), (4, 1), (9, 2), (5, 1), (11, 2), (6, 1), (13, 2), (7, 1), (15, 2),
+    (8, 1), (17, 2), (9, 1), (10, 1), (11, 1), (12, 1), (14, 1), (16, 1), (18, 1), (20, 1),
+    (22, 1), (25, 1), (28, 1), (33, 1), (40, 1), (50, 1), (66, 1), (80, 1), (100, 1),
+    (125, 1), (150, 1), (200, 1), (250, 1), (300, 1), (400, 1), (500, 1), (750, 1), (999, 1),
+]
+# Decimal equivalent of each ladder price, in hundredths
+LADDER_PRICES = [100 + 100 * numerator / denominator for numerator, denominator in FRACTIONAL_LADDER]
+
+def normalize(odds_format):
+    """A supported format name for `odds_format`, falling back to the site default"""
+    odds_format = ALIASES.get(odds_format, odds_format)
+    return odds_format if odds_format in FORMATS else settings.DEFAULT_ODDS_FORMAT
+
+def to_hundredths(value):
+    """Integer hundredths of a Decimal, float or string price"""
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return round(value * 100)
+    return round(float(value) * 100)
+
+def _decimal(hundredths):
+    return f"{hundredths // 100}.{hundredths % 100:02d}"
+
+def _fractional(hundredths):
+    index = bisect_left(LADDER_PRICES, hundredths)
+    if index == len(LADDER_PRICES):
+        index -= 1
+    elif index and LADDER_PRICES[index] - hundredths > hundredths - LADDER_PRICES[index - 1]:
+        # Nearer the shorter price (ties go to the longer one)
+        index -= 1
+    numerator, denominator = FRACTIONAL_LADDER[index]
+    return 'Evens' if numerator == denominator else f"{numerator}/{denominator}"
+
+def _american(hundredths):
+    if hundredths >= 200:
+        return f"+{hundredths - 100}"
+    # -100 / (decimal - 1), rounded half up in integer arithmetic
+    return f"-{(20000 // (hundredths - 100) + 1) // 2}"
+
+CONVERTERS = {'decimal': _decimal, 'fractional': _fractional, 'american': _american}
+_tables = {}
+
+def table(odds_format):
+    """Display strings indexed by hundredths, built on first use"""
+    if odds_format not in _tables:
+        convert = CONVERTERS[odds_format]
+        _tables[odds_format] = [None] * 101 + [convert(h) for h in range(101, TABLE_MAX + 1)]
+    return _tables[odds_format]
+
+def format_prices(prices, odds_format):
+    """Display strings for a sequence of prices in hundredths (None for missing)"""
+    odds_format = normalize(odds_format)
+    lookup, convert = table(odds_format), CONVERTERS[odds_format]
+    return [
+        MISSING if h is None or h <= 100 else lookup[h] if h <= TABLE_MAX else convert(h)
+        for h in prices
+    ]
+
+def format_price(value, odds_format):
+    """Display string for one Decimal, float or string price"""
+    return format_prices([to_hundredths(value)], odds_format)[0]
+
+def preferred_format(request):
+    """The signed-in user's odds format, or the site default"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        profile = getattr(user, 'profile', None)
+        if profile is not None:
+            return normalize(profile.odds_format)
+    return settings.DEFAULT_ODDS_FORMAT
@@ -1,9 +1,40 @@
-from django.core.cache import cache
+import time
 from django.conf import settings
-from .models import Odds, Match, Bookmaker
+from django.core.cache import cache
+from django.utils import timezone
+from .best_odds import apply_changes, prices_of
+from .board import update_boards
+from .history import price_series, record_changes
+from .local_cache import LocalCache
+from .metrics import metrics as default_metrics
+from .pagination import filter_fixtures
+from .streaming import publish_changes
+from .stampede import fetch, get_many_fresh, set_many_values, set_value
+from .models import BestOdds, Odds, Match, Bookmaker
 from decimal import Decimal
 
+ODDS_UNIQUE_FIELDS = ['match', 'bookmaker', 'market', 'parameter']
+ODDS_UPDATE_FIELDS = ['home_odds', 'draw_odds', 'away_odds', 'is_live', 'last_updated']
+ODDS_VALUE_FIELDS = ['home_odds', 'draw_odds', 'away_odds', 'parameter', 'is_live']
+PRICE_QUANTUM = Decimal('0.01')
+
+def to_price(value):
+    """Convert a scraped price to the Decimal the Odds table will store"""
+    return Decimal(str(value)).quantize(PRICE_QUANTUM)
+
+_MISSING = object()
+
+# Per-process tier in front of the shared cache, keyed like get_cache_key
+local_odds = LocalCache(
+    settings.ODDS_LOCAL_CACHE_SIZE,
+    settings.ODDS_LOCAL_CACHE_TIMEOUT,
+    name='local_odds'
+)
+
 class OddsManager:
+    # core.write_behind.WriteBehind deferring live odds writes, when started
+    write_behind = None
+
     @staticmethod
     def get_cache_key(match_id, market, bookmaker_id=None):
         if bookmaker_id:
@@ -14,18 +45,130 @@ class OddsManager:
     def cache_live_odds(match_id, market, odds_data, bookmaker_id=None):
         """Cache live odds with a short timeout"""
         cache_key = OddsManager.get_cache_key(match_id, market, bookmaker_id)
-        cache.set(cache_key, odds_data, timeout=settings.LIVE_ODDS_CACHE_TIMEOUT)
+        set_value(cache_key, odds_data, settings.LIVE_ODDS_CACHE_TIMEOUT)
+        local_odds.set(cache_key, odds_data)
+
+    @staticmethod
+    def cache_payload(odds):
+        """What gets cached for a row of odds: ids and prices, no model instances"""
+        return {
+            'match_id': odds.match_id,
+            'bookmaker_id': odds.bookmaker_id,
+            'market': odds.market,
+            'parameter': odds.parameter,
+            'is_live': odds.is_live,
+            'home_odds': odds.home_odds,
+            'draw_odds': odds.draw_odds,
+            'away_odds': odds.away_odds
+        }
+
+    @staticmethod
+    def invalidate_local(match_id, market, bookmaker_id):
+        """
+        Drop this process's cached copy of a bookmaker's odds that were just
+        rewritten. Market-wide reads are retired with bump_generations.
+        """
+        local_odds.delete(OddsManager.get_cache_key(match_id, market, bookmaker_id))
+
+    @staticmethod
+    def get_prematch_key(match_id, market, generation, bookmaker_id=None):
+        if bookmaker_id:
+            return f"odds:pre:{generation}:{match_id}:{market}:{bookmaker_id}"
+        return f"odds:pre:{generation}:{match_id}:{market}"
+
+    @staticmethod
+    def get_live_key(match_id, market, generation):
+        return f"odds:live:{generation}:{match_id}:{market}"
+
+    @staticmethod
+    def generation_key(match_id):
+        return f"odds:gen:{match_id}"
+
+    @staticmethod
+    def get_generations(match_ids):
+        """
+        Current cache generation of each match.
+
+        Pre-match keys and market-wide live keys embed their match's
+        generation, so bumping it retires all of them at once. A match without one starts at the
+        current time in ms, so it never reuses a generation whose keys may
+        still be cached.
+        """
+        keys = {OddsManager.generation_key(match_id): match_id for match_id in set(match_ids)}
+        generations, remote_keys = {}, []
+        for key, match_id in keys.items():
+            generation = local_odds.get(key)
+            if generation is None:
+                remote_keys.append(key)
+            else:
+                generations[match_id] = generation
+
+        if remote_keys:
+            found = cache.get_many(remote_keys)
+            for key in remote_keys:
+                generation = found.get(key)
+                if generation is None:
+                    generation = int(time.time() * 1000)
+                    if not cache.add(key, generation, timeout=None):
+                        generation = cache.get(key, generation)
+                found[key] = generation
+                generations[keys[key]] = generation
+            local_odds.set_many(found)
+        return generations
+
+    @staticmethod
+    def bump_generations(match_ids):
+        """Invalidate every cached pre-match and market-wide live read of these matches"""
+        for match_id in set(match_ids):
+            key = OddsManager.generation_key(match_id)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # No generation yet, so nothing is cached under one
+                pass
+            local_odds.delete(key)
 
     @staticmethod
     def get_odds(match_id, market, bookmaker_id=None, is_live=False):
-        """Get odds from cache if live, otherwise from database"""
-        if is_live:
+        """
+        Get odds through the cache, falling back to the database.
+
+        Returns the cached payload (see cache_payload) of the highest
+        priority bookmaker's odds, or None when there are none. A
+        bookmaker's live odds are cached for LIVE_ODDS_CACHE_TIMEOUT and
+        updated by the write path. Live reads across bookmakers are cached
+        for LIVE_ODDS_CACHE_TIMEOUT and pre-match odds for
+        PREMATCH_ODDS_CACHE_TIMEOUT, both under their match's generation,
+        since any bookmaker's write can change them. An expired entry is
+        recomputed by one worker while the others keep getting the
+        previous value.
+        """
+        if is_live and bookmaker_id:
             cache_key = OddsManager.get_cache_key(match_id, market, bookmaker_id)
-            cached_odds = cache.get(cache_key)
-            if cached_odds:
-                return cached_odds
+            timeout = settings.LIVE_ODDS_CACHE_TIMEOUT
+        else:
+            generation = OddsManager.get_generations([match_id])[match_id]
+            if is_live:
+                cache_key = OddsManager.get_live_key(match_id, market, generation)
+                timeout = settings.LIVE_ODDS_CACHE_TIMEOUT
+            else:
+                cache_key = OddsManager.get_prematch_key(match_id, market, generation, bookmaker_id)
+                timeout = settings.PREMATCH_ODDS_CACHE_TIMEOUT
+
+        cached_odds = local_odds.get(cache_key, _MISSING)
+        if cached_odds is not _MISSING:
+            return cached_odds
+
+        cached_odds = fetch(
+            cache_key,
+            lambda: OddsManager._load_payload(match_id, market, bookmaker_id, is_live),
+            timeout
+        )
+        local_odds.set(cache_key, cached_odds)
+        return cached_odds
 
-        # Fallback to database
+    @staticmethod
+    def _query_odds(match_id, market, bookmaker_id, is_live):
         try:
             query = {
                 'match_id': match_id,
@@ -40,8 +183,112 @@ class OddsManager:
             return None
 
     @staticmethod
-    def save_odds(match_id, market, bookmaker_name, odds_data, is_live=False):
-        """Save odds to database and cache if live"""
+    def _load_payload(match_id, market, bookmaker_id, is_live):
+        odds = OddsManager._query_odds(match_id, market, bookmaker_id, is_live)
+        return OddsManager.cache_payload(odds) if odds else None
+
+    @staticmethod
+    def get_odds_many(match_ids, markets, is_live=False, bookmaker_id=None):
+        """
+        get_odds for every (match, market) pair with a fixed number of round-trips.
+
+        Odds come from the local tier, then one cache.get_many; whatever is
+        still missing or expired is resolved with one query on the (match,
+        market, is_live) index, keeping the highest priority bookmaker per
+        pair as get_odds does, and written back to the cache. Returns a dict
+        of payloads keyed by (match_id, market); pairs without odds are left out.
+        """
+        pairs = [(match_id, market) for match_id in set(match_ids) for market in set(markets)]
+        if not pairs:
+            return {}
+        if is_live and bookmaker_id:
+            keys = {OddsManager.get_cache_key(m, mk, bookmaker_id): (m, mk) for m, mk in pairs}
+            timeout = settings.LIVE_ODDS_CACHE_TIMEOUT
+        elif is_live:
+            generations = OddsManager.get_generations(m for m, _ in pairs)
+            keys = {OddsManager.get_live_key(m, mk, generations[m]): (m, mk) for m, mk in pairs}
+            timeout = settings.LIVE_ODDS_CACHE_TIMEOUT
+        else:
+            generations = OddsManager.get_generations(m for m, _ in pairs)
+            keys = {
+                OddsManager.get_prematch_key(m, mk, generations[m], bookmaker_id): (m, mk)
+                for m, mk in pairs
+            }
+            timeout = settings.PREMATCH_ODDS_CACHE_TIMEOUT
+
+        cached = {}
+        remote_keys = []
+        for key in keys:
+            cached_odds = local_odds.get(key, _MISSING)
+            if cached_odds is _MISSING:
+                remote_keys.append(key)
+            else:
+                cached[key] = cached_odds
+        if remote_keys:
+            remote = get_many_fresh(remote_keys)
+            local_odds.set_many(remote)
+            cached.update(remote)
+
+        found = {keys[key]: value for key, value in cached.items() if value is not None}
+        missing = {pair: key for key, pair in keys.items() if key not in cached}
+        if not missing:
+            return found
+
+        query = {
+            'match_id__in': {m for m, _ in missing},
+            'market__in': {mk for _, mk in missing},
+            'is_live': is_live
+        }
+        if bookmaker_id:
+            query['bookmaker_id'] = bookmaker_id
+
+        for odds in Odds.objects.filter(**query).order_by(
+            'match_id', 'market', '-bookmaker__priority', 'id'
+        ):
+            pair = (odds.match_id, odds.market)
+            if pair in missing and pair not in found:
+                found[pair] = OddsManager.cache_payload(odds)
+
+        # Pairs without odds are cached as None so they are not queried again
+        backfill = {key: found.get(pair) for pair, key in missing.items()}
+        set_many_values(backfill, timeout)
+        local_odds.set_many(backfill)
+        return found
+
+    @staticmethod
+    def get_price_series(match_id, market, bookmaker_id, parameter=None, since=None, until=None):
+        """Recorded price moves of one line, oldest first (see core.history)"""
+        return price_series(match_id, market, bookmaker_id, parameter, since, until)
+
+    @staticmethod
+    def get_best_odds(match_ids, market, parameter=None):
+        """BestOdds of each match for one market line, keyed by match id, in one query"""
+        query = {'match_id__in': match_ids, 'market': market}
+        if parameter is None:
+            query['parameter__isnull'] = True
+        else:
+            query['parameter'] = parameter
+        return {best.match_id: best for best in BestOdds.objects.filter(**query)}
+
+    @staticmethod
+    def save_odds(match_id, market, bookmaker_name, odds_data, is_live=False, metrics=None):
+        """
+        Save odds to database and cache if live.
+
+        With write-behind enabled, live odds are published to the cache at
+        once and written to the database by the next flush; the unsaved
+        Odds is returned.
+        """
+        metrics = metrics or default_metrics
+        if is_live and OddsManager.write_behind:
+            return OddsManager.write_behind.submit([{
+                'match_id': match_id,
+                'market': market,
+                'bookmaker_name': bookmaker_name,
+                'odds_data': odds_data,
+                'is_live': True
+            }])[0]
+
         try:
             match = Match.objects.get(id=match_id)
             bookmaker, _ = Bookmaker.objects.get_or_create(
@@ -54,32 +301,239 @@ class OddsManager:
                 'bookmaker': bookmaker,
                 'market': market,
                 'is_live': is_live,
-                'home_odds': Decimal(str(odds_data.get('home', 0))),
-                'away_odds': Decimal(str(odds_data.get('away', 0)))
+                'home_odds': to_price(odds_data.get('home', 0)),
+                'away_odds': to_price(odds_data.get('away', 0))
             }
 
             if 'draw' in odds_data:
-                odds_values['draw_odds'] = Decimal(str(odds_data['draw']))
+                odds_values['draw_odds'] = to_price(odds_data['draw'])
             if 'parameter' in odds_data:
                 odds_values['parameter'] = odds_data['parameter']
 
-            odds, created = Odds.objects.update_or_create(
-                match=match,
-                bookmaker=bookmaker,
-                market=market,
-                defaults=odds_values
-            )
+            # One row per line, as save_odds_bulk upserts them; a missing
+            # parameter matches NULL
+            key = {field: odds_values.get(field) for field in ODDS_UNIQUE_FIELDS}
+
+            # Leave the row (and its last_updated) alone when no price moved
+            with metrics.timer('odds_lookup'):
+                odds = Odds.objects.filter(**key).first()
+            if not odds or OddsManager.odds_changed(odds, odds_values):
+                previous = prices_of(odds) if odds else None
+                with metrics.timer('odds_write'):
+                    odds, created = Odds.objects.update_or_create(**key, defaults=odds_values)
+                metrics.incr('odds_inserted' if created else 'odds_updated')
+                OddsManager.invalidate_local(match_id, market, bookmaker.id)
+                OddsManager.bump_generations([match_id])
+                with metrics.timer('history_append'):
+                    record_changes([odds])
+                if bookmaker.is_active:
+                    with metrics.timer('best_odds_update'):
+                        apply_changes([(odds, previous)])
+                with metrics.timer('board_update'):
+                    update_boards({match_id: [odds]}, {bookmaker.id: bookmaker.name})
+                publish_changes({match_id: [odds]})
+            else:
+                metrics.incr('odds_unchanged')
 
             if is_live:
-                OddsManager.cache_live_odds(
-                    match_id, 
-                    market, 
-                    odds_values,
-                    bookmaker.id
-                )
+                with metrics.timer('cache_set'):
+                    OddsManager.cache_live_odds(
+                        match_id, 
+                        market, 
+                        OddsManager.cache_payload(odds),
+                        bookmaker.id
+                    )
+                metrics.incr('cache_sets')
 
             return odds
 
         except (Match.DoesNotExist, ValueError) as e:
+            metrics.error(e)
             print(f"Error saving odds: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def odds_changed(odds, odds_values):
+        """Whether saving odds_values would change any value stored on odds"""
+        return any(
+            getattr(odds, field) != odds_values[field]
+            for field in ODDS_VALUE_FIELDS if field in odds_values
+        )
+
+    @staticmethod
+    def current_match_ids(match_ids):
+        """
+        The ids among `match_ids` of matches still being priced: not
+        finished, not deleted and inside FIXTURE_LIVE_WINDOW. Long-running
+        writers prune their per-row snapshots down to these.
+        """
+        return set(filter_fixtures(Match.objects.filter(id__in=match_ids), 'current').values_list('id', flat=True))
+
+    @staticmethod
+    def get_bookmakers(names):
+        """Map oddsportal names to Bookmakers, creating missing ones in one insert"""
+        names = set(names)
+        bookmakers = {
+            b.oddsportal_name: b
+            for b in Bookmaker.objects.filter(oddsportal_name__in=names)
+        }
+        missing = names - bookmakers.keys()
+        if missing:
+            Bookmaker.objects.bulk_create(
+                [Bookmaker(name=name, oddsportal_name=name) for name in missing],
+                ignore_conflicts=True
+            )
+            bookmakers.update({
+                b.oddsportal_name: b
+                for b in Bookmaker.objects.filter(oddsportal_name__in=missing)
+            })
+        return bookmakers
+
+    @staticmethod
+    def build_odds(record, bookmaker, now):
+        """Unsaved Odds for a save_odds_bulk record"""
+        odds_data = record['odds_data']
+        return Odds(
+            match_id=record['match_id'],
+            bookmaker_id=bookmaker.id,
+            market=record['market'],
+            parameter=odds_data.get('parameter'),
+            is_live=record.get('is_live', False),
+            home_odds=to_price(odds_data.get('home', 0)),
+            draw_odds=to_price(odds_data['draw']) if 'draw' in odds_data else None,
+            away_odds=to_price(odds_data.get('away', 0)),
+            last_updated=now
+        )
+
+    @staticmethod
+    def save_odds_bulk(records, bookmakers=None, snapshot=None, metrics=None, publish=True):
+        """
+        Save a batch of odds with a fixed number of queries.
+
+        Each record is a dict with the arguments of save_odds: match_id,
+        market, bookmaker_name, odds_data and optionally is_live. Rows are
+        upserted on the (match, bookmaker, market, parameter) unique key and
+        live rows are cached with a single set_many.
+
+        Callers that already hold a name -> Bookmaker mapping covering every
+        record (such as the scraper's identity map) can pass it as
+        `bookmakers` to skip the lookup.
+
+        Rows whose prices did not move are not written at all. Incoming
+        values are compared with the stored row, or with `snapshot` when
+        the caller keeps one: a dict it owns (e.g. per scrape run) mapping
+        the unique key to (id, values). Keys found in the snapshot skip
+        the lookup query as well.
+
+        Query and cache timings are recorded on `metrics`, by default the
+        process-wide registry in core.metrics.
+
+        With publish=False the live cache, boards and streaming clients are
+        left alone, for callers that already published the rows (see
+        core.write_behind).
+
+        Returns how many rows were inserted, updated and left unchanged.
+        """
+        stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        if not records:
+            return stats
+        if snapshot is None:
+            snapshot = {}
+        metrics = metrics or default_metrics
+
+        if bookmakers is None:
+            with metrics.timer('bookmaker_lookup'):
+                bookmakers = OddsManager.get_bookmakers(r['bookmaker_name'] for r in records)
+        now = timezone.now()
+
+        # Later records for the same key win, as they would with save_odds
+        rows = {}
+        for record in records:
+            odds = OddsManager.build_odds(record, bookmakers[record['bookmaker_name']], now)
+            rows[(odds.match_id, odds.bookmaker_id, odds.market, odds.parameter)] = odds
+
+        # NULL parameters never collide in a unique index, so existing rows
+        # are matched up front and only genuinely new rows rely on the
+        # ON CONFLICT clause.
+        unknown = [key for key in rows if key not in snapshot]
+        if unknown:
+            with metrics.timer('odds_lookup'):
+                existing = list(Odds.objects.filter(
+                    match_id__in={key[0] for key in unknown},
+                    bookmaker_id__in={key[1] for key in unknown},
+                    market__in={key[2] for key in unknown}
+                ).values_list(
+                    'id', 'match_id', 'bookmaker_id', 'market', 'parameter',
+                    'home_odds', 'draw_odds', 'away_odds', 'is_live'
+                ))
+            for row in existing:
+                snapshot[row[1:5]] = (row[0], row[5:])
+
+        # (odds, prices it replaces) for the best odds index, active bookmakers only
+        active = {b.id for b in bookmakers.values() if b.is_active}
+        to_update, to_create, best_changes = [], [], []
+        for key, odds in rows.items():
+            values = (odds.home_odds, odds.draw_odds, odds.away_odds, odds.is_live)
+            if key not in snapshot:
+                to_create.append(odds)
+                previous = None
+            elif snapshot[key][1] == values:
+                stats['unchanged'] += 1
+                continue
+            else:
+                odds.pk = snapshot[key][0]
+                to_update.append(odds)
+                previous = snapshot[key][1][:3]
+            if odds.bookmaker_id in active:
+                best_changes.append((odds, previous))
+            snapshot[key] = (odds.pk, values)
+
+        if to_update:
+            with metrics.timer('odds_update'):
+                Odds.objects.bulk_update(to_update, ODDS_UPDATE_FIELDS)
+        if to_create:
+            with metrics.timer('odds_insert'):
+                Odds.objects.bulk_create(
+                    to_create,
+                    update_conflicts=True,
+                    unique_fields=ODDS_UNIQUE_FIELDS,
+                    update_fields=ODDS_UPDATE_FIELDS
+                )
+            # Ids are only returned by some backends; look them up next time
+            for odds in to_create:
+                key = (odds.match_id, odds.bookmaker_id, odds.market, odds.parameter)
+                if odds.pk is None:
+                    del snapshot[key]
+                else:
+                    snapshot[key] = (odds.pk, snapshot[key][1])
+        changed = {}
+        for odds in to_update + to_create:
+            OddsManager.invalidate_local(odds.match_id, odds.market, odds.bookmaker_id)
+            changed.setdefault(odds.match_id, []).append(odds)
+        if changed:
+            OddsManager.bump_generations(changed)
+            with metrics.timer('history_append'):
+                record_changes(to_update + to_create, now)
+            with metrics.timer('best_odds_update'):
+                apply_changes(best_changes)
+            if publish:
+                with metrics.timer('board_update'):
+                    update_boards(changed, {b.id: b.name for b in bookmakers.values()})
+                publish_changes(changed)
+        stats['inserted'] = len(to_create)
+        stats['updated'] = len(to_update)
+        if not publish:
+            return stats
+
+        live_odds = {
+            OddsManager.get_cache_key(odds.match_id, odds.market, odds.bookmaker_id):
+                OddsManager.cache_payload(odds)
+            for odds in rows.values() if odds.is_live
+        }
+        if live_odds:
+            with metrics.timer('cache_set'):
+                set_many_values(live_odds, settings.LIVE_ODDS_CACHE_TIMEOUT)
+                local_odds.set_many(live_odds)
+            metrics.incr('cache_sets', len(live_odds))
+
+        return stats
@@ -0,0 +1,151 @@
+"""
+Stampede-safe reads from the shared cache.
+
+Values are stored in an envelope carrying their logical expiry and how
+long they took to compute, and are physically kept for a grace period
+beyond that expiry. `fetch` then makes sure a popular key is recomputed
+by one worker at a time:
+
+- Each read may refresh a little early, with a probability that grows
+  as expiry nears and with the cost of recomputing (XFetch). Refreshes
+  are therefore spread out instead of all landing on the expiry instant.
+- An expired entry is recomputed by whoever takes the key's lock in the
+  cache (cache.add). Everyone else keeps getting the stale value until
+  it is replaced.
+- With nothing cached at all, threads in one process share a single
+  computation. Other processes wait briefly for the lock holder's result.
+"""
+import math
+import random
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .metrics import metrics
+
+XFETCH_BETA = 1.0
+LOCK_WAIT = 0.5
+LOCK_POLL = 0.02
+
+def wrap(value, timeout, delta=0.0):
+    return {'value': value, 'expires': time.time() + timeout, 'delta': delta}
+
+def set_value(key, value, timeout, delta=0.0):
+    cache.set(key, wrap(value, timeout, delta), timeout=timeout + settings.ODDS_CACHE_STALE_GRACE)
+
+def set_many_values(data, timeout):
+    cache.set_many(
+        {key: wrap(value, timeout) for key, value in data.items()},
+        timeout=timeout + settings.ODDS_CACHE_STALE_GRACE
+    )
+
+def get_many_fresh(keys):
+    """Values of the keys that are cached and not past their logical expiry"""
+    now = time.time()
+    return {
+        key: entry['value']
+        for key, entry in cache.get_many(keys).items()
+        if _is_envelope(entry) and entry['expires'] > now
+    }
+
+def _is_envelope(entry):
+    return isinstance(entry, dict) and 'expires' in entry and 'value' in entry
+
+def _should_refresh(entry, now):
+    # XFetch: -log(u) is exponentially distributed, so recomputation starts
+    # earlier for expensive values and converges on the expiry time
+    return now - entry['delta'] * XFETCH_BETA * math.log(1.0 - random.random()) >= entry['expires']
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key in this process into one"""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            metrics.incr('stampede_coalesced')
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+_flights = SingleFlight()
+
+def fetch(key, compute, timeout):
+    """
+    Cached value of key, recomputing it with compute() when needed without
+    letting concurrent readers all do the same.
+    """
+    entry = cache.get(key)
+    if _is_envelope(entry):
+        now = time.time()
+        if not _should_refresh(entry, now):
+            metrics.incr('stampede_hits')
+            return entry['value']
+        if entry['expires'] > now:
+            metrics.incr('stampede_early_refreshes')
+        return _refresh_or_stale(key, compute, timeout, entry['value'])
+
+    return _flights.do(key, lambda: _compute_missing(key, compute, timeout))
+
+def _refresh_or_stale(key, compute, timeout, stale):
+    if not cache.add(_lock_key(key), 1, timeout=settings.ODDS_CACHE_LOCK_TIMEOUT):
+        metrics.incr('stampede_stale_served')
+        return stale
+    try:
+        return _recompute(key, compute, timeout)
+    finally:
+        cache.delete(_lock_key(key))
+
+def _compute_missing(key, compute, timeout):
+    if cache.add(_lock_key(key), 1, timeout=settings.ODDS_CACHE_LOCK_TIMEOUT):
+        try:
+            return _recompute(key, compute, timeout)
+        finally:
+            cache.delete(_lock_key(key))
+
+    # Another process is computing it: give it a moment before piling on
+    metrics.incr('stampede_lock_waits')
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if _is_envelope(entry):
+            return entry['value']
+    metrics.incr('stampede_wait_timeouts')
+    return _recompute(key, compute, timeout)
+
+def _recompute(key, compute, timeout):
+    metrics.incr('stampede_recomputes')
+    start = time.perf_counter()
+    value = compute()
+    set_value(key, value, timeout, time.perf_counter() - start)
+    return value
+
+def _lock_key(key):
+    return f"{key}:lock"
@@ -0,0 +1,163 @@
+"""
+Odds-change events for streaming clients.
+
+The write path publishes one event per match whose prices changed, with
+the changed rows in board format (see core.board). Each ASGI worker holds
+at most one broker connection and fans events out to the matches'
+subscribers in memory. An idle client is then just a parked coroutine and
+a small queue, so a worker can hold thousands of them.
+
+Brokers:
+    RedisBroker      pub/sub on `odds:events:<match_id>`, shared by all processes
+    InProcessBroker  same process only; the stand-in for tests and single-worker dev
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from django.conf import settings
+from .board import board_row
+from .metrics import metrics
+
+RESET = object()
+
+class Subscription:
+    """Events for one client, delivered thread-safely onto its event loop"""
+
+    def __init__(self, match_id, maxsize):
+        self.match_id = match_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Its event loop is gone; the client's generator never cleaned up
+            pass
+
+    def _put(self, message):
+        if self.queue.full():
+            # A client this far behind gets the whole board again instead
+            metrics.incr('stream_resets')
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = RESET
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        """Next event (a JSON string or RESET), or None after `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class Broker:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, match_id, message):
+        raise NotImplementedError
+
+    async def start(self):
+        """Hook for brokers that need a listener in the subscribing event loop"""
+
+    async def subscribe(self, match_id):
+        """Start receiving a match's events; pair with unsubscribe()"""
+        await self.start()
+        subscription = Subscription(match_id, self.queue_size)
+        with self._lock:
+            self._subscribers[match_id].add(subscription)
+        metrics.incr('stream_subscribes')
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.match_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[subscription.match_id]
+
+    def dispatch(self, match_id, message):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(match_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+        metrics.incr('stream_deliveries', len(subscriptions))
+
+class InProcessBroker(Broker):
+    def publish(self, match_id, message):
+        self.dispatch(match_id, message)
+
+class RedisBroker(Broker):
+    CHANNEL_PREFIX = 'odds:events:'
+
+    def __init__(self, url, queue_size=100):
+        super().__init__(queue_size)
+        self.url = url
+        self._client = None
+        self._listeners = {}
+
+    def publish(self, match_id, message):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.url, socket_connect_timeout=1)
+        self._client.publish(f"{self.CHANNEL_PREFIX}{match_id}", message)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._listeners:
+            self._listeners[loop] = loop.create_task(self._listen())
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+        while True:
+            client = aioredis.Redis.from_url(self.url)
+            try:
+                pubsub = client.pubsub()
+                await pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+                async for message in pubsub.listen():
+                    if message['type'] != 'pmessage':
+                        continue
+                    match_id = int(message['channel'].rsplit(b':', 1)[1])
+                    self.dispatch(match_id, message['data'].decode('utf-8'))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.error(e)
+                print(f"Error listening for odds events: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+_broker = None
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        if settings.ODDS_BROKER == 'redis':
+            _broker = RedisBroker(settings.ODDS_BROKER_URL, settings.ODDS_STREAM_QUEUE_SIZE)
+        else:
+            _broker = InProcessBroker(settings.ODDS_STREAM_QUEUE_SIZE)
+    return _broker
+
+def publish_changes(changed):
+    """
+    Publish an event per match in `changed` (match id -> objects with Odds'
+    fields), never letting a broker failure break the write that caused it.
+    """
+    broker = get_broker()
+    for match_id, rows in changed.items():
+        message = json.dumps(
+            {'match_id': match_id, 'odds': [board_row(odds) for odds in rows]},
+            separators=(',', ':')
+        )
+        try:
+            broker.publish(match_id, message)
+            metrics.incr('stream_events_published')
+        except Exception as e:
+            metrics.error(e)
+            print(f"Error publishing odds event: {str(e)}")
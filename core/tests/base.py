@@ -0,0 +1,31 @@
+from datetime import time
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from core import streaming
+from core.models import League, Match, Team
+from core.odds_manager import local_odds
+
+# The shared cache and the broker are Redis in production; tests use their
+# in-process stand-ins
+LOCAL_SERVICES = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'ODDS_BROKER': 'memory',
+}
+
+@override_settings(**LOCAL_SERVICES)
+class OddsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_odds.clear()
+        streaming._broker = None
+        self.league = League.objects.create(name='Premier League', country='England')
+        self.home = Team.objects.create(name='Arsenal', league=self.league)
+        self.away = Team.objects.create(name='Chelsea', league=self.league)
+        self.match = self.create_match()
+
+    def create_match(self, match_date=None, match_time=time(15), status='scheduled'):
+        return Match.objects.create(
+            league=self.league, home_team=self.home, away_team=self.away,
+            match_date=match_date or timezone.now(), match_time=match_time, status=status
+        )
@@ -0,0 +1,86 @@
+from unittest import mock
+import numpy as np
+from django.test import SimpleTestCase
+from core import analytics
+from core.analytics import OddsArrays, scan, trim_report
+from core.tests.base import OddsTestCase
+
+class OddsAnalyticsTests(SimpleTestCase):
+    def scan(self, lines):
+        """Scan (match_id, market, parameter, bookmaker_id, (home, draw, away)) rows"""
+        match_ids, markets, parameters, bookmaker_ids, prices = zip(*lines)
+        parameters = [float('nan') if p is None else p for p in parameters]
+        prices = [[float('nan') if p is None else p for p in row] for row in prices]
+        return scan(OddsArrays(match_ids, markets, parameters, bookmaker_ids, prices), 0.05)
+
+    def test_three_way_line_without_draw_is_not_a_book(self):
+        result = self.scan([(1, '1x2', None, 1, (2.10, None, 2.10))])
+        self.assertEqual(result.arbitrages(), [])
+        self.assertEqual(result.summary()['median_margin'], None)
+
+    def test_incomplete_line_is_left_out_of_the_consensus(self):
+        complete = [(1, '1x2', None, bookmaker, (2.00, 3.40, 3.80)) for bookmaker in (1, 2, 3)]
+        with_gap = self.scan(complete + [(1, '1x2', None, 4, (2.05, None, 3.60))])
+        self.assertTrue(np.allclose(with_gap.consensus, self.scan(complete).consensus))
+        self.assertNotIn(4, with_gap.bookmaker_margins())
+
+    def test_draw_is_required_once_any_bookmaker_quotes_one(self):
+        result = self.scan([
+            (1, 'custom', None, 1, (2.20, None, 2.20)),
+            (1, 'custom', None, 2, (2.00, 3.50, 3.50)),
+            (2, 'custom', None, 1, (1.90, None, 1.90)),
+        ])
+        self.assertEqual(list(result.bookmaker_margins()), [1, 2])
+        self.assertTrue(np.isnan(result.margins[0]))
+        self.assertAlmostEqual(result.bookmaker_margins()[1], round(2 / 1.90 - 1, 4))
+
+    def test_two_way_arbitrage_is_found(self):
+        result = self.scan([
+            (1, 'over_under', 2.5, 1, (2.15, None, 1.80)),
+            (1, 'over_under', 2.5, 2, (1.80, None, 2.15)),
+        ])
+        arbitrages = result.arbitrages()
+        self.assertEqual(len(arbitrages), 1)
+        self.assertEqual(arbitrages[0]['parameter'], 2.5)
+        self.assertEqual([leg['bookmaker_id'] for leg in arbitrages[0]['legs']], [1, 2])
+
+class ScanReportCacheTests(OddsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.report = {
+            'summary': {'rows': 12, 'groups': 4, 'arbitrages': 3, 'median_margin': 0.05},
+            'arbitrages': [{'match_id': match_id, 'profit': 0.01} for match_id in (1, 2, 3)],
+            'value_prices': [{'match_id': 1, 'edge': edge} for edge in (0.3, 0.2, 0.1, 0.06)],
+            'bookmaker_margins': {}
+        }
+
+    def get(self, **params):
+        return self.client.get('/odds/analytics/', params)
+
+    def test_one_scan_serves_every_threshold_and_limit(self):
+        with mock.patch.object(analytics, 'scan_report', return_value=self.report) as scan_report:
+            responses = [
+                self.get(threshold=threshold, limit=limit).json()
+                for threshold in (0.05, 0.1, 0.15, 0.25, 0.99) for limit in (1, 2, 500)
+            ]
+        scan_report.assert_called_once_with(200, 0.05)
+        edges = lambda response: [value['edge'] for value in response['value_prices']]
+        self.assertEqual(edges(responses[2]), [0.3, 0.2, 0.1, 0.06])
+        self.assertEqual(edges(responses[4]), [0.3, 0.2])
+        self.assertEqual(edges(responses[6]), [0.3])
+        self.assertEqual(edges(responses[11]), [0.3])
+        self.assertEqual(edges(responses[14]), [])
+        self.assertEqual(len(responses[0]['arbitrages']), 1)
+        self.assertEqual(len(responses[2]['arbitrages']), 3)
+
+    def test_threshold_below_the_configured_one_is_rejected(self):
+        with mock.patch.object(analytics, 'scan_report', return_value=self.report) as scan_report:
+            response = self.get(threshold=0.01)
+        self.assertEqual(response.status_code, 400)
+        scan_report.assert_not_called()
+
+    def test_configured_threshold_keeps_every_scanned_price(self):
+        # Edges are rounded in the report, so one just over the threshold reads as equal to it
+        self.report['value_prices'].append({'match_id': 2, 'edge': 0.05})
+        self.assertEqual(len(trim_report(self.report, 50, 0.05)['value_prices']), 5)
+        self.assertEqual(len(trim_report(self.report, 50, 0.06)['value_prices']), 3)
@@ -0,0 +1,103 @@
+import random
+from decimal import Decimal
+from unittest import mock
+from django.db import IntegrityError, transaction
+from core import best_odds
+from core.best_odds import OUTCOMES, rebuild
+from core.models import BestOdds, Odds
+from core.odds_manager import OddsManager
+from core.tests.base import OddsTestCase
+
+class BestOddsTests(OddsTestCase):
+    def snapshot(self):
+        return {
+            (row.market, row.parameter): row for row in BestOdds.objects.filter(match=self.match)
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.snapshot()
+        rebuild([self.match.id])
+        rebuilt = self.snapshot()
+        self.assertEqual(incremental.keys(), rebuilt.keys())
+        for key, row in incremental.items():
+            expected = rebuilt[key]
+            self.assertEqual(row.bookmaker_count, expected.bookmaker_count, key)
+            for outcome in OUTCOMES:
+                best = getattr(row, f'best_{outcome}')
+                self.assertEqual(best, getattr(expected, f'best_{outcome}'), (key, outcome))
+                self.assertEqual(getattr(row, f'{outcome}_sum'), getattr(expected, f'{outcome}_sum'), (key, outcome))
+                self.assertAlmostEqual(
+                    getattr(row, f'{outcome}_probability_sum'),
+                    getattr(expected, f'{outcome}_probability_sum'), 9
+                )
+                if best is not None:
+                    # Ties may credit either bookmaker; the holder must quote the best price
+                    holder = Odds.objects.get(
+                        match=self.match, market=key[0], parameter=key[1],
+                        bookmaker_id=getattr(row, f'best_{outcome}_bookmaker_id')
+                    )
+                    self.assertEqual(getattr(holder, f'{outcome}_odds'), best)
+
+    def test_incremental_updates_match_a_rebuild(self):
+        rng = random.Random(7)
+        lines = [('1x2', None), ('ah', -0.5), ('ah', -1.5), ('ou', 2.5)]
+        for _ in range(30):
+            records = []
+            for bookmaker in rng.sample(['bet365', 'pinnacle', 'unibet', 'betfair'], 2):
+                market, parameter = rng.choice(lines)
+                odds_data = {'home': round(rng.uniform(1.5, 4), 2), 'away': round(rng.uniform(1.5, 4), 2)}
+                if market == '1x2':
+                    odds_data['draw'] = round(rng.uniform(2.8, 4), 2)
+                if parameter is not None:
+                    odds_data['parameter'] = parameter
+                records.append({
+                    'match_id': self.match.id, 'market': market,
+                    'bookmaker_name': bookmaker, 'odds_data': odds_data
+                })
+            if rng.random() < 0.5:
+                OddsManager.save_odds_bulk(records)
+            else:
+                for record in records:
+                    OddsManager.save_odds(record['match_id'], record['market'], record['bookmaker_name'], record['odds_data'])
+        self.assertMatchesRebuild()
+
+    def test_lowered_best_price_passes_to_the_next_bookmaker(self):
+        OddsManager.save_odds(self.match.id, '1x2', 'bet365', {'home': 2.50, 'draw': 3.40, 'away': 3.00})
+        OddsManager.save_odds(self.match.id, '1x2', 'pinnacle', {'home': 2.30, 'draw': 3.50, 'away': 3.10})
+        OddsManager.save_odds(self.match.id, '1x2', 'bet365', {'home': 2.10, 'draw': 3.40, 'away': 3.00})
+
+        best = OddsManager.get_best_odds([self.match.id], '1x2')[self.match.id]
+        self.assertEqual(best.best_home, Decimal('2.30'))
+        self.assertEqual(best.best_home_bookmaker.oddsportal_name, 'pinnacle')
+        self.assertEqual(best.home_sum, Decimal('4.40'))
+        self.assertMatchesRebuild()
+
+    def test_lines_without_a_parameter_are_unique(self):
+        BestOdds.objects.create(match=self.match, market='1x2')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            BestOdds.objects.create(match=self.match, market='1x2')
+        BestOdds.objects.create(match=self.match, market='ah', parameter=-0.5)
+
+    def test_concurrent_first_insert_is_merged(self):
+        pinnacle = OddsManager.save_odds(self.match.id, '1x2', 'pinnacle', {'home': 2.30, 'draw': 3.50, 'away': 3.10})
+        with mock.patch('core.odds_manager.apply_changes'):
+            bet365 = OddsManager.save_odds(self.match.id, '1x2', 'bet365', {'home': 2.50, 'draw': 3.40, 'away': 3.00})
+        select_for_update, reads = BestOdds.objects.select_for_update, []
+
+        class RacingQuery:
+            def filter(self, **lookups):
+                rows = list(select_for_update().filter(**lookups))
+                if not reads:
+                    # The first read runs before another writer's insert of the line commits
+                    rows = []
+                reads.append(rows)
+                return rows
+
+        with mock.patch.object(BestOdds.objects, 'select_for_update', RacingQuery):
+            best_odds.apply_changes([(bet365, None)])
+
+        self.assertEqual(len(reads), 2)
+        self.assertEqual(BestOdds.objects.filter(match=self.match, market='1x2').count(), 1)
+        best = BestOdds.objects.get(match=self.match, market='1x2')
+        self.assertEqual((best.best_home_bookmaker_id, best.best_draw_bookmaker_id), (bet365.bookmaker_id, pinnacle.bookmaker_id))
+        self.assertMatchesRebuild()
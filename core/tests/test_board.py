@@ -0,0 +1,63 @@
+import threading
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from core.board import board_key, decode_board, get_board, update_boards
+from core.odds_manager import OddsManager
+from core.tests.base import OddsTestCase
+
+class BoardTests(OddsTestCase):
+    # A msgpack map as another process would have cached it
+    MSGPACK_BOARD = b'\x81\xa8match_id\x01'
+
+    @mock.patch('core.board.msgpack', None)
+    def test_msgpack_board_is_rebuilt_without_msgpack(self):
+        odds = OddsManager.save_odds(self.match.id, '1x2', 'bet365', {'home': 2.10, 'draw': 3.40, 'away': 3.20})
+        cache.set(board_key(self.match.id), self.MSGPACK_BOARD)
+
+        board = get_board(self.match.id)
+        self.assertEqual(board['odds'], [[odds.bookmaker_id, '1x2', None, 210, 340, 320, False]])
+        self.assertIsInstance(cache.get(board_key(self.match.id)), str)
+
+    @mock.patch('core.board.msgpack', None)
+    def test_update_drops_unreadable_board(self):
+        odds = OddsManager.save_odds(self.match.id, '1x2', 'bet365', {'home': 2.10, 'draw': 3.40, 'away': 3.20})
+        cache.set(board_key(self.match.id), self.MSGPACK_BOARD)
+
+        update_boards({self.match.id: [odds]})
+        self.assertIsNone(cache.get(board_key(self.match.id)))
+
+    def save(self, bookmaker, home):
+        return OddsManager.save_odds(self.match.id, '1x2', bookmaker, {'home': home, 'draw': 3.40, 'away': 3.20})
+
+    def test_concurrent_merges_keep_every_change(self):
+        rows = [self.save(bookmaker, 2.10) for bookmaker in ('bet365', 'pinnacle', 'unibet', 'betfair')]
+        get_board(self.match.id)
+        for odds in rows:
+            odds.home_odds = Decimal('2.50')
+
+        def slow_decode(blob):
+            # Widen the gap between reading and writing the board
+            threading.Event().wait(0.02)
+            return decode_board(blob)
+
+        with mock.patch('core.board.decode_board', slow_decode):
+            threads = [threading.Thread(target=update_boards, args=({self.match.id: [odds]},)) for odds in rows]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        board = get_board(self.match.id)
+        self.assertEqual(sorted(row[3] for row in board['odds']), [250] * 4)
+        self.assertFalse(cache.get(f'{board_key(self.match.id)}:lock'))
+
+    def test_rebuild_is_not_cached_while_a_writer_holds_the_lock(self):
+        self.save('bet365', 2.10)
+        cache.add(f'{board_key(self.match.id)}:lock', 1)
+        self.assertEqual(get_board(self.match.id)['odds'][0][3], 210)
+        self.assertIsNone(cache.get(board_key(self.match.id)))
+
+        cache.delete(f'{board_key(self.match.id)}:lock')
+        get_board(self.match.id)
+        self.assertIsNotNone(cache.get(board_key(self.match.id)))
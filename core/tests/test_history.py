@@ -0,0 +1,94 @@
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.utils import timezone
+from core.history import downsample, price_series, record_changes
+from core.models import Bookmaker, Odds, OddsHistory
+from core.odds_manager import OddsManager
+from core.tests.base import OddsTestCase
+
+def daily_ohlc(series):
+    """{day: [(open, high, low, close) per outcome]} of a price series"""
+    days = {}
+    for recorded_at, *prices, _ in series:
+        days.setdefault(timezone.localdate(recorded_at), []).append(prices)
+    return {
+        day: [
+            (rows[0][i], max(row[i] for row in rows), min(row[i] for row in rows), rows[-1][i])
+            for i in range(3) if rows[0][i] is not None
+        ]
+        for day, rows in days.items()
+    }
+
+def hourly_close(series):
+    """The last prices of every hour of a series"""
+    return {
+        (timezone.localdate(row[0]), timezone.localtime(row[0]).hour): row[1:4] for row in series
+    }
+
+class OddsHistoryTests(OddsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bookmaker = Bookmaker.objects.create(name='bet365', oddsportal_name='bet365')
+
+    def series(self, market='1x2', parameter=None, **kwargs):
+        return price_series(self.match.id, market, self.bookmaker.id, parameter, **kwargs)
+
+    def test_only_changes_are_recorded(self):
+        for home in (2.10, 2.10, 2.30, 2.30, 2.10):
+            OddsManager.save_odds(self.match.id, '1x2', 'bet365', {'home': home, 'draw': 3.40, 'away': 3.20})
+        self.assertEqual([row[1] for row in self.series()], [Decimal('2.10'), Decimal('2.30'), Decimal('2.10')])
+
+        record = {'match_id': self.match.id, 'market': '1x2', 'bookmaker_name': 'bet365',
+                  'odds_data': {'home': 2.10, 'draw': 3.40, 'away': 3.20}}
+        OddsManager.save_odds_bulk([record])
+        self.assertEqual(OddsHistory.objects.count(), 3)
+
+    def test_lines_are_kept_apart(self):
+        for parameter, home in ((-0.5, 1.90), (-1.5, 2.60), (-0.5, 1.85)):
+            OddsManager.save_odds(self.match.id, 'ah', 'bet365', {'home': home, 'away': 1.95, 'parameter': parameter})
+        self.assertEqual([row[1] for row in self.series('ah', -0.5)], [Decimal('1.90'), Decimal('1.85')])
+        self.assertEqual([row[1:4] for row in self.series('ah', -1.5)], [(Decimal('2.60'), None, Decimal('1.95'))])
+        self.assertEqual(self.series('ah'), [])
+
+    def record_day(self, day, rng):
+        """A day of moves every few minutes on a 1X2 and a handicap line"""
+        moment = timezone.make_aware(datetime.combine(day, time(0, 3)))
+        while timezone.localdate(moment) == day:
+            record_changes([
+                Odds(match_id=self.match.id, bookmaker_id=self.bookmaker.id, market='1x2',
+                     home_odds=Decimal(rng.randint(180, 260)) / 100, draw_odds=Decimal(rng.randint(300, 380)) / 100,
+                     away_odds=Decimal(rng.randint(280, 420)) / 100, is_live=False),
+                Odds(match_id=self.match.id, bookmaker_id=self.bookmaker.id, market='ah', parameter=-0.5,
+                     home_odds=Decimal(rng.randint(170, 230)) / 100, away_odds=Decimal(rng.randint(170, 230)) / 100,
+                     is_live=False),
+            ], moment)
+            moment += timedelta(minutes=rng.randint(1, 12))
+
+    def test_downsampling_keeps_daily_open_high_low_close(self):
+        rng = random.Random(11)
+        today = timezone.localdate()
+        old_days = [today - timedelta(days=10), today - timedelta(days=9)]
+        for day in old_days + [today]:
+            self.record_day(day, rng)
+        before = {line: self.series(*line) for line in (('1x2', None), ('ah', -0.5))}
+        recent = OddsHistory.objects.filter(day=today).count()
+
+        deleted = downsample(raw_days=7, bucket_minutes=60)
+        self.assertGreater(deleted, 0)
+        self.assertEqual(downsample(raw_days=7, bucket_minutes=60), 0)
+        self.assertEqual(OddsHistory.objects.filter(day=today).count(), recent)
+
+        for line, raw in before.items():
+            thinned = self.series(*line)
+            self.assertEqual(daily_ohlc(thinned), daily_ohlc(raw), line)
+            for day in old_days:
+                # At most one close per bucket, plus the open and six extremes
+                self.assertLessEqual(sum(timezone.localdate(row[0]) == day for row in thinned), 24 + 7)
+            self.assertEqual(hourly_close(thinned), hourly_close(raw), line)
+
+    def test_retention_drops_old_days(self):
+        self.record_day(timezone.localdate() - timedelta(days=40), random.Random(3))
+        OddsManager.save_odds(self.match.id, '1x2', 'bet365', {'home': 2.10, 'draw': 3.40, 'away': 3.20})
+        downsample(raw_days=7, retention_days=30)
+        self.assertEqual(len(self.series()), 1)
@@ -0,0 +1,78 @@
+import threading
+from decimal import Decimal
+from django.core.cache import cache
+from core import stampede
+from core.models import Odds
+from core.odds_manager import OddsManager, local_odds
+from core.tests.base import OddsTestCase
+
+class LiveOddsCacheTests(OddsTestCase):
+    def save_live(self, home, bulk=False):
+        record = {'home': home, 'draw': 3.40, 'away': 3.20}
+        if bulk:
+            OddsManager.save_odds_bulk([{
+                'match_id': self.match.id, 'market': '1x2', 'bookmaker_name': 'bet365',
+                'odds_data': record, 'is_live': True
+            }])
+        else:
+            OddsManager.save_odds(self.match.id, '1x2', 'bet365', record, is_live=True)
+        # As another process would see the shared cache once its local copies expire
+        local_odds.clear()
+
+    def test_market_wide_live_read_follows_writes(self):
+        for bulk in (False, True):
+            self.save_live(2.00, bulk)
+            self.assertEqual(OddsManager.get_odds(self.match.id, '1x2', is_live=True)['home_odds'], Decimal('2.00'))
+            self.save_live(4.00, bulk)
+            self.assertEqual(OddsManager.get_odds(self.match.id, '1x2', is_live=True)['home_odds'], Decimal('4.00'))
+
+    def test_market_wide_live_batch_read_follows_writes(self):
+        self.save_live(2.00)
+        OddsManager.get_odds_many([self.match.id], ['1x2'], is_live=True)
+        self.save_live(4.00)
+        found = OddsManager.get_odds_many([self.match.id], ['1x2'], is_live=True)
+        self.assertEqual(found[(self.match.id, '1x2')]['home_odds'], Decimal('4.00'))
+
+    def test_bookmaker_live_read_is_written_through(self):
+        self.save_live(2.00)
+        bookmaker_id = Odds.objects.get(match=self.match).bookmaker_id
+        self.assertEqual(OddsManager.get_odds(self.match.id, '1x2', bookmaker_id, is_live=True)['home_odds'], Decimal('2.00'))
+        self.save_live(4.00)
+        self.assertEqual(OddsManager.get_odds(self.match.id, '1x2', bookmaker_id, is_live=True)['home_odds'], Decimal('4.00'))
+
+class StampedeTests(OddsTestCase):
+    def test_hit_does_not_recompute(self):
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        self.assertEqual(stampede.fetch('key', compute, 60), 1)
+        self.assertEqual(stampede.fetch('key', compute, 60), 1)
+        self.assertEqual(len(calls), 1)
+
+    def test_expired_value_is_served_while_another_worker_recomputes(self):
+        stampede.set_value('key', 'stale', -1)
+        cache.add('key:lock', 1)
+        self.assertEqual(stampede.fetch('key', lambda: 'fresh', 60), 'stale')
+
+        cache.delete('key:lock')
+        self.assertEqual(stampede.fetch('key', lambda: 'fresh', 60), 'fresh')
+
+    def test_concurrent_misses_share_one_computation(self):
+        calls, started = [], threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            threading.Event().wait(0.2)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(stampede.fetch('key', compute, 60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(len(calls), 1)
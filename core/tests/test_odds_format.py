@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import SimpleTestCase, TestCase, override_settings
+from core.odds_format import TABLE_MAX, _american, _fractional, format_prices, preferred_format
+
+# (hundredths, decimal, fractional, american)
+PRICES = [
+    (101, '1.01', '1/100', '-10000'),
+    (150, '1.50', '1/2', '-200'),
+    (190, '1.90', '10/11', '-111'),
+    (199, '1.99', 'Evens', '-101'),
+    (200, '2.00', 'Evens', '+100'),
+    (201, '2.01', 'Evens', '+101'),
+    # Halfway between Evens and 11/10 goes to the longer price
+    (205, '2.05', '11/10', '+105'),
+    (250, '2.50', '6/4', '+150'),
+    (TABLE_MAX, '100.00', '100/1', '+9900'),
+    (TABLE_MAX + 1, '100.01', '100/1', '+9901'),
+    (45000, '450.00', '400/1', '+44900'),
+    (100001, '1000.01', '999/1', '+99901'),
+]
+
+class OddsFormatTests(SimpleTestCase):
+    def test_fractional(self):
+        for hundredths, _, fractional, _ in PRICES:
+            with self.subTest(hundredths=hundredths):
+                self.assertEqual(_fractional(hundredths), fractional)
+
+    def test_american(self):
+        for hundredths, _, _, american in PRICES:
+            with self.subTest(hundredths=hundredths):
+                self.assertEqual(_american(hundredths), american)
+
+    def test_format_prices(self):
+        hundredths = [price[0] for price in PRICES]
+        for column, odds_format in enumerate(('decimal', 'fractional', 'american'), start=1):
+            with self.subTest(odds_format=odds_format):
+                self.assertEqual(format_prices(hundredths, odds_format), [price[column] for price in PRICES])
+
+    def test_missing_and_invalid_prices(self):
+        self.assertEqual(format_prices([None, 0, 100], 'fractional'), ['-', '-', '-'])
+
+    @override_settings(DEFAULT_ODDS_FORMAT='decimal')
+    def test_format_names(self):
+        for odds_format, expected in (('moneyline', '+150'), ('american', '+150'), ('roman', '2.50'), (None, '2.50')):
+            with self.subTest(odds_format=odds_format):
+                self.assertEqual(format_prices([250], odds_format), [expected])
+
+@override_settings(DEFAULT_ODDS_FORMAT='decimal')
+class PreferredFormatTests(TestCase):
+    def user(self, odds_format):
+        user = get_user_model().objects.create_user(email=f'{odds_format}@example.com', password='secret')
+        user.profile.odds_format = odds_format
+        user.profile.save()
+        return user
+
+    def test_preferred_format(self):
+        without_profile = get_user_model().objects.create_user(email='none@example.com', password='secret')
+        without_profile.profile.delete()
+        without_profile = get_user_model().objects.get(pk=without_profile.pk)
+        cases = [
+            (SimpleNamespace(), 'decimal'),
+            (SimpleNamespace(user=AnonymousUser()), 'decimal'),
+            (SimpleNamespace(user=without_profile), 'decimal'),
+            (SimpleNamespace(user=self.user('fractional')), 'fractional'),
+            (SimpleNamespace(user=self.user('american')), 'american'),
+            (SimpleNamespace(user=self.user('moneyline')), 'american'),
+            (SimpleNamespace(user=self.user('roman')), 'decimal'),
+        ]
+        for request, expected in cases:
+            with self.subTest(user=getattr(request, 'user', None)):
+                self.assertEqual(preferred_format(request), expected)
@@ -0,0 +1,122 @@
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core import stampede
+from core.metrics import Metrics
+from core.models import BestOdds, Odds
+from core.odds_manager import OddsManager, local_odds
+from core.tests.base import OddsTestCase
+
+class SaveOddsTests(OddsTestCase):
+    def test_lines_of_a_market_are_saved_separately(self):
+        for parameter, home in ((-0.5, 1.90), (-1.5, 2.60)):
+            OddsManager.save_odds(self.match.id, 'ah', 'bet365', {'home': home, 'away': 1.95, 'parameter': parameter})
+        OddsManager.save_odds(self.match.id, 'ah', 'bet365', {'home': 2.70, 'away': 1.95, 'parameter': -1.5})
+
+        lines = dict(Odds.objects.filter(match=self.match, market='ah').values_list('parameter', 'home_odds'))
+        self.assertEqual(lines, {-0.5: Decimal('1.90'), -1.5: Decimal('2.70')})
+        best = {b.parameter: b for b in BestOdds.objects.filter(match=self.match, market='ah')}
+        self.assertEqual(best[-0.5].home_sum, Decimal('1.90'))
+        self.assertEqual(best[-1.5].home_sum, Decimal('2.70'))
+        self.assertEqual(best[-1.5].bookmaker_count, 1)
+
+class ChangeDetectionTests(OddsTestCase):
+    def record(self, home, bookmaker='bet365'):
+        return {
+            'match_id': self.match.id, 'market': '1x2', 'bookmaker_name': bookmaker,
+            'odds_data': {'home': home, 'draw': 3.40, 'away': 3.20}
+        }
+
+    def test_identical_prices_are_not_rewritten(self):
+        metrics = Metrics()
+        first = OddsManager.save_odds(self.match.id, '1x2', 'bet365', self.record(2.10)['odds_data'], metrics=metrics)
+        # Match, bookmaker and row lookups only; no UPDATE
+        with self.assertNumQueries(3):
+            OddsManager.save_odds(self.match.id, '1x2', 'bet365', self.record(2.10)['odds_data'], metrics=metrics)
+        self.assertEqual(Odds.objects.get(id=first.id).last_updated, first.last_updated)
+        self.assertEqual(metrics.counters['odds_inserted'], 1)
+        self.assertEqual(metrics.counters['odds_unchanged'], 1)
+
+    def test_bulk_reports_unchanged_updated_and_inserted(self):
+        OddsManager.save_odds_bulk([self.record(2.10), self.record(2.50, 'pinnacle')])
+        last_updated = Odds.objects.get(bookmaker__oddsportal_name='pinnacle').last_updated
+
+        stats = OddsManager.save_odds_bulk([
+            self.record(2.20), self.record(2.50, 'pinnacle'), self.record(2.30, 'unibet')
+        ])
+        self.assertEqual(stats, {'inserted': 1, 'updated': 1, 'unchanged': 1})
+        self.assertEqual(Odds.objects.get(bookmaker__oddsportal_name='pinnacle').last_updated, last_updated)
+
+    def test_snapshot_skips_the_lookup(self):
+        snapshot = {}
+        OddsManager.save_odds_bulk([self.record(2.10)], snapshot=snapshot)
+        bookmakers = OddsManager.get_bookmakers(['bet365'])
+        with self.assertNumQueries(0):
+            stats = OddsManager.save_odds_bulk([self.record(2.10)], bookmakers, snapshot)
+        self.assertEqual(stats['unchanged'], 1)
+
+class SaveOddsBulkTests(OddsTestCase):
+    def records(self, bookmakers, home=2.10, is_live=False, match=None):
+        return [
+            {
+                'match_id': (match or self.match).id, 'market': market, 'bookmaker_name': bookmaker,
+                'odds_data': {'home': home, 'away': 3.20, **extra}, 'is_live': is_live
+            }
+            for bookmaker in bookmakers
+            for market, extra in (('1x2', {'draw': 3.40}), ('ah', {'parameter': -0.5}))
+        ]
+
+    def count_queries(self, records):
+        with CaptureQueriesContext(connection) as queries:
+            stats = OddsManager.save_odds_bulk(records)
+        return len(queries), stats
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        # Each batch goes to a match of its own so both start from the same state
+        other = self.create_match()
+        few, many = ['bet365'], ['bet365', 'pinnacle', 'unibet', 'betfair']
+        OddsManager.get_bookmakers(many)
+
+        inserted_few, _ = self.count_queries(self.records(few))
+        inserted_many, stats = self.count_queries(self.records(many, match=other))
+        self.assertEqual(stats, {'inserted': 8, 'updated': 0, 'unchanged': 0})
+        self.assertEqual(inserted_many, inserted_few)
+
+        updated_few, _ = self.count_queries(self.records(few, 2.20))
+        updated_many, stats = self.count_queries(self.records(many, 2.20, match=other))
+        self.assertEqual(stats, {'inserted': 0, 'updated': 8, 'unchanged': 0})
+        self.assertEqual(updated_many, updated_few)
+
+    def test_rows_match_save_odds(self):
+        OddsManager.save_odds_bulk(self.records(['bet365']))
+        bulk = {
+            (o.market, o.parameter): (o.home_odds, o.draw_odds, o.away_odds)
+            for o in Odds.objects.filter(match=self.match)
+        }
+        Odds.objects.all().delete()
+        for record in self.records(['bet365']):
+            OddsManager.save_odds(record['match_id'], record['market'], record['bookmaker_name'], record['odds_data'])
+        single = {
+            (o.market, o.parameter): (o.home_odds, o.draw_odds, o.away_odds)
+            for o in Odds.objects.filter(match=self.match)
+        }
+        self.assertEqual(bulk, single)
+
+    def test_later_record_for_a_key_wins(self):
+        stats = OddsManager.save_odds_bulk(self.records(['bet365'], 2.10)[:1] + self.records(['bet365'], 2.30)[:1])
+        self.assertEqual(stats['inserted'], 1)
+        self.assertEqual(Odds.objects.get(match=self.match).home_odds, Decimal('2.30'))
+
+    def test_live_rows_are_cached_in_one_call(self):
+        with mock.patch('core.odds_manager.set_many_values', wraps=stampede.set_many_values) as set_many:
+            OddsManager.save_odds_bulk(self.records(['bet365', 'pinnacle'], is_live=True))
+        set_many.assert_called_once()
+        self.assertEqual(len(set_many.call_args[0][0]), 4)
+
+        bookmaker_id = Odds.objects.filter(match=self.match, market='1x2').first().bookmaker_id
+        local_odds.clear()
+        with self.assertNumQueries(0):
+            cached = OddsManager.get_odds(self.match.id, '1x2', bookmaker_id, is_live=True)
+        self.assertEqual(cached['home_odds'], Decimal('2.10'))
+
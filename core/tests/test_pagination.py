@@ -0,0 +1,53 @@
+from datetime import time, timedelta
+from django.utils import timezone
+from core.models import Match
+from core.pagination import decode_cursor, encode_cursor, paginate_fixtures
+from core.tests.base import OddsTestCase
+
+class FixturePaginationTests(OddsTestCase):
+    def setUp(self):
+        super().setUp()
+        start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        # Several fixtures share a date and kick-off time, so ids break the ties
+        for index in range(23):
+            self.create_match(start + timedelta(days=index // 6), time(12 + index % 2))
+        self.order = list(Match.objects.order_by('match_date', 'match_time', 'id').values_list('id', flat=True))
+
+    def walk(self, page_size):
+        pages, page = [], paginate_fixtures(Match.objects.all(), page_size=page_size)
+        while True:
+            pages.append(page)
+            if not page.next_cursor:
+                return pages
+            page = paginate_fixtures(Match.objects.all(), after=page.next_cursor, page_size=page_size)
+
+    def test_forward_walk_covers_every_fixture_once(self):
+        pages = self.walk(5)
+        self.assertEqual([match.id for page in pages for match in page.matches], self.order)
+        self.assertIsNone(pages[0].previous_cursor)
+        self.assertTrue(all(page.previous_cursor for page in pages[1:]))
+
+    def test_backward_walk_returns_the_same_pages(self):
+        pages = self.walk(5)
+        for page, previous in zip(reversed(pages[1:]), reversed(pages[:-1])):
+            back = paginate_fixtures(Match.objects.all(), before=page.previous_cursor, page_size=5)
+            self.assertEqual([m.id for m in back.matches], [m.id for m in previous.matches])
+            self.assertEqual(back.next_cursor, previous.next_cursor)
+
+    def test_cursor_round_trip_and_malformed_cursor(self):
+        match = Match.objects.get(id=self.order[7])
+        self.assertEqual(decode_cursor(encode_cursor(match)), (match.match_date, match.match_time, match.id))
+        self.assertIsNone(decode_cursor('not a cursor'))
+        page = paginate_fixtures(Match.objects.all(), after='not a cursor', page_size=5)
+        self.assertEqual([m.id for m in page.matches], self.order[:5])
+
+    def test_match_list_view_filters_and_pages(self):
+        Match.objects.filter(id=self.order[0]).update(status='finished')
+        response = self.client.get('/matches/', {'per_page': 4})
+        self.assertEqual([m.id for m in response.context['matches']], self.order[1:5])
+
+        response = self.client.get('/matches/', {'per_page': 4, 'after': response.context['page'].next_cursor})
+        self.assertEqual([m.id for m in response.context['matches']], self.order[5:9])
+
+        live = self.client.get('/matches/', {'show': 'live'})
+        self.assertEqual(list(live.context['matches']), [])
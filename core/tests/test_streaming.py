@@ -0,0 +1,86 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.test import override_settings
+from core import streaming
+from core.odds_manager import OddsManager
+from core.tests.base import OddsTestCase
+
+@override_settings(ODDS_STREAM_KEEPALIVE=5)
+class OddsStreamTests(OddsTestCase):
+    def setUp(self):
+        super().setUp()
+        OddsManager.save_odds(self.match.id, '1x2', 'bet365', {'home': 2.10, 'draw': 3.40, 'away': 3.20})
+        self.url = f'/matches/{self.match.id}/odds/stream/'
+
+    async def open_stream(self, **params):
+        response = await self.async_client.get(self.url, params)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response.streaming_content
+
+    async def next_event(self, stream):
+        event, data = (await asyncio.wait_for(anext(stream), 5)).decode().rstrip('\n').split('\n')
+        return event.removeprefix('event: '), json.loads(data.removeprefix('data: '))
+
+    async def save_bulk(self, home):
+        await sync_to_async(OddsManager.save_odds_bulk)([{
+            'match_id': self.match.id, 'market': '1x2', 'bookmaker_name': 'bet365',
+            'odds_data': {'home': home, 'draw': 3.40, 'away': 3.20}
+        }])
+
+    async def test_board_then_deltas(self):
+        stream = await self.open_stream()
+        event, board = await self.next_event(stream)
+        self.assertEqual(event, 'board')
+        self.assertEqual(board['odds'][0][3:6], [210, 340, 320])
+
+        await self.save_bulk(2.25)
+        event, delta = await self.next_event(stream)
+        self.assertEqual(event, 'odds')
+        self.assertEqual(delta['match_id'], self.match.id)
+        self.assertEqual([row[3:6] for row in delta['odds']], [[225, 340, 320]])
+        await stream.aclose()
+
+    @override_settings(DEFAULT_ODDS_FORMAT='fractional')
+    async def test_deltas_in_a_display_format_match_the_page(self):
+        page = await self.async_client.get(f'/matches/{self.match.id}/')
+        self.assertContains(page, f'data-stream="{self.url}?format=fractional"')
+
+        stream = await self.open_stream(format='fractional')
+        await self.next_event(stream)
+        await self.save_bulk(2.25)
+        event, delta = await self.next_event(stream)
+        self.assertEqual([row[3:6] for row in delta['odds']], [['5/4', '5/2', '9/4']])
+        await stream.aclose()
+
+        page = await self.async_client.get(f'/matches/{self.match.id}/')
+        rows = page.context['board_markets'][0][1]
+        self.assertEqual([rows[0]['home'], rows[0]['draw'], rows[0]['away']], ['5/4', '5/2', '9/4'])
+
+    @override_settings(ODDS_STREAM_QUEUE_SIZE=2)
+    async def test_client_that_falls_behind_gets_the_board_again(self):
+        # setUp's write created the broker before the smaller queue applied
+        streaming._broker = None
+        stream = await self.open_stream()
+        await self.next_event(stream)
+        for home in (2.20, 2.30, 2.40, 2.50, 2.60):
+            await self.save_bulk(home)
+
+        event, board = await self.next_event(stream)
+        self.assertEqual(event, 'board')
+        self.assertEqual(board['odds'][0][3], 260)
+        await stream.aclose()
+
+    async def test_disconnect_unsubscribes(self):
+        broker = streaming.get_broker()
+        stream = await self.open_stream()
+        await self.next_event(stream)
+        self.assertEqual(len(broker._subscribers[self.match.id]), 1)
+
+        # ASGI cancels the response task when the client goes away
+        waiting = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertNotIn(self.match.id, broker._subscribers)
@@ -0,0 +1,83 @@
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+from core.models import Odds
+from core.odds_manager import OddsManager, local_odds
+from core.tests.base import OddsTestCase
+from core.write_behind import WriteBehind, journal_directory
+from sportsbook.sharding import Shard
+
+class WriteBehindTests(OddsTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write_behind(self, directory=None):
+        write_behind = WriteBehind(directory or self.directory, fsync=False)
+        self.addCleanup(write_behind.journal.close)
+        return write_behind
+
+    def record(self, home):
+        return {
+            'match_id': self.match.id, 'market': '1x2', 'bookmaker_name': 'bet365',
+            'odds_data': {'home': home, 'draw': 3.40, 'away': 3.20}, 'is_live': True
+        }
+
+    def test_submit_publishes_once_and_flush_writes(self):
+        write_behind = self.write_behind()
+        with mock.patch('core.write_behind.publish_changes') as submitted, \
+                mock.patch('core.odds_manager.publish_changes') as flushed:
+            write_behind.submit([self.record(2.00)])
+            write_behind.submit([self.record(2.50)])
+            write_behind.flush()
+
+        self.assertEqual(submitted.call_count, 2)
+        flushed.assert_not_called()
+        self.assertEqual(Odds.objects.get(match=self.match).home_odds, Decimal('2.50'))
+        self.assertEqual(list(self.directory.glob('*.jsonl')), [])
+
+    def test_flush_leaves_newer_published_price_in_cache(self):
+        write_behind = self.write_behind()
+        write_behind.submit([self.record(2.00)])
+        with write_behind._lock:
+            batch = dict(write_behind.pending)
+        # A newer price arrives while the older batch is being written
+        write_behind.submit([self.record(2.50)])
+        write_behind.pending = batch
+        write_behind.flush()
+
+        bookmaker_id = Odds.objects.get(match=self.match).bookmaker_id
+        local_odds.clear()
+        cached = OddsManager.get_odds(self.match.id, '1x2', bookmaker_id, is_live=True)
+        self.assertEqual(cached['home_odds'], Decimal('2.50'))
+
+    def test_crashed_journal_is_replayed(self):
+        crashed = WriteBehind(self.directory, fsync=False)
+        crashed.submit([self.record(2.00)])
+        crashed.submit([self.record(2.20)])
+        # Dies without flushing, releasing its lock
+        crashed.journal.close()
+        self.assertFalse(Odds.objects.exists())
+
+        self.write_behind().recover()
+        self.assertEqual(Odds.objects.get(match=self.match).home_odds, Decimal('2.20'))
+        self.assertEqual(list(self.directory.glob('*.jsonl')), [])
+
+    def test_journal_is_locked_to_one_process(self):
+        self.write_behind()
+        with self.assertRaises(RuntimeError):
+            WriteBehind(self.directory, fsync=False)
+
+    def test_shards_journal_separately(self):
+        with self.settings(ODDS_WRITE_BEHIND_DIR=self.directory):
+            first, second = journal_directory(Shard(0, 2)), journal_directory(Shard(1, 2))
+        self.assertNotEqual(first, second)
+
+        running = self.write_behind(second)
+        running.submit([self.record(2.00)])
+        self.write_behind(first).recover()
+        self.assertFalse(Odds.objects.exists())
+        self.assertEqual(len(list(second.glob('*.jsonl'))), 1)
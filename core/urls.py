@@ -10,6 +10,8 @@ urlpatterns = [
     path('teams/<int:team_id>/', views.team_detail, name='team_detail'),
     path('matches/', views.match_list, name='match_list'),
     path('matches/<int:match_id>/', views.match_detail, name='match_detail'),
+    path('matches/<int:match_id>/odds/stream/', views.match_odds_stream, name='match_odds_stream'),
+    path('odds/analytics/', views.odds_analytics, name='odds_analytics'),
     path('deposit/', views.deposit, name='deposit'),
     path('deposit_info/', views.deposit_instructions, name='deposit_instructions'),
     path('withdraw/', views.withdrawal, name='withdrawal'),
@@ -1,9 +1,19 @@
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 
 
 from betting.models import Odds
+from .analytics import get_scan_report
+from .board import board_markets, format_rows, get_board
+from .odds_format import format_prices, normalize, preferred_format, to_hundredths
+from .odds_manager import OddsManager
+from .pagination import fixture_page
+from .streaming import RESET, get_broker
 from .models import League, Team, Match, Deposit, Withdrawal, Cryptocurrency
 from .forms import DepositForm, WithdrawalForm
 from .utils import generate_qr_code
@@ -13,26 +23,54 @@ from account.models import Profile, User
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 
+# Market whose best prices are shown on fixture lists
+FIXTURE_LIST_MARKET = '1x2'
+
+def with_best_odds(matches, odds_format):
+    """
+    Evaluate matches, attaching each one's BestOdds (or None) as
+    match.best_prices and its prices in `odds_format` as match.best_display.
+    """
+    matches = list(matches)
+    best_odds = OddsManager.get_best_odds([match.id for match in matches], FIXTURE_LIST_MARKET)
+    priced = [match for match in matches if match.id in best_odds]
+    prices = iter(format_prices([
+        to_hundredths(price)
+        for match in priced
+        for price in (best_odds[match.id].best_home, best_odds[match.id].best_draw, best_odds[match.id].best_away)
+    ], odds_format))
+    for match in matches:
+        match.best_prices = best_odds.get(match.id)
+        if match.best_prices:
+            match.best_display = {'home': next(prices), 'draw': next(prices), 'away': next(prices)}
+    return matches
+
 def home(request):
     """
-    Render the home page with a list of leagues, teams, and matches.
+    Render the home page with leagues, teams and a page of upcoming and
+    live matches.
     """
+    page = fixture_page(request, Match.objects.all())
     context = {
-        'leagues': League.objects.all(),
-        'teams': Team.objects.all(),
-        'matches': Match.objects.all(),
+        'leagues': League.objects.order_by('name')[:settings.HOME_LIST_LIMIT],
+        'teams': Team.objects.select_related('league').order_by('name')[:settings.HOME_LIST_LIMIT],
+        'matches': with_best_odds(page.matches, preferred_format(request)),
+        'page': page,
     }
     return render(request, 'core/home.html', context)
 
 def league_detail(request, league_id):
     """
-    Render the detail page for a specific league, including its teams and matches.
+    Render the detail page for a specific league, including its teams and
+    a page of its matches.
     """
     league = get_object_or_404(League, id=league_id)
+    page = fixture_page(request, league.matches.all())
     context = {
         'league': league,
         'teams': league.teams.all(),
-        'matches': league.matches.all(),
+        'matches': with_best_odds(page.matches, preferred_format(request)),
+        'page': page,
     }
     return render(request, 'core/league_detail.html', context)
 
@@ -50,24 +88,87 @@ def team_detail(request, team_id):
 
 def match_list(request):
     """
-    Render a list of all matches.
+    Render a page of matches, upcoming and live ones by default.
     """
+    page = fixture_page(request, Match.objects.all())
     context = {
-        'matches': Match.objects.all(),
+        'matches': with_best_odds(page.matches, preferred_format(request)),
+        'page': page,
     }
     return render(request, 'core/match_list.html', context)
 
 def match_detail(request, match_id):
     """
-    Render the detail page for a specific match, including its odds.
+    Render the detail page for a specific match, including its odds
+    and the bookmaker odds board.
     """
     match = get_object_or_404(Match, id=match_id)
+    odds_format = preferred_format(request)
     context = {
         'match': match,
         'odds': Odds.objects.filter(match=match),
+        'board_markets': board_markets(get_board(match.id), odds_format),
+        'odds_format': odds_format,
     }
     return render(request, 'core/match_detail.html', context)
 
+async def match_odds_stream(request, match_id):
+    """
+    Server-sent events with a match's odds: the full board first, then a
+    delta of changed rows whenever its prices move. Needs the ASGI app so
+    idle streams do not hold a thread each.
+
+    With ?format=<odds format> the deltas carry display strings formatted
+    by core.odds_format instead of integer hundredths, so live updates
+    read exactly like the rendered board.
+    """
+    match = await sync_to_async(get_object_or_404)(Match, id=match_id)
+    odds_format = normalize(request.GET['format']) if 'format' in request.GET else None
+
+    def formatted(message):
+        if odds_format is None:
+            return message
+        event = json.loads(message)
+        event['odds'] = format_rows(event['odds'], odds_format)
+        return json.dumps(event, separators=(',', ':'))
+
+    async def events():
+        broker = get_broker()
+        subscription = await broker.subscribe(match.id)
+        try:
+            message = RESET
+            while True:
+                if message is RESET:
+                    board = await sync_to_async(get_board)(match.id)
+                    yield f"event: board\ndata: {json.dumps(board, separators=(',', ':'))}\n\n"
+                elif message is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: odds\ndata: {formatted(message)}\n\n"
+                message = await subscription.get(timeout=settings.ODDS_STREAM_KEEPALIVE)
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def odds_analytics(request):
+    """
+    JSON scan of all odds: margins, arbitrage opportunities and value
+    prices. Results are cached for ODDS_ANALYTICS_CACHE_TIMEOUT seconds.
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', 50)), 1), settings.ODDS_ANALYTICS_REPORT_LIMIT)
+        threshold = round(float(request.GET.get('threshold', settings.ODDS_ANALYTICS_VALUE_THRESHOLD)), 2)
+    except ValueError:
+        return JsonResponse({'error': 'limit and threshold must be numbers'}, status=400)
+    try:
+        return JsonResponse(get_scan_report(limit, threshold))
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
 @login_required
 def deposit(request):
     """
@@ -0,0 +1,270 @@
+"""
+Write-behind persistence for live odds.
+
+Live prices are published to the cache (per-key entries and match boards)
+as soon as they arrive. They are also appended to a journal on local disk
+and written to the Odds table by a background flush every few seconds.
+Repeated updates to the same key between flushes are coalesced into one
+row write. Live price latency therefore no longer depends on the
+database.
+
+The journal is a directory of numbered JSON-lines segments. A flush seals
+the active segment before writing the batch and deletes sealed segments
+once the batch is committed. Segments left behind by a crash are replayed
+when write-behind starts again.
+
+Each scraper process journals into its own directory under
+ODDS_WRITE_BEHIND_DIR (one per shard, see journal_directory) and holds a
+lock on it, so a process never replays or deletes another's segments. A
+clean stop flushes everything; after a crash, restart the same shard to
+replay its journal.
+"""
+import fcntl
+import json
+import os
+import threading
+from pathlib import Path
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .metrics import metrics as default_metrics
+from .odds_manager import OddsManager
+from .stampede import set_many_values
+from .board import update_boards
+from .streaming import publish_changes
+
+class OddsJournal:
+    """Append-only, segmented log of live odds records"""
+
+    def __init__(self, directory, fsync=True):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(self.directory / 'lock', 'w')
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise RuntimeError(f"Write-behind journal {self.directory} is in use by another process")
+        self.fsync = fsync
+        segments = self.segments()
+        self._number = int(segments[-1].stem) + 1 if segments else 1
+        self._file = None
+
+    def segments(self):
+        return sorted(self.directory.glob('*.jsonl'))
+
+    def append(self, records):
+        if self._file is None:
+            self._file = open(self.directory / f"{self._number:08d}.jsonl", 'a', encoding='utf-8')
+        self._file.write(''.join(json.dumps(record) + '\n' for record in records))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def seal(self):
+        """Close the active segment; returns the number of the last sealed segment"""
+        if self._file:
+            self._file.close()
+            self._file = None
+        sealed = self._number
+        self._number += 1
+        return sealed
+
+    def discard(self, upto):
+        for segment in self.segments():
+            if int(segment.stem) <= upto:
+                segment.unlink()
+
+    def read(self):
+        """Every record in the journal, oldest first"""
+        for segment in self.segments():
+            with open(segment, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # Torn last line from a crash mid-append
+                        continue
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        # Closing the file releases the lock
+        self._lock_file.close()
+
+def _record_key(record):
+    return (record['match_id'], record['bookmaker_name'], record['market'],
+            record['odds_data'].get('parameter'))
+
+class WriteBehind:
+    """
+    Publishes live odds immediately and persists them in coalesced batches.
+
+    submit() is thread-safe and called from request or writer threads; a
+    daemon thread flushes every `interval` seconds until stop().
+    """
+
+    def __init__(self, directory, interval=1.0, fsync=True, metrics=None):
+        self.journal = OddsJournal(directory, fsync)
+        self.interval = interval
+        self.metrics = metrics or default_metrics
+        self.pending = {}
+        self.published = {}
+        self.bookmakers = {}
+        self.snapshot = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.recover()
+        self._thread = threading.Thread(target=self._run, name='odds-write-behind', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+        self.flush()
+        self.journal.close()
+
+    def recover(self):
+        """Replay records journaled but never flushed, e.g. before a crash"""
+        records = {}
+        for record in self.journal.read():
+            records[_record_key(record)] = record
+        if records:
+            self.metrics.incr('write_behind_replayed', len(records))
+            with self._lock:
+                self.pending = {**records, **self.pending}
+                sealed = self.journal.seal()
+            # Nothing published these since the process that journaled them died
+            self._flush_pending(sealed, publish=True)
+
+    def submit(self, records):
+        """Publish live odds records now and queue them for the database"""
+        missing = {r['bookmaker_name'] for r in records} - self.bookmakers.keys()
+        if missing:
+            self.bookmakers.update(OddsManager.get_bookmakers(missing))
+        now = timezone.now()
+        rows = [OddsManager.build_odds(r, self.bookmakers[r['bookmaker_name']], now) for r in records]
+
+        changed_records, changed_rows = [], []
+        with self._lock:
+            for record, odds in zip(records, rows):
+                key = _record_key(record)
+                values = (odds.home_odds, odds.draw_odds, odds.away_odds)
+                if self.published.get(key) == values:
+                    continue
+                self.published[key] = values
+                if key in self.pending:
+                    self.metrics.incr('write_behind_coalesced')
+                self.pending[key] = record
+                changed_records.append(record)
+                changed_rows.append(odds)
+            if changed_records:
+                self.journal.append(changed_records)
+            self.metrics.gauge('write_behind_pending', len(self.pending))
+
+        self.metrics.incr('write_behind_submitted', len(changed_records))
+        if changed_rows:
+            self._publish(changed_rows)
+        return rows
+
+    def _publish(self, rows):
+        with self.metrics.timer('cache_set'):
+            payloads = {}
+            for odds in rows:
+                OddsManager.invalidate_local(odds.match_id, odds.market, odds.bookmaker_id)
+                payloads[OddsManager.get_cache_key(odds.match_id, odds.market, odds.bookmaker_id)] = \
+                    OddsManager.cache_payload(odds)
+            set_many_values(payloads, settings.LIVE_ODDS_CACHE_TIMEOUT)
+        changed = {}
+        for odds in rows:
+            changed.setdefault(odds.match_id, []).append(odds)
+        # Market-wide reads reload from the database; the flush bumps
+        # these generations again once the new prices are there
+        OddsManager.bump_generations(changed)
+        with self.metrics.timer('board_update'):
+            update_boards(changed, {b.id: b.name for b in self.bookmakers.values()})
+        publish_changes(changed)
+
+    def prune(self):
+        """Forget published prices and snapshot rows of matches no longer current"""
+        with self._lock:
+            match_ids = {key[0] for key in self.published}
+        with self._flush_lock:
+            match_ids |= {key[0] for key in self.snapshot}
+            current = OddsManager.current_match_ids(match_ids)
+            self.snapshot = {key: value for key, value in self.snapshot.items() if key[0] in current}
+        with self._lock:
+            self.published = {key: value for key, value in self.published.items() if key[0] in current}
+            self.metrics.gauge('write_behind_published', len(self.published))
+
+    def flush(self):
+        """Write everything submitted so far to the Odds table"""
+        with self._lock:
+            if not self.pending:
+                return
+            sealed = self.journal.seal()
+        self._flush_pending(sealed)
+
+    def _flush_pending(self, sealed, publish=False):
+        with self._flush_lock:
+            with self._lock:
+                batch, self.pending = self.pending, {}
+            if not batch:
+                return
+            try:
+                with self.metrics.timer('write_behind_flush'):
+                    # submit() already published these rows, and republishing a
+                    # batch could overwrite prices submitted since it was taken
+                    OddsManager.save_odds_bulk(
+                        list(batch.values()), snapshot=self.snapshot, metrics=self.metrics,
+                        publish=publish
+                    )
+            except Exception as e:
+                self.metrics.error(e)
+                print(f"Error flushing live odds: {str(e)}")
+                with self._lock:
+                    # Keep the segments and retry, without undoing newer updates
+                    self.pending = {**batch, **self.pending}
+                return
+            self.journal.discard(sealed)
+            self.metrics.incr('write_behind_flushes')
+            self.metrics.incr('write_behind_flushed', len(batch))
+
+    def _run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                self.flush()
+        finally:
+            connection.close()
+
+def journal_directory(shard=None):
+    """This process's journal under ODDS_WRITE_BEHIND_DIR: one per shard"""
+    name = f"shard-{shard.index}-of-{shard.count}" if shard else 'default'
+    return Path(settings.ODDS_WRITE_BEHIND_DIR) / name
+
+def start_write_behind(directory=None, interval=None, metrics=None, shard=None):
+    """
+    Route OddsManager's live writes through a new WriteBehind, journaling
+    into `directory` or the shard's journal_directory
+    """
+    write_behind = WriteBehind(
+        directory or journal_directory(shard),
+        interval or settings.ODDS_WRITE_BEHIND_INTERVAL,
+        settings.ODDS_WRITE_BEHIND_FSYNC,
+        metrics
+    )
+    write_behind.start()
+    OddsManager.write_behind = write_behind
+    return write_behind
+
+def stop_write_behind():
+    """Flush outstanding live odds and go back to synchronous writes"""
+    write_behind, OddsManager.write_behind = OddsManager.write_behind, None
+    if write_behind:
+        write_behind.stop()
@@ -0,0 +1,162 @@
+"""
+Odds extraction from the JSON feeds OddsPortal pages load their tables from.
+
+`FeedCapture` listens to a page's responses and keeps the ones whose URL
+looks like a match/odds feed. `decode_feeds` maps their payloads straight
+onto the (match_data, odds_data) records `parse_league_page` produces, so
+the writer cannot tell the two sources apart. No DOM is serialised or
+parsed on this path; when a step yields no feed rows the scraper falls
+back to the HTML.
+
+Expected payload shape (unknown keys are ignored):
+
+    {"d": {"rows": [{
+        "home-name": "Arsenal", "away-name": "Chelsea",
+        "date-start-timestamp": 1714831200,
+        "status": "live",                      # anything else is scheduled
+        "odds": [{
+            "sport": "football", "market": "Asian Handicap",
+            "bookmaker": "bet365", "handicap": "-1.5",
+            "values": [1.95, 1.90]
+        }]
+    }]}}
+"""
+import json
+import re
+from datetime import datetime, timezone as dt_timezone
+from django.utils import timezone
+from sportsbook.fingerprints import fingerprint, record_fingerprint
+from sportsbook.parsing import MARKET_MAPPING, odds_values_from_list
+
+FEED_URL_PATTERN = re.compile(r'/(ajax-sport-country-tournament|feed/match-event)')
+
+class FeedCapture:
+    """
+    Collects feed responses seen by a page, tagged with the step whose
+    request triggered them.
+
+    The scraper calls begin(url, step) before navigating or clicking, and
+    every feed request made from then on belongs to that step, however
+    late its response arrives. drain(url, step) hands out that step's
+    feeds only, so a slow response to one pagination click is never read
+    as the next page.
+    """
+
+    def __init__(self, page, pattern=FEED_URL_PATTERN):
+        self.pattern = pattern
+        self.tag = None
+        self._requests = {}
+        self._responses = []
+        page.on('request', self._on_request)
+        page.on('requestfailed', self._on_request_failed)
+        page.on('response', self._on_response)
+
+    def begin(self, url, step):
+        """Attribute feed requests made from now on to a page URL and step"""
+        self.tag = (url, step)
+
+    def _on_request(self, request):
+        if self.pattern.search(request.url):
+            self._requests[request] = self.tag
+
+    def _on_request_failed(self, request):
+        self._requests.pop(request, None)
+
+    def _on_response(self, response):
+        if self.pattern.search(response.url):
+            tag = self._requests.pop(response.request, self.tag)
+            self._responses.append((tag, response))
+
+    async def drain(self, url, step):
+        """
+        Return (url, body) for every feed captured for a step so far.
+        Feeds of other steps are stale by now and dropped.
+        """
+        responses, self._responses = self._responses, []
+        feeds = []
+        for tag, response in responses:
+            if tag != (url, step):
+                continue
+            try:
+                feeds.append((response.url, await response.text()))
+            except Exception:
+                # Body no longer available, e.g. the page navigated away
+                continue
+        return feeds
+
+def load_feed_rows(feeds):
+    """Pull the match rows out of captured (url, body) feed responses"""
+    feed_rows = []
+    for _, body in feeds:
+        try:
+            feed_rows.extend(json.loads(body)['d']['rows'])
+        except (ValueError, KeyError, TypeError):
+            continue
+    return feed_rows
+
+def decode_feeds(feed_rows, league, sport, skip_rows=()):
+    """
+    Decode feed rows into writer records.
+
+    Mirrors parse_league_page: returns the records and the fingerprint of
+    every feed row, skipping rows whose fingerprint is in `skip_rows`.
+    """
+    rows, row_hashes = [], []
+    for feed_row in feed_rows:
+        record = decode_feed_row(feed_row, league, sport)
+        if record:
+            row_hash = record_fingerprint(record)
+        else:
+            row_hash = fingerprint(json.dumps(feed_row, sort_keys=True))
+        row_hashes.append(row_hash)
+        if record and row_hash not in skip_rows:
+            rows.append(record)
+    return rows, row_hashes
+
+def decode_feed_row(feed_row, league, sport):
+    try:
+        kickoff = timezone.localtime(
+            datetime.fromtimestamp(feed_row['date-start-timestamp'], tz=dt_timezone.utc)
+        )
+        match_data = {
+            'home_team_name': feed_row['home-name'].strip(),
+            'away_team_name': feed_row['away-name'].strip(),
+            'league': league['oddsportal_path'],
+            'sport': sport,
+            'match_date': kickoff.date(),
+            'match_time': kickoff.time(),
+            'kickoff': kickoff,
+            'status': 'live' if feed_row.get('status') == 'live' else 'scheduled'
+        }
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+    return match_data, decode_feed_odds(feed_row.get('odds') or [])
+
+def decode_feed_odds(feed_odds):
+    """Same mapping as extract_odds_data, applied to feed entries"""
+    odds_data = {}
+    for entry in feed_odds:
+        market = str(entry.get('market', '')).lower().replace(' ', '-')
+        market_info = MARKET_MAPPING.get(entry.get('sport'), {}).get(market)
+        if not market_info:
+            continue
+
+        try:
+            if isinstance(market_info, tuple):
+                market_type, param_extractor = market_info
+                parameter = param_extractor(str(entry.get('handicap', '')))
+            else:
+                market_type = market_info
+                parameter = None
+
+            odds_values = odds_values_from_list([float(v) for v in entry.get('values', [])])
+        except (AttributeError, TypeError, ValueError):
+            continue
+
+        if odds_values:
+            odds_data.setdefault(market_type, {})[entry.get('bookmaker', 'unknown')] = {
+                **odds_values,
+                'parameter': parameter
+            }
+    return odds_data
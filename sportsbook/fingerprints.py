@@ -0,0 +1,67 @@
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from core.local_cache import LocalCache
+
+_MISSING = object()
+
+def fingerprint(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=12).hexdigest()
+
+def page_fingerprint(content):
+    """
+    Hash the odds table of a page without parsing it.
+
+    Everything from the first `table-main` to the last closing table tag is
+    hashed. That can only over-cover the table, so a change inside it is
+    never missed. Kick-offs shown as "Today" or "Tomorrow" resolve against
+    the current date, so the date is hashed too and the same HTML reads as
+    changed after midnight.
+    """
+    start = content.find('table-main')
+    end = content.rfind('</table>')
+    if start == -1 or end < start:
+        start, end = 0, len(content)
+    return fingerprint(f"{timezone.now().date().isoformat()}:{content[start:end]}")
+
+def record_fingerprint(record):
+    """Hash a parsed (match_data, odds_data) record, resolved dates included"""
+    return fingerprint(json.dumps(record, sort_keys=True, default=str))
+
+class FingerprintStore:
+    """
+    Content fingerprints of league pages and their match rows from the last
+    successful pass, kept in-process and in the cache so they survive runs.
+
+    Entries are {'page': page_hash, 'rows': [row_hash, ...]} keyed by page
+    URL and pagination step. They are only committed by the writer once the
+    page has been persisted, so a failed write is retried next pass.
+
+    The in-process copy is a bounded LRU with the same TTL as the cache, so
+    a long-running scraper does not hold every page it ever visited.
+    """
+
+    def __init__(self, timeout=None, maxsize=None):
+        self.timeout = timeout or settings.SCRAPER_FINGERPRINT_TIMEOUT
+        self._local = LocalCache(
+            maxsize or settings.SCRAPER_FINGERPRINT_LOCAL_SIZE,
+            self.timeout,
+            name='local_fingerprints'
+        )
+
+    @staticmethod
+    def key(url, step):
+        return f"scrape:fp:{fingerprint(url)}:{step}"
+
+    def get(self, key):
+        entry = self._local.get(key, _MISSING)
+        if entry is _MISSING:
+            entry = cache.get(key)
+            self._local.set(key, entry)
+        return entry
+
+    def commit(self, key, entry):
+        self._local.set(key, entry)
+        cache.set(key, entry, timeout=self.timeout)
@@ -0,0 +1,163 @@
+"""
+A local stand-in for an OddsPortal league page, for comparing navigation
+profiles without touching the live site.
+
+The page loads a stylesheet, a web font, an image and a third-party
+tracker, like the real one. Its pagination button fetches the next page's
+rows as JSON after a delay and only then replaces the table body, so a
+wait that returns while the old rows are still shown reads the wrong page.
+
+The tracker is served from 127.0.0.1 and everything else from localhost,
+so a profile allowing only localhost treats the tracker as third-party.
+"""
+import copy
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from core.metrics import Metrics
+from sportsbook.navigation import ROW_SELECTOR
+
+FIRST_PARTY_HOST = 'localhost'
+THIRD_PARTY_HOST = '127.0.0.1'
+LEAGUE_PATH = '/football/england/premier-league/'
+
+PAGE_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<link rel="stylesheet" href="/static/site.css">
+<script src="http://{third_party}:{port}/tracker.js" async></script>
+</head>
+<body>
+<img src="/static/banner.png" alt="">
+<table class="table-main"><tbody>{rows}</tbody></table>
+<a data-cy="pagination-next" href="#" class="{next_class}">Next</a>
+<script>
+let step = 0;
+const next = document.querySelector('a[data-cy="pagination-next"]');
+next.addEventListener('click', async event => {{
+    event.preventDefault();
+    const data = await (await fetch('/feed/' + (step + 1) + '.json')).json();
+    step += 1;
+    document.querySelector('.table-main tbody').innerHTML = data.rows;
+    next.className = data.last ? 'disabled' : '';
+}});
+</script>
+</body>
+</html>
+"""
+
+# Padding sizes of the resources a lean profile blocks
+ASSETS = {
+    '/static/site.css': ('text/css', "@font-face {{ font-family: Odds; src: url('/static/odds.woff2'); }}\nbody {{ font-family: Odds; }}\n/*{}*/", 40000),
+    '/static/odds.woff2': ('font/woff2', '{}', 80000),
+    '/static/banner.png': ('image/png', '{}', 150000),
+    '/tracker.js': ('application/javascript', '/*{}*/', 60000),
+}
+
+def page_rows(step, rows_per_page=25):
+    """Rows of one page, each with a participant name unique to its step"""
+    return ''.join(
+        f'<tr class="deactivate"><td><p class="participant-name">Home {step}-{index}</p>'
+        f'<p class="participant-name">Away {step}-{index}</p></td><td>2.10</td><td>3.40</td><td>3.20</td></tr>'
+        for index in range(rows_per_page)
+    )
+
+class FixtureSite:
+    """
+    Serve the league page from a background thread; use as a context manager.
+
+    `steps` is the number of table pages and `feed_delay` how long, in
+    seconds, the next page's rows take to arrive after a click.
+    """
+
+    def __init__(self, steps=3, feed_delay=0.3):
+        self.steps = steps
+        self.feed_delay = feed_delay
+        self.server = None
+
+    def __enter__(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    @property
+    def league_url(self):
+        return f"http://{FIRST_PARTY_HOST}:{self.port}{LEAGUE_PATH}"
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == LEAGUE_PATH:
+                    body = PAGE_HTML.format(
+                        third_party=THIRD_PARTY_HOST, port=site.port, rows=page_rows(0),
+                        next_class='' if site.steps > 1 else 'disabled'
+                    )
+                    self.send('text/html', body)
+                elif self.path.startswith('/feed/'):
+                    step = int(self.path[len('/feed/'):].split('.')[0])
+                    time.sleep(site.feed_delay)
+                    self.send('application/json', json.dumps({
+                        'rows': page_rows(step), 'last': step + 1 >= site.steps
+                    }))
+                elif self.path in ASSETS:
+                    content_type, template, padding = ASSETS[self.path]
+                    self.send(content_type, template.format('x' * padding))
+                else:
+                    self.send_error(404)
+
+            def send(self, content_type, body):
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def localize(profile):
+    """A copy of a navigation profile that treats the fixture site as first-party"""
+    profile = copy.copy(profile)
+    if profile.first_party_hosts is not None:
+        profile.first_party_hosts = [FIRST_PARTY_HOST]
+    return profile
+
+async def walk_league(browser, site, profile):
+    """
+    Load the league page in a fresh context and page through it the way
+    the scraper does. Returns the context's Metrics and the first
+    participant read on each step.
+    """
+    metrics = Metrics()
+    context = await browser.new_context()
+    await profile.install(context, metrics)
+    page = await context.new_page()
+    first_rows = []
+    try:
+        with metrics.timer('navigate'):
+            await profile.goto(page, site.league_url, '.table-main', metrics)
+        while True:
+            first_rows.append(await page.inner_text(f'{ROW_SELECTOR} .participant-name'))
+            button = await page.query_selector('a[data-cy="pagination-next"]:not(.disabled)')
+            if not button:
+                break
+            with metrics.timer('paginate'):
+                await profile.paginate(page, button, metrics)
+    finally:
+        await context.close()
+    return metrics, first_rows
@@ -0,0 +1,87 @@
+from django.db.models import Q
+from core.models import League, Team, Bookmaker
+from core.odds_manager import OddsManager
+
+class IdentityMap:
+    """
+    Per-run cache of the leagues, teams and bookmakers the scraper has seen.
+
+    Everything is preloaded once at the start of a run, so steady-state
+    scraping resolves known entities without a query. Misses are inserted
+    in batches and remembered for the rest of the run.
+
+    Keys follow what the scraper extracts from a page:
+        leagues     oddsportal_path
+        teams       (name, league_id)
+        bookmakers  oddsportal_name
+
+    Leagues are identified by their path rather than their name, which is
+    not unique (several countries have a "Premier League"), and the path
+    is also what sportsbook.sharding assigns leagues to shards by.
+    """
+
+    def __init__(self):
+        self.leagues = {}
+        self.teams = {}
+        self.bookmakers = {}
+
+    def preload(self):
+        self.leagues = {l.oddsportal_path: l for l in League.objects.exclude(oddsportal_path='')}
+        self.teams = {(t.name, t.league_id): t for t in Team.objects.all()}
+        self.bookmakers = {b.oddsportal_name: b for b in Bookmaker.objects.all()}
+
+    def save_league(self, league_data):
+        """Create or update a league, skipping the write when nothing changed"""
+        key = league_data['oddsportal_path']
+        league = self.leagues.get(key)
+        if (league and league.name == league_data['name'] and league.sport == league_data['sport']
+                and league.country == league_data['country']):
+            return league
+
+        league, _ = League.objects.update_or_create(
+            oddsportal_path=key,
+            defaults={
+                'name': league_data['name'],
+                'sport': league_data['sport'],
+                'country': league_data['country']
+            }
+        )
+        self.leagues[key] = league
+        return league
+
+    def get_league(self, path):
+        if path not in self.leagues:
+            self.leagues[path] = League.objects.filter(oddsportal_path=path).first()
+        return self.leagues[path]
+
+    def get_teams(self, wanted):
+        """
+        Resolve (name, league, sport) triples to Teams, inserting all misses
+        with a single bulk_create.
+        """
+        missing = {}
+        for name, league, sport in wanted:
+            key = (name, league.id if league else None)
+            if key not in self.teams and key not in missing:
+                missing[key] = Team(name=name, league=league, sport=sport)
+
+        if missing:
+            created = Team.objects.bulk_create(missing.values())
+            if any(team.pk is None for team in created):
+                # Backends that cannot return ids from a bulk insert. IN
+                # never matches NULL, so teams without a league are looked
+                # up separately.
+                league_ids = {league_id for _, league_id in missing}
+                leagues = Q(league_id__in=league_ids - {None})
+                if None in league_ids:
+                    leagues |= Q(league__isnull=True)
+                created = Team.objects.filter(leagues, name__in={name for name, _ in missing})
+            self.teams.update({(t.name, t.league_id): t for t in created})
+
+        return self.teams
+
+    def get_bookmakers(self, names):
+        missing = set(names) - self.bookmakers.keys()
+        if missing:
+            self.bookmakers.update(OddsManager.get_bookmakers(missing))
+        return self.bookmakers
@@ -0,0 +1,56 @@
+import asyncio
+from django.core.management.base import BaseCommand, CommandError
+from sportsbook.fixture_site import FixtureSite, localize, walk_league
+from sportsbook.navigation import PROFILES, WAIT_STRATEGIES
+
+class Command(BaseCommand):
+    help = 'Compare navigation profiles on a local stand-in league page: load time, bytes and requests blocked'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Walks per profile; times are averaged')
+        parser.add_argument('--steps', type=int, default=3, help='Table pages on the stand-in league')
+        parser.add_argument(
+            '--feed-delay', type=float, default=0.3,
+            help='Seconds the next page of rows takes to arrive after a click'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from playwright.async_api import async_playwright
+        except ImportError:
+            raise CommandError('playwright is not installed')
+        asyncio.run(self.compare(async_playwright, options))
+
+    async def compare(self, async_playwright, options):
+        variants = [(name, None) for name in PROFILES]
+        variants += [('lean', wait) for wait in WAIT_STRATEGIES if wait != PROFILES['lean'].wait]
+        with FixtureSite(options['steps'], options['feed_delay']) as site:
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=True)
+                try:
+                    for name, wait in variants:
+                        profile = localize(PROFILES[name])
+                        if wait:
+                            profile.wait = wait
+                        await self.measure(browser, site, profile, f"{name}/{profile.wait}", options)
+                finally:
+                    await browser.close()
+
+    async def measure(self, browser, site, profile, label, options):
+        load = paginate = received = blocked = 0
+        correct = True
+        expected = [f"Home {step}-0" for step in range(options['steps'])]
+        for _ in range(options['repeat']):
+            metrics, first_rows = await walk_league(browser, site, profile)
+            load += metrics.timings['navigate']
+            paginate += metrics.timings['paginate']
+            received += metrics.counters['bytes_received']
+            blocked += metrics.counters['requests_blocked']
+            correct = correct and first_rows == expected
+        runs = options['repeat']
+        self.stdout.write(
+            f"{label:<20} load {load / runs * 1000:7.1f}ms, "
+            f"pagination {paginate / runs * 1000:7.1f}ms, "
+            f"{received / runs / 1024:6.1f} KiB received, {blocked / runs:.0f} requests blocked"
+            f"{'' if correct else ', READ A STALE PAGE'}"
+        )
@@ -0,0 +1,58 @@
+import asyncio
+import time
+from django.core.management.base import BaseCommand
+from sportsbook.management.commands.scrape_odds import add_scraper_arguments, scraper_options
+from sportsbook.oddsportal import run_scraper
+
+class Command(BaseCommand):
+    help = 'Replay a recorded scrape and report parsing and persistence throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('replay', metavar='DIR', help='Recording made with scrape_odds --record')
+        parser.add_argument(
+            '--repeat', type=int, default=1,
+            help='Number of passes over the recording'
+        )
+        add_scraper_arguments(parser)
+
+    def handle(self, *args, **options):
+        for run in range(1, options['repeat'] + 1):
+            start = time.perf_counter()
+            scraper = asyncio.run(run_scraper(
+                replay_dir=options['replay'],
+                **scraper_options(options)
+            ))
+            elapsed = time.perf_counter() - start
+            self.report(run, elapsed, scraper.metrics.as_dict())
+
+    def report(self, run, elapsed, metrics):
+        counters = metrics['counters']
+        rows = counters.get('rows_parsed', 0)
+        odds = counters.get('odds_written', 0)
+
+        self.stdout.write(f"Run {run}: {elapsed:.2f}s, {counters.get('pages', 0)} pages")
+        self.stdout.write(f"  rows parsed:  {rows} ({rows / elapsed:.1f}/s)")
+        self.stdout.write(f"  odds written: {odds} ({odds / elapsed:.1f}/s)")
+        self.stdout.write(
+            f"  odds rows:    {counters.get('odds_inserted', 0)} inserted, "
+            f"{counters.get('odds_updated', 0)} updated, "
+            f"{counters.get('odds_unchanged', 0)} unchanged"
+        )
+        if counters.get('feed_pages') or counters.get('feed_fallbacks'):
+            self.stdout.write(
+                f"  feeds:        {counters.get('feed_pages', 0)} pages from feeds, "
+                f"{counters.get('feed_fallbacks', 0)} DOM fallbacks"
+            )
+        self.stdout.write(
+            f"  unchanged:    {counters.get('pages_unchanged', 0)} pages, "
+            f"{counters.get('rows_unchanged', 0)} rows"
+        )
+        if metrics['errors']:
+            self.stdout.write('  errors:       ' + ', '.join(
+                f"{count} {name}" for name, count in sorted(metrics['errors'].items())
+            ))
+        # Stage times are summed over concurrent pages and the writer thread
+        for stage, timing in sorted(metrics['stages'].items()):
+            self.stdout.write(
+                f"  {stage:<16} {timing['seconds']:8.3f}s over {timing['calls']} calls"
+            )
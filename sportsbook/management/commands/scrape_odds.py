@@ -1,11 +1,136 @@
 import asyncio
-from django.core.management.base import BaseCommand
+import json
+from django.core.management.base import BaseCommand, CommandError
+from core.write_behind import start_write_behind, stop_write_behind
+from sportsbook.navigation import PROFILES, WAIT_STRATEGIES
 from sportsbook.oddsportal import run_scraper
+from sportsbook.parsing import PARSER_BACKENDS, DEFAULT_PARSER
+from sportsbook.sharding import Shard
+
+def add_scraper_arguments(parser):
+    """Options shared by scrape_odds and bench_scraper"""
+    parser.add_argument(
+        '-c', '--concurrency', type=int, default=1,
+        help='Number of browser pages scraping leagues in parallel'
+    )
+    parser.add_argument(
+        '--queue-size', type=int, default=1000,
+        help='Maximum number of scraped records waiting to be written'
+    )
+    parser.add_argument(
+        '--parser', choices=PARSER_BACKENDS, default=DEFAULT_PARSER,
+        help='HTML parser backend (lxml when installed, otherwise html.parser)'
+    )
+    parser.add_argument(
+        '--parse-workers', type=int, default=0,
+        help='Parse pages in this many worker processes instead of inline'
+    )
+    parser.add_argument(
+        '--navigation', choices=list(PROFILES), default='full',
+        help='Page profile: "full" loads everything, "lean" blocks non-essential resources '
+             'and third-party hosts (compare them with bench_navigation)'
+    )
+    parser.add_argument(
+        '--wait', choices=WAIT_STRATEGIES,
+        help="How to wait after pagination, overriding the profile's default"
+    )
+    parser.add_argument(
+        '--extract', choices=['dom', 'feed'], default='dom',
+        help='Read odds from the DOM, or from the JSON feeds behind it with the DOM as fallback'
+    )
+    parser.add_argument(
+        '--full', action='store_true',
+        help='Re-parse and re-write every page, ignoring fingerprints from earlier passes'
+    )
+
+def scraper_options(options):
+    return {
+        'concurrency': options['concurrency'],
+        'queue_size': options['queue_size'],
+        'parser': options['parser'],
+        'parse_workers': options['parse_workers'],
+        'incremental': not options['full'],
+        'navigation': options['navigation'],
+        'wait': options['wait'],
+        'extraction': options['extract'],
+    }
 
 class Command(BaseCommand):
     help = 'Scrape odds from OddsPortal'
 
+    def add_arguments(self, parser):
+        add_scraper_arguments(parser)
+        parser.add_argument(
+            '--daemon', action='store_true',
+            help='Keep running, refreshing each league on an adaptive schedule'
+        )
+        parser.add_argument(
+            '--discovery-interval', type=int, default=3600,
+            help='Seconds between re-reading the league lists in daemon mode'
+        )
+        parser.add_argument(
+            '--write-behind', action='store_true',
+            help='Publish live odds to the cache at once and write them to the database '
+                 'in journaled batches (replays any unflushed journal on start)'
+        )
+        parser.add_argument(
+            '--shard', metavar='K/N',
+            help='Only scrape the leagues owned by shard K of N (K counts from 0). '
+                 'Run one process per shard; see shard_plan before changing N'
+        )
+        parser.add_argument(
+            '--metrics-file', metavar='PATH',
+            help='Write metrics in Prometheus text format to PATH '
+                 '(refreshed every --metrics-interval seconds in daemon mode)'
+        )
+        parser.add_argument(
+            '--metrics-interval', type=int, default=15,
+            help='Seconds between metrics file refreshes in daemon mode'
+        )
+        source = parser.add_mutually_exclusive_group()
+        source.add_argument(
+            '--record', metavar='DIR',
+            help='Save the HTML of every page read to DIR for later replay'
+        )
+        source.add_argument(
+            '--replay', metavar='DIR',
+            help='Serve pages from a recording in DIR instead of the live site'
+        )
+
     def handle(self, *args, **options):
-        self.stdout.write('Starting odds scraper...')
-        asyncio.run(run_scraper())
-        self.stdout.write(self.style.SUCCESS('Successfully scraped odds'))
\ No newline at end of file
+        try:
+            shard = Shard.parse(options['shard']) if options['shard'] else None
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Starting odds scraper{f' (shard {shard})' if shard else ''}...")
+        if options['write_behind']:
+            try:
+                start_write_behind(shard=shard)
+            except RuntimeError as e:
+                raise CommandError(str(e))
+        try:
+            scraper = asyncio.run(run_scraper(
+                shard=shard,
+                record_dir=options['record'],
+                replay_dir=options['replay'],
+                daemon=options['daemon'],
+                discovery_interval=options['discovery_interval'],
+                metrics_file=options['metrics_file'],
+                metrics_interval=options['metrics_interval'],
+                **scraper_options(options)
+            ))
+        finally:
+            stop_write_behind()
+        counters = scraper.metrics.counters
+        self.stdout.write(
+            f"Odds rows: {counters['odds_inserted']} inserted, "
+            f"{counters['odds_updated']} updated, {counters['odds_unchanged']} unchanged"
+        )
+        self.stdout.write(
+            f"Navigation: {scraper.metrics.timings['navigate']:.1f}s loading pages, "
+            f"{counters['bytes_received'] / 1024:.0f} KiB received, "
+            f"{counters['requests_blocked']} requests blocked"
+        )
+        self.stdout.write(json.dumps(scraper.metrics.as_dict(), indent=2, sort_keys=True))
+        self.stdout.write(self.style.SUCCESS('Successfully scraped odds'))
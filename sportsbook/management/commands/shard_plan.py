@@ -0,0 +1,38 @@
+from collections import Counter
+from django.core.management.base import BaseCommand, CommandError
+from core.models import League
+from sportsbook.sharding import rebalance_plan, shard_for
+
+class Command(BaseCommand):
+    help = 'Show how leagues are spread over scrape_odds shards and which move when the shard count changes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('shards', type=int, help='Current number of shards')
+        parser.add_argument(
+            '--to', type=int, metavar='N',
+            help='List the leagues that change shard when moving to N shards'
+        )
+
+    def handle(self, *args, **options):
+        old_count, new_count = options['shards'], options['to']
+        if old_count < 1 or (new_count is not None and new_count < 1):
+            raise CommandError('Shard counts must be at least 1')
+
+        paths = list(
+            League.objects.exclude(oddsportal_path='').values_list('oddsportal_path', flat=True)
+        )
+        self._print_spread(paths, old_count)
+        if new_count is None:
+            return
+
+        self._print_spread(paths, new_count)
+        moves = rebalance_plan(paths, old_count, new_count)
+        self.stdout.write(f"{len(moves)} of {len(paths)} leagues change shard:")
+        for path, (old, new) in sorted(moves.items()):
+            self.stdout.write(f"  {path}: {old}/{old_count} -> {new}/{new_count}")
+
+    def _print_spread(self, paths, count):
+        spread = Counter(shard_for(path, count) for path in paths)
+        self.stdout.write(f"{count} shards: " + ', '.join(
+            f"{shard}/{count}={spread[shard]}" for shard in range(count)
+        ))
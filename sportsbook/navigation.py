@@ -0,0 +1,151 @@
+"""
+Navigation profiles for scraper pages.
+
+A profile decides which requests a browser context lets through and how a
+page waits after navigation and pagination. The lean profile aborts
+resource types the scraper never reads and requests to third-party hosts
+(ads, trackers, widgets). After a pagination click it waits for the odds
+table to change instead of waiting for the network to go idle.
+
+The full profile stays the scraper's default until lean has been checked
+against the live site; sportsbook.fixture_site serves a local stand-in
+for comparing the two (see bench_navigation).
+"""
+from urllib.parse import urlsplit
+from playwright.async_api import Error as PlaywrightError
+
+ROW_SELECTOR = '.table-main tr.deactivate'
+
+WAIT_STRATEGIES = ['networkidle', 'selector', 'dom']
+
+# Resolves window.__oddsTableChanged once the odds table (or its container)
+# has been mutated and then stayed quiet for `settle` ms, or after `timeout` ms.
+WATCH_TABLE_JS = """
+([timeout, settle]) => {
+    window.__oddsTableChanged = new Promise(resolve => {
+        const table = document.querySelector('.table-main');
+        if (!table) return resolve(false);
+        let quiet = null;
+        const observer = new MutationObserver(() => {
+            clearTimeout(quiet);
+            quiet = setTimeout(() => { observer.disconnect(); resolve(true); }, settle);
+        });
+        observer.observe(table.parentNode || table, {childList: true, subtree: true, characterData: true});
+        setTimeout(() => { observer.disconnect(); resolve(false); }, timeout);
+    });
+}
+"""
+
+# Remember the first odds row, so a later wait can tell when the next page's
+# rows have replaced it (the old rows stay in the DOM until then)
+MARK_FIRST_ROW_JS = """
+(selector) => {
+    const row = document.querySelector(selector);
+    window.__oddsFirstRow = row && {row, text: row.textContent};
+}
+"""
+
+ROW_REPLACED_JS = """
+(selector) => {
+    const row = document.querySelector(selector);
+    const seen = window.__oddsFirstRow;
+    return !!row && (!seen || row !== seen.row || row.textContent !== seen.text);
+}
+"""
+
+class NavigationProfile:
+    def __init__(self, blocked_resource_types=(), first_party_hosts=None,
+                 wait='networkidle', wait_until='load', timeout=15000, settle=100):
+        self.blocked_resource_types = set(blocked_resource_types)
+        # None lets every host through
+        self.first_party_hosts = first_party_hosts
+        self.wait = wait
+        self.wait_until = wait_until
+        self.timeout = timeout
+        self.settle = settle
+
+    @property
+    def blocks_requests(self):
+        return bool(self.blocked_resource_types) or self.first_party_hosts is not None
+
+    async def install(self, context, metrics):
+        """Route the context's requests through the profile and count traffic"""
+        def on_response(response):
+            metrics.incr('responses')
+            metrics.incr('bytes_received', int(response.headers.get('content-length') or 0))
+
+        async def handle_route(route):
+            request = route.request
+            if self.is_blocked(request.resource_type, request.url):
+                metrics.incr('requests_blocked')
+                await route.abort()
+            else:
+                await route.continue_()
+
+        context.on('response', on_response)
+        if self.blocks_requests:
+            await context.route('**/*', handle_route)
+
+    def is_blocked(self, resource_type, url):
+        if resource_type in self.blocked_resource_types:
+            return True
+        if self.first_party_hosts is None:
+            return False
+        host = urlsplit(url).hostname or ''
+        return not any(
+            host == allowed or host.endswith(f'.{allowed}')
+            for allowed in self.first_party_hosts
+        )
+
+    async def goto(self, page, url, selector, metrics):
+        with metrics.timer('page_load'):
+            await page.goto(url, wait_until=self.wait_until)
+        with metrics.timer('wait_selector'):
+            await page.wait_for_selector(selector, timeout=self.timeout)
+
+    async def paginate(self, page, button, metrics):
+        """Click a pagination button and wait for the next page of rows"""
+        if self.wait == 'dom':
+            await page.evaluate(MARK_FIRST_ROW_JS, ROW_SELECTOR)
+            await page.evaluate(WATCH_TABLE_JS, [self.timeout, self.settle])
+            await button.click()
+            try:
+                with metrics.timer('wait_dom'):
+                    changed = await page.evaluate('() => window.__oddsTableChanged')
+            except PlaywrightError:
+                # The click navigated away and took the watcher with it
+                with metrics.timer('wait_selector'):
+                    await page.wait_for_selector(ROW_SELECTOR, timeout=self.timeout)
+                return
+            if not changed:
+                # The watcher timed out or found no table. Go on only once
+                # the first row has been replaced, otherwise the old page
+                # would be read again as the next one; a page that never
+                # changes raises a TimeoutError and fails the league.
+                metrics.incr('wait_timeout')
+                with metrics.timer('wait_selector'):
+                    await page.wait_for_function(ROW_REPLACED_JS, arg=ROW_SELECTOR, timeout=self.timeout)
+        elif self.wait == 'selector':
+            await page.evaluate(MARK_FIRST_ROW_JS, ROW_SELECTOR)
+            await button.click()
+            with metrics.timer('wait_selector'):
+                try:
+                    await page.wait_for_function(ROW_REPLACED_JS, arg=ROW_SELECTOR, timeout=self.timeout)
+                except PlaywrightError:
+                    # The click navigated away while the check was running
+                    await page.wait_for_selector(ROW_SELECTOR, timeout=self.timeout)
+        else:
+            await button.click()
+            with metrics.timer('wait_network'):
+                await page.wait_for_load_state('networkidle')
+
+PROFILES = {
+    # Browser defaults: every resource, wait for the network to go idle
+    'full': NavigationProfile(),
+    'lean': NavigationProfile(
+        blocked_resource_types=['image', 'media', 'font', 'stylesheet', 'texttrack', 'manifest'],
+        first_party_hosts=['oddsportal.com'],
+        wait='dom',
+        wait_until='domcontentloaded'
+    ),
+}
@@ -1,64 +1,209 @@
 import asyncio
+import copy
+import multiprocessing
 import re
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
-from django.utils import timezone
-from core.models import Match, League, Team
-from core.odds_manager import OddsManager
+from core.metrics import Metrics
+from sportsbook.feeds import FeedCapture, decode_feeds, load_feed_rows
+from sportsbook.fingerprints import FingerprintStore, fingerprint, page_fingerprint
+from sportsbook.identity import IdentityMap
+from sportsbook.navigation import PROFILES
+from sportsbook.parsing import MARKET_MAPPING, DEFAULT_PARSER, make_soup, parse_league_page
+from sportsbook.pipeline import PersistenceWriter
+from sportsbook.replay import PageRecorder, ReplayBrowser
+from sportsbook.scheduler import RefreshScheduler
 from betting.market_type import *
 
 class OddsPortalScraper:
-    MARKET_MAPPING = {
-        'football': {
-            '1x2': '1x2',
-            'asian-handicap': ('handicap', lambda x: float(re.search(r'([+-]?\d+\.?\d*)', x).group(1))),
-            'over-under': ('over_under', lambda x: float(re.search(r'(\d+\.?\d*)', x).group(1))),
-            'correct-score': 'correct_score',
-            'both-teams-to-score': 'btts',
-            'half-time/full-time': 'half_time_full_time',
-            'total-goals': 'total_goals'
-        },
-        # ... keep existing market mappings ...
-    }
-
-    def __init__(self):
+    MARKET_MAPPING = MARKET_MAPPING
+
+    def __init__(self, concurrency=1, queue_size=1000, parser=None, parse_workers=0,
+                 record_dir=None, replay_dir=None, incremental=True,
+                 navigation='full', wait=None, daemon=False, discovery_interval=3600,
+                 extraction='dom', metrics_file=None, metrics_interval=15, shard=None):
         self.base_url = "https://www.oddsportal.com"
         self.sport_paths = {
             'football': 'soccer',
             'basketball': 'basketball',
             'hockey': 'hockey'
         }
-        self.odds_manager = OddsManager()
+        self.queue_size = queue_size
+        # Leagues, teams and bookmakers are preloaded once per run by the writer
+        self.identity = IdentityMap()
+        # Number of pages working through leagues at the same time
+        self.concurrency = max(1, concurrency)
+        # BeautifulSoup tree builder and number of parsing processes (0 parses inline)
+        self.parser = parser or DEFAULT_PARSER
+        self.parse_workers = parse_workers
+        self.executor = None
+        # Save every page read to record_dir, or serve pages from replay_dir
+        self.recorder = PageRecorder(record_dir) if record_dir else None
+        self.replay_dir = replay_dir
+        self.metrics = Metrics()
+        # Prometheus text export, rewritten every metrics_interval seconds in daemon mode
+        self.metrics_file = metrics_file
+        self.metrics_interval = metrics_interval
+        # Skip league pages and rows unchanged since the last persisted pass
+        self.fingerprints = FingerprintStore() if incremental else None
+        # Request blocking and wait strategy for every page; `wait` overrides the profile's
+        self.navigation = copy.copy(PROFILES[navigation])
+        if wait:
+            self.navigation.wait = wait
+        # Keep the browser warm and refresh leagues on an adaptive schedule
+        self.daemon = daemon
+        self.discovery_interval = discovery_interval
+        # Only scrape (and write) the leagues this Shard owns; None takes them all
+        self.shard = shard
+        # 'feed' reads odds from the page's JSON responses, falling back to the DOM
+        self.extraction = extraction
 
     async def scrape_matches(self):
+        if self.replay_dir:
+            await self._scrape(ReplayBrowser(self.replay_dir))
+            return
+
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
+            await self._scrape(browser)
+
+    async def _scrape(self, browser):
+        context = await browser.new_context()
+        await self.navigation.install(context, self.metrics)
+        if self.parse_workers:
+            # Workers start lazily on the first submit, by which time the writer
+            # thread and asyncio's thread pool may hold locks a forked child would
+            # inherit; forkserver children come from a clean single-threaded process
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.parse_workers,
+                mp_context=multiprocessing.get_context('forkserver')
+            )
+        self.writer = PersistenceWriter(
+            maxsize=self.queue_size,
+            identity=self.identity,
+            metrics=self.metrics,
+            fingerprints=self.fingerprints
+        )
+        self.writer.start()
 
-            try:
-                for sport_key, sport_path in self.sport_paths.items():
-                    page = await context.new_page()
-                    await self._process_sport(page, sport_key, sport_path)
-                    await page.close()
-            finally:
-                await browser.close()
+        try:
+            if self.daemon:
+                await self._run_daemon(context)
+            else:
+                await self._process_leagues(context, await self._discover_leagues(context))
+        finally:
+            await self.writer.close()
+            if self.executor:
+                self.executor.shutdown()
+            if self.recorder:
+                self.recorder.save()
+            await browser.close()
+            self._export_metrics()
+
+    async def _discover_leagues(self, context):
+        leagues = []
+        for sport_key, sport_path in self.sport_paths.items():
+            page = await context.new_page()
+            leagues.extend(await self._process_sport(page, sport_key, sport_path))
+            await page.close()
+        return leagues
+
+    async def _run_daemon(self, context):
+        """Refresh leagues forever, rediscovering them every discovery_interval"""
+        scheduler = RefreshScheduler()
+        workers = [
+            asyncio.create_task(self._daemon_worker(context, scheduler))
+            for _ in range(self.concurrency)
+        ]
+        if self.metrics_file:
+            workers.append(asyncio.create_task(self._metrics_exporter(scheduler)))
+        try:
+            while True:
+                for league, sport in await self._discover_leagues(context):
+                    scheduler.add(league, sport)
+                await asyncio.sleep(self.discovery_interval)
+                # Matches that finished since the last discovery are never written again
+                await self.writer.put(('prune', None))
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _metrics_exporter(self, scheduler):
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            self.metrics.gauge('leagues_scheduled', len(scheduler))
+            await asyncio.to_thread(self._export_metrics)
+
+    def _export_metrics(self):
+        if not self.metrics_file:
+            return
+        self.metrics.gauge('writer_queue_depth', self.writer.queue.qsize())
+        try:
+            self.metrics.write_prometheus(self.metrics_file, prefix='odds_scraper')
+        except OSError as e:
+            print(f"Error writing metrics to {self.metrics_file}: {str(e)}")
+
+    async def _daemon_worker(self, context, scheduler):
+        page = await context.new_page()
+        capture = self._feed_capture(page)
+        try:
+            while True:
+                league, sport = await scheduler.next_due()
+                summary = await self._process_league(page, league, sport, capture)
+                scheduler.reschedule(league, summary)
+        finally:
+            await page.close()
 
     async def _process_sport(self, page, sport_key, sport_path):
+        """Collect the leagues listed on a sport's index page"""
         try:
-            await page.goto(f"{self.base_url}/{sport_path}/")
-            await page.wait_for_selector('.main-menu-text', timeout=15000)
-            
+            await self._goto(page, f"{self.base_url}/{sport_path}/", '.main-menu-text')
+
             leagues = await self._get_leagues(page, sport_key)
-            for league in leagues:
-                await self._process_league(page, league, sport_key)
+            return [(league, sport_key) for league in leagues]
 
         except Exception as e:
+            self.metrics.error(e)
             print(f"Error scraping {sport_key}: {str(e)}")
+            return []
+
+    async def _process_leagues(self, context, leagues):
+        """Spread leagues over a pool of at most `concurrency` pages"""
+        queue = asyncio.Queue()
+        for item in leagues:
+            queue.put_nowait(item)
+
+        workers = min(self.concurrency, len(leagues))
+        await asyncio.gather(*(
+            self._league_worker(context, queue) for _ in range(workers)
+        ))
+
+    async def _league_worker(self, context, queue):
+        page = await context.new_page()
+        capture = self._feed_capture(page)
+        try:
+            while True:
+                try:
+                    league, sport = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                await self._process_league(page, league, sport, capture)
+        finally:
+            await page.close()
+
+    def _feed_capture(self, page):
+        return FeedCapture(page) if self.extraction == 'feed' else None
+
+    async def _goto(self, page, url, selector):
+        if self.recorder:
+            self.recorder.start(url)
+        with self.metrics.timer('navigate'):
+            await self.navigation.goto(page, url, selector, self.metrics)
 
     async def _get_leagues(self, page, sport):
-        content = await page.content()
-        soup = BeautifulSoup(content, 'html.parser')
+        content = await self._read_page(page, f"{self.base_url}/{self.sport_paths[sport]}/", 0)
+        soup = make_soup(content, self.parser)
         leagues = []
 
         for link in soup.select('.main-menu-text a[href]'):
@@ -68,182 +213,143 @@ class OddsPortalScraper:
 
             league_name = re.sub(r'\s+', ' ', link.text.strip())
             country, league_path = self._extract_league_info(url)
-            
-            league, _ = League.objects.update_or_create(
-                name=league_name,
-                sport=sport,
-                defaults={
-                    'oddsportal_path': league_path,
-                    'country': country
-                }
-            )
+            if self.shard and not self.shard.owns(league_path):
+                self.metrics.incr('leagues_other_shards')
+                continue
+
+            league = {
+                'name': league_name,
+                'sport': sport,
+                'oddsportal_path': league_path,
+                'country': country
+            }
+            await self.writer.put(('league', league))
             leagues.append(league)
         return leagues
 
-    async def _process_league(self, page, league, sport):
+    async def _process_league(self, page, league, sport, capture=None):
+        """
+        Scrape every page of a league. Returns a summary of what was seen
+        for the refresh scheduler, or None when the league failed.
+        """
+        summary = {'rows': 0, 'changed': 0, 'live': 0, 'kickoff': None}
         try:
-            url = f"{self.base_url}{league.oddsportal_path}/"
-            await page.goto(url)
-            await page.wait_for_selector('.table-main', timeout=15000)
-            
+            url = f"{self.base_url}{league['oddsportal_path']}/"
+            if capture:
+                capture.begin(url, 0)
+            await self._goto(page, url, '.table-main')
+
+            step = 0
             while True:
-                content = await page.content()
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                for row in soup.select('.table-main tr.deactivate'):
-                    await self._process_match_row(row, league, sport)
-                
+                total, rows = await self._process_step(page, url, step, league, sport, capture)
+                self._summarise(summary, total, rows)
+
                 next_btn = await page.query_selector('a[data-cy="pagination-next"]:not(.disabled)')
                 if not next_btn:
                     break
-                
-                await next_btn.click()
-                await page.wait_for_load_state('networkidle')
+
+                step += 1
+                if capture:
+                    capture.begin(url, step)
+                with self.metrics.timer('paginate'):
+                    await self.navigation.paginate(page, next_btn, self.metrics)
 
         except Exception as e:
-            print(f"Error processing league {league.name}: {str(e)}")
+            self.metrics.error(e)
+            print(f"Error processing league {league['name']}: {str(e)}")
+            return None
+        return summary
 
-    async def _process_match_row(self, row, league, sport):
-        try:
-            match_data = self._extract_match_data(row, league, sport)
-            if not match_data:
-                return
-
-            match = await self._get_or_create_match(match_data)
-            if not match:
-                return
-
-            # Process pre-match odds
-            odds_data = self._extract_odds_data(row)
-            if odds_data:
-                for market, bookmaker_odds in odds_data.items():
-                    for bookmaker, odds in bookmaker_odds.items():
-                        self.odds_manager.save_odds(
-                            match_id=match.id,
-                            market=market,
-                            bookmaker_name=bookmaker,
-                            odds_data=odds,
-                            is_live=match.status == 'live'
-                        )
+    def _summarise(self, summary, total, rows):
+        summary['rows'] += total
+        summary['changed'] += len(rows)
+        for match_data, _ in rows:
+            if match_data['status'] == 'live':
+                summary['live'] += 1
+            kickoff = match_data['kickoff']
+            if summary['kickoff'] is None or kickoff < summary['kickoff']:
+                summary['kickoff'] = kickoff
 
-        except Exception as e:
-            print(f"Error processing match row: {str(e)}")
+    async def _read_page(self, page, url, step):
+        """Serialise the current page, recording it when a recorder is set"""
+        with self.metrics.timer('content'):
+            content = await page.content()
+        self.metrics.incr('pages')
+        if self.recorder:
+            self.recorder.record(url, step, content)
+        return content
 
-    def _extract_match_data(self, row, league, sport):
-        try:
-            team_cell = row.select_one('.table-participant')
-            teams = [t.strip() for t in team_cell.get_text(separator='|').split('|') if t.strip()]
-            if len(teams) != 2:
-                return None
-
-            time_str = row.select_one('.datet').get_text(strip=True)
-            match_time = self._parse_datetime(time_str)
-            
-            return {
-                'home_team_name': teams[0],
-                'away_team_name': teams[1],
-                'league': league,
-                'sport': sport,
-                'match_date': match_time.date(),
-                'match_time': match_time.time(),
-                'status': 'live' if 'live' in row.get('class', []) else 'scheduled'
-            }
-        except Exception:
-            return None
+    async def _process_step(self, page, url, step, league, sport, capture):
+        """Extract one pagination step from its feeds if possible, else from the DOM"""
+        if capture:
+            feeds = await capture.drain(url, step)
+            if self.recorder and feeds:
+                self.recorder.record_feeds(url, step, feeds)
+            feed_rows = load_feed_rows(feeds)
+            if feed_rows:
+                self.metrics.incr('feed_pages')
+                return await self._process_page(
+                    url, step,
+                    fingerprint(''.join(body for _, body in feeds)),
+                    lambda skip_rows: self._decode_feeds(feed_rows, league, sport, skip_rows)
+                )
+            self.metrics.incr('feed_fallbacks')
 
-    async def _get_or_create_match(self, match_data):
-        try:
-            home_team, _ = Team.objects.get_or_create(
-                name=match_data['home_team_name'],
-                league=match_data['league'],
-                defaults={'sport': match_data['sport']}
-            )
-            away_team, _ = Team.objects.get_or_create(
-                name=match_data['away_team_name'],
-                league=match_data['league'],
-                defaults={'sport': match_data['sport']}
-            )
+        content = await self._read_page(page, url, step)
+        return await self._process_page(
+            url, step,
+            page_fingerprint(content),
+            lambda skip_rows: self._parse_page(content, league, sport, skip_rows)
+        )
 
-            match, _ = Match.objects.update_or_create(
-                home_team=home_team,
-                away_team=away_team,
-                match_date=match_data['match_date'],
-                defaults={
-                    'league': match_data['league'],
-                    'sport': match_data['sport'],
-                    'match_time': match_data['match_time'],
-                    'status': match_data['status']
-                }
-            )
-            return match
-        except Exception as e:
-            print(f"Error creating match: {str(e)}")
-            return None
+    async def _process_page(self, url, step, page_hash, parse):
+        """
+        Extract one page of a league and queue its changed rows for the writer.
 
-    def _extract_odds_data(self, row):
-        odds_data = {}
-        
-        for odds_cell in row.select('.odds-nowrp'):
-            market = odds_cell.get('data-market', '').lower().replace(' ', '-')
-            bookmaker = odds_cell.get('data-bk', 'unknown')
-            
-            market_info = self.MARKET_MAPPING.get(odds_cell.get('data-sport'), {}).get(market)
-            if not market_info:
-                continue
+        `parse(skip_rows)` is awaited to get the page's records and row
+        fingerprints. Returns the number of rows on the page and the rows
+        that were extracted.
+        """
+        if not self.fingerprints:
+            with self.metrics.timer('parse'):
+                rows, _ = await parse(())
+            self.metrics.incr('rows_parsed', len(rows))
+            await self.writer.put(('matches', {'rows': rows, 'fingerprint': None}))
+            return len(rows), rows
 
-            if isinstance(market_info, tuple):
-                market_type, param_extractor = market_info
-                parameter = param_extractor(odds_cell.get_text())
-            else:
-                market_type = market_info
-                parameter = None
-
-            odds_values = self._parse_odds_values(odds_cell)
-            if odds_values:
-                if market_type not in odds_data:
-                    odds_data[market_type] = {}
-                
-                odds_data[market_type][bookmaker] = {
-                    **odds_values,
-                    'parameter': parameter
-                }
-
-        return odds_data
-
-    def _parse_odds_values(self, cell):
-        values = []
-        for span in cell.select('span'):
-            try:
-                values.append(float(span.text.strip()))
-            except (ValueError, TypeError):
-                continue
+        key = self.fingerprints.key(url, step)
+        previous = await asyncio.to_thread(self.fingerprints.get, key) or {}
+        if previous.get('page') == page_hash:
+            self.metrics.incr('pages_unchanged')
+            return len(previous['rows']), []
 
-        if not values:
-            return None
+        skip_rows = set(previous.get('rows', ()))
+        with self.metrics.timer('parse'):
+            rows, row_hashes = await parse(skip_rows)
+        unchanged = sum(1 for row_hash in row_hashes if row_hash in skip_rows)
+        self.metrics.incr('rows_parsed', len(rows))
+        self.metrics.incr('rows_unchanged', unchanged)
+        # Rows the parser had to drop, e.g. missing teams or a broken cell
+        self.metrics.incr('rows_failed', len(row_hashes) - unchanged - len(rows))
+        await self.writer.put(('matches', {
+            'rows': rows,
+            'fingerprint': (key, {'page': page_hash, 'rows': row_hashes})
+        }))
+        return len(row_hashes), rows
 
-        if len(values) == 3:
-            return {'home': values[0], 'draw': values[1], 'away': values[2]}
-        elif len(values) == 2:
-            return {'home': values[0], 'away': values[1]}
-        else:
-            return {'home': values[0]}
+    async def _parse_page(self, content, league, sport, skip_rows=()):
+        """Parse a league page inline or on the process pool"""
+        if not self.executor:
+            return parse_league_page(content, league, sport, self.parser, skip_rows)
 
-    def _parse_datetime(self, time_str):
-        try:
-            date_part, time_part = re.match(r'(\w+)\s+(\d+:\d+)', time_str).groups()
-            base_date = timezone.now().date()
-            
-            if date_part.lower() == 'tomorrow':
-                base_date += timedelta(days=1)
-            
-            return timezone.make_aware(
-                datetime.combine(
-                    base_date,
-                    datetime.strptime(time_part, "%H:%M").time()
-                )
-            )
-        except Exception:
-            return timezone.now()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, parse_league_page, content, league, sport, self.parser, skip_rows
+        )
+
+    async def _decode_feeds(self, feed_rows, league, sport, skip_rows=()):
+        # JSON is cheap to decode, so this stays on the event loop
+        return decode_feeds(feed_rows, league, sport, skip_rows)
 
     def _extract_league_info(self, url):
         parts = url.strip('/').split('/')
@@ -253,6 +359,7 @@ class OddsPortalScraper:
             return country, f"/{league_path}"
         return 'Unknown', url
 
-async def run_scraper():
-    scraper = OddsPortalScraper()
-    await scraper.scrape_matches()
\ No newline at end of file
+async def run_scraper(**options):
+    scraper = OddsPortalScraper(**options)
+    await scraper.scrape_matches()
+    return scraper
\ No newline at end of file
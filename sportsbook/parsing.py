@@ -0,0 +1,160 @@
+"""
+HTML parsing for OddsPortal pages.
+
+Everything here is plain module-level functions that take page HTML and
+return plain dict/tuple records, so parsing can run either inline or in
+a ProcessPoolExecutor while the browser keeps navigating.
+"""
+import re
+from datetime import datetime, timedelta
+from bs4 import BeautifulSoup
+from django.utils import timezone
+from sportsbook.fingerprints import fingerprint, record_fingerprint
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+
+PARSER_BACKENDS = ['lxml', 'html.parser']
+
+MARKET_MAPPING = {
+    'football': {
+        '1x2': '1x2',
+        'asian-handicap': ('handicap', lambda x: float(re.search(r'([+-]?\d+\.?\d*)', x).group(1))),
+        'over-under': ('over_under', lambda x: float(re.search(r'(\d+\.?\d*)', x).group(1))),
+        'correct-score': 'correct_score',
+        'both-teams-to-score': 'btts',
+        'half-time/full-time': 'half_time_full_time',
+        'total-goals': 'total_goals'
+    },
+    # ... keep existing market mappings ...
+}
+
+def make_soup(content, parser=None):
+    return BeautifulSoup(content, parser or DEFAULT_PARSER)
+
+def parse_league_page(content, league, sport, parser=None, skip_rows=()):
+    """
+    Parse a league page into (match_data, odds_data) records for the writer.
+
+    Returns the records together with the fingerprint of every row on the
+    page. Rows are fingerprinted on their parsed fields, so a relative
+    kick-off ("Today 15:00") changes with the date it resolves to; rows
+    whose fingerprint is in `skip_rows` are left out of the records.
+    """
+    soup = make_soup(content, parser)
+    rows, row_hashes = [], []
+    for row in soup.select('.table-main tr.deactivate'):
+        record = parse_match_row(row, league, sport)
+        # Rows that fail to parse keep a hash of their markup
+        row_hash = record_fingerprint(record) if record else fingerprint(str(row))
+        row_hashes.append(row_hash)
+        if record and row_hash not in skip_rows:
+            rows.append(record)
+    return rows, row_hashes
+
+def parse_match_row(row, league, sport):
+    try:
+        match_data = extract_match_data(row, league, sport)
+        if not match_data:
+            return None
+
+        return match_data, extract_odds_data(row)
+
+    except Exception as e:
+        print(f"Error processing match row: {str(e)}")
+        return None
+
+def extract_match_data(row, league, sport):
+    try:
+        team_cell = row.select_one('.table-participant')
+        teams = [t.strip() for t in team_cell.get_text(separator='|').split('|') if t.strip()]
+        if len(teams) != 2:
+            return None
+
+        time_str = row.select_one('.datet').get_text(strip=True)
+        match_time = parse_datetime(time_str)
+
+        return {
+            'home_team_name': teams[0],
+            'away_team_name': teams[1],
+            'league': league['oddsportal_path'],
+            'sport': sport,
+            'match_date': match_time.date(),
+            'match_time': match_time.time(),
+            'kickoff': match_time,
+            'status': 'live' if 'live' in row.get('class', []) else 'scheduled'
+        }
+    except Exception:
+        return None
+
+def extract_odds_data(row):
+    odds_data = {}
+
+    for odds_cell in row.select('.odds-nowrp'):
+        market = odds_cell.get('data-market', '').lower().replace(' ', '-')
+        bookmaker = odds_cell.get('data-bk', 'unknown')
+
+        market_info = MARKET_MAPPING.get(odds_cell.get('data-sport'), {}).get(market)
+        if not market_info:
+            continue
+
+        if isinstance(market_info, tuple):
+            market_type, param_extractor = market_info
+            parameter = param_extractor(odds_cell.get_text())
+        else:
+            market_type = market_info
+            parameter = None
+
+        odds_values = parse_odds_values(odds_cell)
+        if odds_values:
+            if market_type not in odds_data:
+                odds_data[market_type] = {}
+
+            odds_data[market_type][bookmaker] = {
+                **odds_values,
+                'parameter': parameter
+            }
+
+    return odds_data
+
+def parse_odds_values(cell):
+    values = []
+    for span in cell.select('span'):
+        try:
+            values.append(float(span.text.strip()))
+        except (ValueError, TypeError):
+            continue
+
+    return odds_values_from_list(values)
+
+def odds_values_from_list(values):
+    """Name a row of prices the way the writer expects: home/draw/away"""
+    if not values:
+        return None
+
+    if len(values) == 3:
+        return {'home': values[0], 'draw': values[1], 'away': values[2]}
+    elif len(values) == 2:
+        return {'home': values[0], 'away': values[1]}
+    else:
+        return {'home': values[0]}
+
+def parse_datetime(time_str):
+    try:
+        date_part, time_part = re.match(r'(\w+)\s+(\d+:\d+)', time_str).groups()
+        base_date = timezone.now().date()
+
+        if date_part.lower() == 'tomorrow':
+            base_date += timedelta(days=1)
+
+        return timezone.make_aware(
+            datetime.combine(
+                base_date,
+                datetime.strptime(time_part, "%H:%M").time()
+            )
+        )
+    except Exception:
+        return timezone.now()
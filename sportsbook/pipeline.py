@@ -0,0 +1,166 @@
+import asyncio
+import queue
+import threading
+from django.db import connection
+from core.metrics import Metrics
+from core.models import Match
+from core.odds_manager import OddsManager
+from sportsbook.identity import IdentityMap
+
+_STOP = object()
+
+class PersistenceWriter:
+    """
+    Persistence stage of the scraper.
+
+    The async scraping side emits plain records into a bounded queue and
+    a dedicated thread drains it into the database, so browser pages keep
+    loading while the ORM catches up. A full queue suspends the producing
+    coroutine, which gives natural backpressure.
+
+    Records are tuples:
+        ('league', league_data)   -- upsert a league discovered on a sport page
+        ('matches', page)         -- one page: {'rows': [(match_data, odds_data), ...],
+                                     'fingerprint': (key, entry) or None}
+        ('prune', None)           -- forget rows of matches no longer current
+
+    A page's fingerprint is committed only after all of its rows were saved.
+    """
+
+    def __init__(self, maxsize=1000, identity=None, metrics=None, fingerprints=None):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.odds_manager = OddsManager()
+        self.identity = identity or IdentityMap()
+        self.metrics = metrics or Metrics()
+        self.fingerprints = fingerprints
+        # Last written values of every odds row seen this run
+        self.odds_snapshot = {}
+        self._thread = threading.Thread(target=self._run, name='odds-writer', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    async def put(self, record):
+        """Queue a record, waiting for room when the writer falls behind"""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.metrics.timer('queue_wait'):
+                await asyncio.to_thread(self.queue.put, record)
+
+    async def close(self):
+        """Flush everything queued so far and stop the writer thread"""
+        await self.put(_STOP)
+        await asyncio.to_thread(self._thread.join)
+
+    def _run(self):
+        try:
+            self.identity.preload()
+            while True:
+                record = self.queue.get()
+                if record is _STOP:
+                    break
+                try:
+                    with self.metrics.timer('write'):
+                        self._write(record)
+                except Exception as e:
+                    self.metrics.error(e)
+                    print(f"Error writing {record[0]} record: {str(e)}")
+        finally:
+            connection.close()
+
+    def _write(self, record):
+        kind, payload = record
+        if kind == 'league':
+            self.identity.save_league(payload)
+        elif kind == 'matches':
+            saved = self._save_page(payload['rows'])
+            if saved and payload['fingerprint'] and self.fingerprints:
+                self.fingerprints.commit(*payload['fingerprint'])
+        elif kind == 'prune':
+            self._prune()
+
+    def _prune(self):
+        """
+        Drop snapshot rows of finished, deleted and past matches, so a
+        daemon's snapshot only holds what it is still scraping
+        """
+        current = self.odds_manager.current_match_ids({key[0] for key in self.odds_snapshot})
+        stale = [key for key in self.odds_snapshot if key[0] not in current]
+        for key in stale:
+            del self.odds_snapshot[key]
+        self.metrics.incr('snapshot_pruned', len(stale))
+        self.metrics.gauge('snapshot_rows', len(self.odds_snapshot))
+        if self.odds_manager.write_behind:
+            self.odds_manager.write_behind.prune()
+
+    def _save_page(self, rows):
+        """
+        Save a page of matches and write all of their odds in one batch.
+        Returns False when any match on the page could not be saved.
+        """
+        saved = True
+        teams = self.identity.get_teams(
+            (name, self.identity.get_league(match_data['league']), match_data['sport'])
+            for match_data, _ in rows
+            for name in (match_data['home_team_name'], match_data['away_team_name'])
+        )
+
+        odds_records = []
+        for match_data, odds_data in rows:
+            with self.metrics.timer('match_save'):
+                match = self._get_or_create_match(match_data, teams)
+            if not match:
+                saved = False
+                continue
+
+            for market, bookmaker_odds in odds_data.items():
+                for bookmaker, odds in bookmaker_odds.items():
+                    odds_records.append({
+                        'match_id': match.id,
+                        'market': market,
+                        'bookmaker_name': bookmaker,
+                        'odds_data': odds,
+                        'is_live': match.status == 'live'
+                    })
+
+        write_behind = self.odds_manager.write_behind
+        if write_behind:
+            live = [r for r in odds_records if r['is_live']]
+            odds_records = [r for r in odds_records if not r['is_live']]
+            if live:
+                write_behind.submit(live)
+                self.metrics.incr('odds_deferred', len(live))
+
+        bookmakers = self.identity.get_bookmakers(r['bookmaker_name'] for r in odds_records)
+        stats = self.odds_manager.save_odds_bulk(
+            odds_records, bookmakers=bookmakers, snapshot=self.odds_snapshot, metrics=self.metrics
+        )
+        for outcome, count in stats.items():
+            self.metrics.incr(f'odds_{outcome}', count)
+        self.metrics.incr('odds_written', stats['inserted'] + stats['updated'])
+        return saved
+
+    def _get_or_create_match(self, match_data, teams):
+        try:
+            league = self.identity.get_league(match_data['league'])
+            league_id = league.id if league else None
+            home_team = teams[(match_data['home_team_name'], league_id)]
+            away_team = teams[(match_data['away_team_name'], league_id)]
+
+            match, _ = Match.objects.update_or_create(
+                home_team=home_team,
+                away_team=away_team,
+                match_date=match_data['match_date'],
+                defaults={
+                    'league': league,
+                    'sport': match_data['sport'],
+                    'match_time': match_data['match_time'],
+                    'status': match_data['status']
+                }
+            )
+            return match
+        except Exception as e:
+            self.metrics.error(e)
+            print(f"Error creating match: {str(e)}")
+            return None
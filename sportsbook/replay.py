@@ -0,0 +1,182 @@
+"""
+Record/replay support for the OddsPortal scraper.
+
+`PageRecorder` saves the HTML of every page the scraper reads, and any feed
+responses captured on it, keyed by the URL it navigated to plus the
+pagination step. `ReplayBrowser` is a local
+stand-in for the subset of the Playwright browser/context/page API the
+scraper uses and serves those recordings back, pagination included, so
+parser and persistence changes can be measured without the live site.
+"""
+import json
+import threading
+from pathlib import Path
+
+MANIFEST = 'manifest.json'
+
+class PageRecorder:
+    """
+    Writes a recording: HTML and captured feed bodies per pagination step.
+
+    The manifest maps every URL the scraper navigated to onto a list of
+    steps, each {'html': filename or None, 'feeds': [{'url', 'file'}, ...]}.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pages = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def start(self, url):
+        """Begin a new visit to url, replacing any earlier one"""
+        with self._lock:
+            self.pages[url] = []
+
+    def _step(self, url, step):
+        steps = self.pages.setdefault(url, [])
+        while len(steps) <= step:
+            steps.append({'html': None, 'feeds': []})
+        return steps[step]
+
+    def _write(self, suffix, content):
+        with self._lock:
+            self._count += 1
+            filename = f"{self._count:05d}.{suffix}"
+        (self.directory / filename).write_text(content, encoding='utf-8')
+        return filename
+
+    def record(self, url, step, content):
+        filename = self._write('html', content)
+        with self._lock:
+            self._step(url, step)['html'] = filename
+
+    def record_feeds(self, url, step, feeds):
+        """Save (feed_url, body) pairs captured while showing a step"""
+        files = [{'url': feed_url, 'file': self._write('json', body)} for feed_url, body in feeds]
+        with self._lock:
+            self._step(url, step)['feeds'].extend(files)
+
+    def save(self):
+        with self._lock:
+            manifest = {'pages': self.pages}
+        (self.directory / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+
+class ReplayBrowser:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        manifest = json.loads((self.directory / MANIFEST).read_text(encoding='utf-8'))
+        self.pages = {
+            # Recordings from before feeds were captured list bare filenames
+            url: [{'html': step, 'feeds': []} if isinstance(step, str) else step for step in steps]
+            for url, steps in manifest['pages'].items()
+        }
+
+    async def new_context(self, **kwargs):
+        return ReplayContext(self)
+
+    async def close(self):
+        pass
+
+    def load(self, url, step):
+        filename = self.pages[url][step]['html']
+        if filename is None:
+            raise LookupError(f"No HTML recorded for {url} step {step}")
+        return self.read(filename)
+
+    def read(self, filename):
+        return (self.directory / filename).read_text(encoding='utf-8')
+
+class ReplayContext:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def new_page(self):
+        return ReplayPage(self.browser)
+
+    def on(self, event, handler):
+        pass
+
+    async def route(self, url, handler):
+        pass
+
+    async def close(self):
+        pass
+
+class ReplayPage:
+    def __init__(self, browser):
+        self.browser = browser
+        self.url = None
+        self.step = 0
+        self._handlers = {'request': [], 'response': []}
+
+    def on(self, event, handler):
+        if event in self._handlers:
+            self._handlers[event].append(handler)
+
+    def _show(self, step):
+        """Move to a step and deliver the feed requests and responses recorded for it"""
+        self.step = step
+        for feed in self.browser.pages[self.url][step]['feeds']:
+            request = ReplayRequest(feed['url'])
+            for handler in self._handlers['request']:
+                handler(request)
+            response = ReplayResponse(request, self.browser.read(feed['file']))
+            for handler in self._handlers['response']:
+                handler(response)
+
+    async def goto(self, url, **kwargs):
+        if url not in self.browser.pages:
+            raise LookupError(f"No recording for {url}")
+        self.url = url
+        self._show(0)
+
+    async def wait_for_selector(self, selector, **kwargs):
+        pass
+
+    async def wait_for_load_state(self, state=None, **kwargs):
+        pass
+
+    async def evaluate(self, expression, arg=None):
+        # Recorded pages change instantly, so DOM-change waits succeed at once
+        return True
+
+    async def wait_for_function(self, expression, arg=None, **kwargs):
+        return True
+
+    async def content(self):
+        return self.browser.load(self.url, self.step)
+
+    async def query_selector(self, selector):
+        # Only used for the pagination button: present while steps remain
+        if self.step + 1 < len(self.browser.pages[self.url]):
+            return ReplayButton(self)
+        return None
+
+    async def close(self):
+        pass
+
+class ReplayButton:
+    def __init__(self, page):
+        self.page = page
+
+    async def click(self, **kwargs):
+        self.page._show(self.page.step + 1)
+
+class ReplayRequest:
+    def __init__(self, url):
+        self.url = url
+
+class ReplayResponse:
+    def __init__(self, request, body):
+        self.request = request
+        self.url = request.url
+        self.headers = {'content-length': str(len(body))}
+        self._body = body
+
+    async def text(self):
+        return self._body
+
+    async def json(self):
+        return json.loads(self._body)
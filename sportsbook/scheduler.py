@@ -0,0 +1,119 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from django.utils import timezone
+
+class LeagueState:
+    def __init__(self, league, sport):
+        self.league = league
+        self.sport = sport
+        self.live = False
+        self.kickoff = None
+        # Exponentially weighted share of rows that changed per pass
+        self.change_rate = 1.0
+        self.interval = None
+
+class RefreshScheduler:
+    """
+    Priority queue of leagues ordered by when they next need refreshing.
+
+    After every pass a league's next refresh is picked from whether it has
+    live matches, how close its next kickoff is and how often its rows
+    actually changed recently, so browser time goes where prices move.
+    Intervals are jittered by up to JITTER either way, so leagues added
+    together do not stay in lockstep.
+    """
+
+    LIVE_INTERVAL = 5
+    KICKOFF_INTERVALS = [
+        # (kickoff within, refresh every) in seconds
+        (60 * 60, 60),
+        (6 * 60 * 60, 5 * 60),
+        (24 * 60 * 60, 15 * 60),
+    ]
+    IDLE_INTERVAL = 60 * 60
+    MAX_INTERVAL = 2 * 60 * 60
+    SMOOTHING = 0.3
+    JITTER = 0.1
+
+    def __init__(self, rng=None):
+        self._heap = []
+        self._leagues = {}
+        self._order = itertools.count()
+        self._rng = rng or random.Random()
+
+    def __len__(self):
+        return len(self._leagues)
+
+    def add(self, league, sport):
+        """Track a league, refreshing it straight away if it is new"""
+        key = league['oddsportal_path']
+        if key in self._leagues:
+            self._leagues[key].league = league
+            return
+        self._leagues[key] = LeagueState(league, sport)
+        self._push(key, time.monotonic())
+
+    def _push(self, key, due):
+        heapq.heappush(self._heap, (due, next(self._order), key))
+
+    async def next_due(self):
+        """Wait for the league whose refresh is due first and hand it out"""
+        while True:
+            if self._heap:
+                due, _, key = self._heap[0]
+                delay = due - time.monotonic()
+                if delay <= 0:
+                    heapq.heappop(self._heap)
+                    state = self._leagues[key]
+                    return state.league, state.sport
+            else:
+                delay = 1
+            # Leagues are re-queued by other workers, so never sleep long
+            await asyncio.sleep(min(delay, 1))
+
+    def reschedule(self, league, summary):
+        """Queue a league's next refresh from the outcome of its last pass"""
+        key = league['oddsportal_path']
+        state = self._leagues[key]
+        if summary is None:
+            # Failed pass: back off instead of hammering a broken page
+            interval = min((state.interval or self.LIVE_INTERVAL) * 2, self.MAX_INTERVAL)
+        else:
+            self._observe(state, summary)
+            interval = self.interval(state)
+        state.interval = interval
+        self._push(key, time.monotonic() + interval)
+        return interval
+
+    def _observe(self, state, summary):
+        if summary['rows']:
+            rate = summary['changed'] / summary['rows']
+            state.change_rate += self.SMOOTHING * (rate - state.change_rate)
+
+        # Unchanged rows are not re-parsed, so keep what was last seen for them
+        if summary['changed']:
+            state.live = summary['live'] > 0
+        now = timezone.now()
+        kickoffs = [k for k in (summary['kickoff'], state.kickoff) if k and k >= now]
+        state.kickoff = min(kickoffs) if kickoffs else None
+
+    def interval(self, state):
+        if state.live:
+            return self.LIVE_INTERVAL
+
+        interval = self.IDLE_INTERVAL
+        if state.kickoff:
+            until = (state.kickoff - timezone.now()).total_seconds()
+            for within, every in self.KICKOFF_INTERVALS:
+                if until <= within:
+                    interval = every
+                    break
+
+        # Leagues whose rows keep moving come round up to twice as often,
+        # quiet ones up to half as often again
+        interval *= 1.5 - state.change_rate
+        interval *= self._rng.uniform(1 - self.JITTER, 1 + self.JITTER)
+        return max(self.LIVE_INTERVAL, min(interval, self.MAX_INTERVAL))
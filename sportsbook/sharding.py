@@ -0,0 +1,53 @@
+"""
+Deterministic partitioning of leagues across scraper processes.
+
+Every league is owned by exactly one of N shards, chosen by rendezvous
+(highest random weight) hashing of its oddsportal_path. Every process
+computes the same owner without coordinating. The writer identifies
+leagues by the same path (sportsbook.identity), and teams, matches and
+their odds hang off a league, so shards do not write each other's rows.
+Bookmakers are the exception: any shard may meet a new one, and they are
+inserted with ignore_conflicts. When N changes, only the leagues whose
+highest-scoring shard changed move, roughly 1/N of them, and
+`rebalance_plan` lists them in advance.
+"""
+import hashlib
+
+class Shard:
+    def __init__(self, index, count):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Invalid shard {index}/{count}: expected 0 <= K < N")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, value):
+        """Build a shard from a 'K/N' string, K counting from 0"""
+        try:
+            index, count = (int(part) for part in value.split('/'))
+        except ValueError:
+            raise ValueError(f"Invalid shard '{value}': expected K/N, e.g. 0/4")
+        return cls(index, count)
+
+    def owns(self, path):
+        return shard_for(path, self.count) == self.index
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+def _score(shard, path):
+    digest = hashlib.blake2b(f"{shard}:{path}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+def shard_for(path, count):
+    """Index of the shard that owns the league at `path`"""
+    return max(range(count), key=lambda shard: _score(shard, path))
+
+def rebalance_plan(paths, old_count, new_count):
+    """Map every league path that changes owner to its (old, new) shard"""
+    moves = {}
+    for path in paths:
+        old, new = shard_for(path, old_count), shard_for(path, new_count)
+        if old != new:
+            moves[path] = (old, new)
+    return moves
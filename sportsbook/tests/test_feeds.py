@@ -0,0 +1,136 @@
+import asyncio
+import json
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from django.test import SimpleTestCase
+from django.utils import timezone
+from sportsbook.feeds import FeedCapture, decode_feeds, load_feed_rows
+from sportsbook.replay import MANIFEST, ReplayBrowser, ReplayRequest, ReplayResponse
+
+LEAGUE_URL = 'https://www.oddsportal.com/football/england/premier-league/'
+FEED_URL = 'https://www.oddsportal.com/ajax-sport-country-tournament/1/Ab12/X0/1/0/page/{}/'
+LEAGUE = {'name': 'Premier League', 'sport': 'football', 'oddsportal_path': '/football/england/premier-league'}
+KICKOFF = datetime(2026, 5, 4, 14, 0, tzinfo=dt_timezone.utc)
+
+def feed_row(home, away, prices, handicap_prices=None, status='scheduled'):
+    odds = [{'sport': 'football', 'market': '1X2', 'bookmaker': 'bet365', 'values': prices}]
+    if handicap_prices:
+        odds.append({
+            'sport': 'football', 'market': 'Asian Handicap', 'bookmaker': 'pinnacle',
+            'handicap': '-1.5', 'values': handicap_prices
+        })
+    return {
+        'home-name': f' {home} ', 'away-name': away, 'status': status,
+        'date-start-timestamp': int(KICKOFF.timestamp()), 'odds': odds
+    }
+
+# Two pages of a league as OddsPortal serves them
+FEEDS = [
+    {'d': {'rows': [
+        feed_row('Arsenal', 'Chelsea', [2.10, 3.40, 3.20], [2.60, 1.52]),
+        feed_row('Everton', 'Fulham', ['2.50', '3.10', '2.90'], status='live'),
+    ]}},
+    {'d': {'rows': [feed_row('Leeds', 'Burnley', [1.80, 3.60, 4.50])]}},
+]
+
+class FeedDecodeTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        steps = []
+        for step, payload in enumerate(FEEDS):
+            filename = f'{step:05d}.json'
+            (self.directory / filename).write_text(json.dumps(payload), encoding='utf-8')
+            steps.append({'html': None, 'feeds': [{'url': FEED_URL.format(step + 1), 'file': filename}]})
+        (self.directory / MANIFEST).write_text(json.dumps({'pages': {LEAGUE_URL: steps}}), encoding='utf-8')
+
+    def replay(self):
+        """Walk the recorded league like the scraper does; returns the decoded rows per step"""
+        async def walk():
+            page = await (await ReplayBrowser(self.directory).new_context()).new_page()
+            capture = FeedCapture(page)
+            capture.begin(LEAGUE_URL, 0)
+            await page.goto(LEAGUE_URL)
+            pages, step = [], 0
+            while True:
+                feeds = await capture.drain(LEAGUE_URL, step)
+                pages.append(decode_feeds(load_feed_rows(feeds), LEAGUE, 'football')[0])
+                button = await page.query_selector('a[data-cy="pagination-next"]:not(.disabled)')
+                if not button:
+                    return pages
+                step += 1
+                capture.begin(LEAGUE_URL, step)
+                await button.click()
+        return asyncio.run(walk())
+
+    def test_recorded_feeds_decode_into_writer_records(self):
+        first, second = self.replay()
+        self.assertEqual([m['home_team_name'] for m, _ in first], ['Arsenal', 'Everton'])
+        self.assertEqual([m['home_team_name'] for m, _ in second], ['Leeds'])
+
+        match_data, odds_data = first[0]
+        kickoff = timezone.localtime(KICKOFF)
+        self.assertEqual(match_data['away_team_name'], 'Chelsea')
+        self.assertEqual(match_data['league'], '/football/england/premier-league')
+        self.assertEqual((match_data['match_date'], match_data['match_time']), (kickoff.date(), kickoff.time()))
+        self.assertEqual(match_data['status'], 'scheduled')
+        self.assertEqual(odds_data['1x2']['bet365'], {'home': 2.10, 'draw': 3.40, 'away': 3.20, 'parameter': None})
+        self.assertEqual(odds_data['handicap']['pinnacle'], {'home': 2.60, 'away': 1.52, 'parameter': -1.5})
+
+        self.assertEqual(first[1][0]['status'], 'live')
+        self.assertEqual(first[1][1]['1x2']['bet365']['home'], 2.50)
+
+    def test_unchanged_rows_are_skipped(self):
+        feed_rows = FEEDS[0]['d']['rows']
+        _, hashes = decode_feeds(feed_rows, LEAGUE, 'football')
+        changed = [feed_rows[0], feed_row('Everton', 'Fulham', [2.60, 3.10, 2.90], status='live')]
+        rows, _ = decode_feeds(changed, LEAGUE, 'football', set(hashes))
+        self.assertEqual([m['home_team_name'] for m, _ in rows], ['Everton'])
+
+    def test_unreadable_feeds_and_rows_are_ignored(self):
+        feed_rows = load_feed_rows([
+            (FEED_URL.format(1), 'not json'),
+            (FEED_URL.format(2), json.dumps({'d': {}})),
+            (FEED_URL.format(3), json.dumps(FEEDS[1])),
+        ])
+        rows, hashes = decode_feeds(feed_rows + [{'home-name': 'Leeds'}], LEAGUE, 'football')
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(len(hashes), 2)
+
+class EventPage:
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def emit(self, event, value):
+        self.handlers[event](value)
+
+class FeedCaptureTests(SimpleTestCase):
+    def test_late_response_stays_with_the_step_that_requested_it(self):
+        page = EventPage()
+        capture = FeedCapture(page)
+        capture.begin(LEAGUE_URL, 1)
+        request = ReplayRequest(FEED_URL.format(2))
+        page.emit('request', request)
+        # Step 1 fell back to the HTML and the next click went out first
+        capture.begin(LEAGUE_URL, 2)
+        page.emit('response', ReplayResponse(request, json.dumps(FEEDS[0])))
+        next_request = ReplayRequest(FEED_URL.format(3))
+        page.emit('request', next_request)
+        page.emit('response', ReplayResponse(next_request, json.dumps(FEEDS[1])))
+
+        feeds = asyncio.run(capture.drain(LEAGUE_URL, 2))
+        self.assertEqual([url for url, _ in feeds], [FEED_URL.format(3)])
+
+    def test_other_urls_are_not_captured(self):
+        page = EventPage()
+        capture = FeedCapture(page)
+        capture.begin(LEAGUE_URL, 0)
+        request = ReplayRequest('https://www.oddsportal.com/static/app.js')
+        page.emit('request', request)
+        page.emit('response', ReplayResponse(request, ''))
+        self.assertEqual(asyncio.run(capture.drain(LEAGUE_URL, 0)), [])
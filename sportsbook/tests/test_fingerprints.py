@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from core.tests.base import LOCAL_SERVICES
+from sportsbook.fingerprints import FingerprintStore, page_fingerprint
+from sportsbook.parsing import parse_league_page
+
+LEAGUE = {'name': 'Premier League', 'sport': 'football', 'oddsportal_path': '/football/england/premier-league'}
+
+def row_html(home, price, kickoff='Today 15:00'):
+    return (
+        f'<tr class="deactivate"><td class="table-participant">{home}|Chelsea</td>'
+        f'<td class="datet">{kickoff}</td>'
+        f'<td class="odds-nowrp" data-market="1x2" data-bk="bet365" data-sport="football">'
+        f'<span>{price}</span><span>3.40</span><span>3.20</span></td></tr>'
+    )
+
+def page_html(*rows):
+    return f'<html><body><table class="table-main"><tbody>{"".join(rows)}</tbody></table></body></html>'
+
+def at(day, hour=12):
+    return datetime(2026, 3, day, hour, tzinfo=dt_timezone.utc)
+
+@override_settings(**LOCAL_SERVICES)
+class FingerprintStoreTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_committed_entries_survive_a_new_store(self):
+        key = FingerprintStore.key('https://www.oddsportal.com/football/england/premier-league/', 0)
+        entry = {'page': 'abc', 'rows': ['r1']}
+        self.assertIsNone(FingerprintStore().get(key))
+
+        FingerprintStore().commit(key, entry)
+        self.assertEqual(FingerprintStore().get(key), entry)
+
+    def test_local_copies_are_bounded(self):
+        store = FingerprintStore(maxsize=2)
+        for step in range(5):
+            store.commit(store.key('league', step), {'page': str(step), 'rows': []})
+        self.assertEqual(len(store._local), 2)
+        # Evicted entries are read back from the cache
+        self.assertEqual(store.get(store.key('league', 0)), {'page': '0', 'rows': []})
+
+class RowFingerprintTests(SimpleTestCase):
+    def parse(self, content, skip_rows=()):
+        return parse_league_page(content, LEAGUE, 'football', 'html.parser', skip_rows)
+
+    def test_unchanged_rows_are_skipped(self):
+        rows, hashes = self.parse(page_html(row_html('Arsenal', 2.10), row_html('Everton', 4.00)))
+        self.assertEqual(len(rows), 2)
+
+        rows, next_hashes = self.parse(
+            page_html(row_html('Arsenal', 2.10), row_html('Everton', 4.20)), set(hashes)
+        )
+        self.assertEqual(next_hashes[0], hashes[0])
+        self.assertEqual([row[0]['home_team_name'] for row in rows], ['Everton'])
+        self.assertEqual(rows[0][1]['1x2']['bet365']['home'], 4.20)
+
+    def test_relative_kickoff_changes_at_midnight(self):
+        content = page_html(row_html('Arsenal', 2.10))
+        with mock.patch('django.utils.timezone.now', return_value=at(1)):
+            page_hash = page_fingerprint(content)
+            _, hashes = self.parse(content)
+        with mock.patch('django.utils.timezone.now', return_value=at(1) + timedelta(days=1)):
+            self.assertNotEqual(page_fingerprint(content), page_hash)
+            rows, next_hashes = self.parse(content, set(hashes))
+        self.assertNotEqual(next_hashes, hashes)
+        self.assertEqual(rows[0][0]['match_date'], at(2).date())
+
+    def test_same_day_reads_the_same(self):
+        content = page_html(row_html('Arsenal', 2.10))
+        with mock.patch('django.utils.timezone.now', return_value=at(1, 9)):
+            page_hash = page_fingerprint(content)
+            _, hashes = self.parse(content)
+        with mock.patch('django.utils.timezone.now', return_value=at(1, 18)):
+            self.assertEqual(page_fingerprint(content), page_hash)
+            self.assertEqual(self.parse(content)[1], hashes)
@@ -0,0 +1,35 @@
+from unittest import mock
+from django.test import TestCase
+from core.models import League, Team
+from sportsbook.identity import IdentityMap
+
+class IdentityMapTests(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name='Premier League', country='England')
+        self.identity = IdentityMap()
+        self.identity.preload()
+
+    def test_misses_are_inserted_once(self):
+        wanted = [('Arsenal', self.league, 'football'), ('Chelsea', self.league, 'football')]
+        teams = self.identity.get_teams(wanted)
+        self.assertEqual(teams[('Arsenal', self.league.id)].league, self.league)
+        with self.assertNumQueries(0):
+            self.identity.get_teams(wanted)
+        self.assertEqual(Team.objects.count(), 2)
+
+    def test_teams_without_a_league_are_found_without_returned_ids(self):
+        bulk_create = Team.objects.bulk_create
+
+        def without_ids(teams):
+            # As a backend that cannot return ids from a bulk insert
+            created = bulk_create(teams)
+            for team in created:
+                team.pk = None
+            return created
+
+        with mock.patch.object(Team.objects, 'bulk_create', without_ids):
+            teams = self.identity.get_teams([
+                ('Arsenal', self.league, 'football'), ('Free Agents', None, 'football')
+            ])
+        self.assertIsNotNone(teams[('Arsenal', self.league.id)].pk)
+        self.assertEqual(teams[('Free Agents', None)], Team.objects.get(name='Free Agents'))
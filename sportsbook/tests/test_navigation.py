@@ -0,0 +1,121 @@
+import asyncio
+from urllib.request import urlopen
+from django.test import SimpleTestCase
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from core.metrics import Metrics
+from sportsbook.fixture_site import FIRST_PARTY_HOST, THIRD_PARTY_HOST, FixtureSite, localize, walk_league
+from sportsbook.navigation import PROFILES, ROW_REPLACED_JS, WAIT_STRATEGIES
+
+class NavigationProfileTests(SimpleTestCase):
+    def test_lean_profile_blocks_assets_and_third_parties(self):
+        lean = localize(PROFILES['lean'])
+        self.assertTrue(lean.is_blocked('image', f'http://{FIRST_PARTY_HOST}/banner.png'))
+        self.assertTrue(lean.is_blocked('script', f'http://{THIRD_PARTY_HOST}/tracker.js'))
+        self.assertFalse(lean.is_blocked('document', f'http://{FIRST_PARTY_HOST}/football/'))
+        self.assertFalse(lean.is_blocked('fetch', f'http://www.{FIRST_PARTY_HOST}/feed/1.json'))
+
+    def test_full_profile_blocks_nothing(self):
+        self.assertFalse(PROFILES['full'].blocks_requests)
+        self.assertFalse(PROFILES['full'].is_blocked('image', f'http://{THIRD_PARTY_HOST}/ad.png'))
+
+    def test_fixture_site_serves_league_and_feeds(self):
+        with FixtureSite(steps=2, feed_delay=0) as site:
+            page = urlopen(f'http://127.0.0.1:{site.port}/football/england/premier-league/').read().decode()
+            feed = urlopen(f'http://127.0.0.1:{site.port}/feed/1.json').read().decode()
+        self.assertIn('Home 0-0', page)
+        self.assertIn('Home 1-0', feed)
+        self.assertIn('"last": true', feed)
+
+class FakePage:
+    """
+    Answers the 'dom' wait's scripts without a browser: the table watcher
+    resolves to `changed`, and the row check passes once `replaced`.
+    """
+
+    def __init__(self, changed, replaced):
+        self.changed = changed
+        self.replaced = replaced
+        self.functions = []
+
+    async def evaluate(self, expression, arg=None):
+        if expression == '() => window.__oddsTableChanged':
+            return self.changed
+
+    async def wait_for_function(self, expression, arg=None, timeout=None):
+        self.functions.append(expression)
+        if not self.replaced:
+            raise PlaywrightTimeoutError(f'Timeout {timeout}ms exceeded.')
+
+class FakeButton:
+    async def click(self):
+        pass
+
+class DomWaitTests(SimpleTestCase):
+    def paginate(self, page):
+        metrics = Metrics()
+        asyncio.run(PROFILES['lean'].paginate(page, FakeButton(), metrics))
+        return metrics
+
+    def test_changed_table_needs_no_fallback(self):
+        page = FakePage(changed=True, replaced=False)
+        metrics = self.paginate(page)
+        self.assertEqual(page.functions, [])
+        self.assertNotIn('wait_timeout', metrics.counters)
+
+    def test_timed_out_watcher_falls_back_to_the_row_check(self):
+        page = FakePage(changed=False, replaced=True)
+        metrics = self.paginate(page)
+        self.assertEqual(page.functions, [ROW_REPLACED_JS])
+        self.assertEqual(metrics.counters['wait_timeout'], 1)
+
+    def test_unchanged_page_raises(self):
+        with self.assertRaises(PlaywrightTimeoutError):
+            self.paginate(FakePage(changed=False, replaced=False))
+
+class FixtureSiteBrowserTests(SimpleTestCase):
+    """Profiles in a real browser against the local stand-in; skipped without Chromium"""
+
+    def run_browser(self, walk):
+        try:
+            from playwright.async_api import async_playwright
+        except ImportError:
+            self.skipTest('playwright is not installed')
+
+        async def run():
+            async with async_playwright() as p:
+                try:
+                    browser = await p.chromium.launch(headless=True)
+                except Exception as e:
+                    self.skipTest(f"Chromium is not available: {str(e).splitlines()[0]}")
+                try:
+                    with FixtureSite(steps=3, feed_delay=0.3) as site:
+                        return await walk(browser, site)
+                finally:
+                    await browser.close()
+        return asyncio.run(run())
+
+    def test_targeted_waits_read_each_page_once_it_has_arrived(self):
+        async def walk(browser, site):
+            results = {}
+            for wait in WAIT_STRATEGIES:
+                if wait == 'networkidle':
+                    # Idle already holds when the click lands, before the feed request
+                    continue
+                profile = localize(PROFILES['lean'])
+                profile.wait = wait
+                results[wait] = (await walk_league(browser, site, profile))[1]
+            return results
+
+        for wait, first_rows in self.run_browser(walk).items():
+            self.assertEqual(first_rows, ['Home 0-0', 'Home 1-0', 'Home 2-0'], wait)
+
+    def test_lean_profile_receives_fewer_bytes(self):
+        async def walk(browser, site):
+            return {
+                name: (await walk_league(browser, site, localize(profile)))[0]
+                for name, profile in PROFILES.items()
+            }
+
+        metrics = self.run_browser(walk)
+        self.assertGreater(metrics['lean'].counters['requests_blocked'], 0)
+        self.assertLess(metrics['lean'].counters['bytes_received'], metrics['full'].counters['bytes_received'] / 2)
@@ -0,0 +1,101 @@
+import random
+import tempfile
+from datetime import timedelta
+from django.utils import timezone
+from django.test import SimpleTestCase
+from core.models import Match
+from core.tests.base import OddsTestCase
+from core.write_behind import WriteBehind
+from sportsbook.pipeline import PersistenceWriter
+from sportsbook.scheduler import LeagueState, RefreshScheduler
+
+class NoJitter:
+    def uniform(self, low, high):
+        return 1.0
+
+class RefreshSchedulerTests(SimpleTestCase):
+    def setUp(self):
+        self.scheduler = RefreshScheduler(rng=NoJitter())
+        self.state = LeagueState({'oddsportal_path': '/football/england/premier-league'}, 'football')
+
+    def observe(self, rows=20, changed=0, live=0, kickoff=None):
+        self.scheduler._observe(self.state, {'rows': rows, 'changed': changed, 'live': live, 'kickoff': kickoff})
+        return self.scheduler.interval(self.state)
+
+    def test_unchanged_league_backs_off(self):
+        intervals = [self.observe(changed=0) for _ in range(10)]
+        self.assertEqual(intervals, sorted(intervals))
+        self.assertGreater(intervals[-1], RefreshScheduler.IDLE_INTERVAL)
+        self.assertLessEqual(intervals[-1], RefreshScheduler.IDLE_INTERVAL * 1.5)
+
+    def test_busy_league_comes_round_sooner(self):
+        busy = self.observe(changed=20)
+        self.state.change_rate = 1.0
+        quiet = [self.observe(changed=0) for _ in range(5)][-1]
+        self.assertLess(busy, quiet)
+
+    def test_intervals_tighten_towards_kickoff(self):
+        intervals = []
+        for hours in (20, 3, 0.5):
+            self.state.kickoff = None
+            intervals.append(self.observe(changed=10, kickoff=timezone.now() + timedelta(hours=hours)))
+        self.assertEqual(intervals, sorted(intervals, reverse=True))
+        self.assertLessEqual(intervals[-1], 60)
+
+    def test_live_league_refreshes_fastest(self):
+        self.assertEqual(self.observe(changed=1, live=1), RefreshScheduler.LIVE_INTERVAL)
+        # Unchanged rows are not re-parsed, so the league stays live
+        self.assertEqual(self.observe(changed=0), RefreshScheduler.LIVE_INTERVAL)
+        self.assertNotEqual(self.observe(changed=1, live=0), RefreshScheduler.LIVE_INTERVAL)
+
+    def test_kickoffs_in_the_past_are_forgotten(self):
+        self.observe(changed=1, kickoff=timezone.now() - timedelta(minutes=5))
+        self.assertIsNone(self.state.kickoff)
+
+    def test_failed_pass_doubles_the_interval(self):
+        league = self.state.league
+        self.scheduler.add(league, 'football')
+        first = self.scheduler.reschedule(league, None)
+        self.assertEqual(self.scheduler.reschedule(league, None), first * 2)
+
+    def test_jitter_stays_within_bounds(self):
+        scheduler = RefreshScheduler(rng=random.Random(3))
+        base = self.observe(changed=10)
+        intervals = {scheduler.interval(self.state) for _ in range(200)}
+        self.assertGreater(len(intervals), 1)
+        self.assertGreaterEqual(min(intervals), base * (1 - RefreshScheduler.JITTER))
+        self.assertLessEqual(max(intervals), base * (1 + RefreshScheduler.JITTER))
+
+class SnapshotPruneTests(OddsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.finished = self.create_match(status='finished')
+        self.past = self.create_match(match_date=timezone.now() - timedelta(days=3))
+        # Rows of a match deleted since they were written
+        deleted_id = self.past.id + 100
+        self.gone = [self.finished.id, self.past.id, deleted_id]
+
+    def rows(self):
+        return {
+            (match_id, 1, '1x2', None): (1, ('2.10', '3.40', '3.20', False))
+            for match_id in [self.match.id, *self.gone]
+        }
+
+    def test_writer_keeps_only_current_matches(self):
+        writer = PersistenceWriter()
+        writer.odds_snapshot = self.rows()
+        writer._write(('prune', None))
+        self.assertEqual([key[0] for key in writer.odds_snapshot], [self.match.id])
+
+    def test_write_behind_keeps_only_current_matches(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        write_behind = WriteBehind(directory.name, fsync=False)
+        self.addCleanup(write_behind.journal.close)
+        write_behind.published = self.rows()
+        write_behind.snapshot = self.rows()
+
+        write_behind.prune()
+        self.assertEqual([key[0] for key in write_behind.published], [self.match.id])
+        self.assertEqual([key[0] for key in write_behind.snapshot], [self.match.id])
+        self.assertTrue(Match.objects.filter(id=self.finished.id).exists())
@@ -0,0 +1,68 @@
+import subprocess
+import sys
+from django.test import SimpleTestCase, TestCase
+from core.models import League
+from sportsbook.identity import IdentityMap
+from sportsbook.sharding import Shard, rebalance_plan, shard_for
+
+PATHS = [f'/football/country-{index}/league-{index % 7}' for index in range(400)]
+
+class ShardTests(SimpleTestCase):
+    def test_parse(self):
+        shard = Shard.parse('2/4')
+        self.assertEqual((shard.index, shard.count), (2, 4))
+        self.assertEqual(str(shard), '2/4')
+        for value in ('4/4', '-1/4', '0/0', '1', 'a/b', '1/2/3', ''):
+            with self.assertRaises(ValueError, msg=value):
+                Shard.parse(value)
+
+    def test_owner_is_pinned_across_processes(self):
+        # Owners must not depend on the process (e.g. PYTHONHASHSEED) or
+        # a redeploy would reshuffle every league
+        expected = {
+            '/football/england/premier-league': [0, 1, 1, 3, 6],
+            '/football/spain/laliga': [0, 1, 2, 3, 3],
+            '/basketball/usa/nba': [0, 0, 0, 0, 7],
+        }
+        for path, owners in expected.items():
+            self.assertEqual([shard_for(path, count) for count in (1, 2, 3, 4, 8)], owners, path)
+        script = 'from sportsbook.sharding import shard_for; print(shard_for("/football/spain/laliga", 8))'
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), '3')
+
+    def test_every_league_has_exactly_one_owner(self):
+        shards = [Shard(index, 4) for index in range(4)]
+        for path in PATHS:
+            self.assertEqual(sum(shard.owns(path) for shard in shards), 1, path)
+        counts = [sum(shard.owns(path) for path in PATHS) for shard in shards]
+        self.assertTrue(all(60 <= count <= 140 for count in counts), counts)
+
+    def test_growing_moves_only_leagues_to_the_new_shard(self):
+        moves = rebalance_plan(PATHS, 4, 5)
+        self.assertTrue(all(new == 4 for _, new in moves.values()))
+        self.assertEqual(set(moves), {path for path in PATHS if shard_for(path, 5) == 4})
+        self.assertLess(len(moves), len(PATHS) * 0.3)
+
+    def test_shrinking_moves_only_the_removed_shards_leagues(self):
+        moves = rebalance_plan(PATHS, 5, 4)
+        self.assertTrue(all(old == 4 for old, _ in moves.values()))
+        self.assertEqual(set(moves), {path for path in PATHS if shard_for(path, 5) == 4})
+
+class LeagueIdentityTests(TestCase):
+    def league(self, country, path):
+        return {'name': 'Premier League', 'sport': 'football', 'country': country, 'oddsportal_path': path}
+
+    def test_leagues_sharing_a_name_stay_apart(self):
+        # Different shards can own these, so they must not share a row
+        england, wales = '/football/england/premier-league', '/football/wales/premier-league'
+        self.assertNotEqual(shard_for(england, 2), shard_for(wales, 2))
+        first, second = IdentityMap(), IdentityMap()
+        first.save_league(self.league('England', england))
+        second.save_league(self.league('Wales', wales))
+        first.save_league(self.league('England', england))
+
+        self.assertEqual(
+            dict(League.objects.values_list('oddsportal_path', 'country')),
+            {england: 'England', wales: 'Wales'}
+        )
+        self.assertEqual(second.get_league(wales).country, 'Wales')